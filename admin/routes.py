@@ -22,9 +22,16 @@ from firebase_db import (
     seller_badge_service
 )
 from firebase_config import get_firestore_db
+from firebase_cache import catalog_cache, bypass_catalog_cache
 from google.cloud.firestore_v1.base_query import FieldFilter
 
 
+@admin_bp.before_request
+def read_catalog_uncached():
+    """Admin pages always read sellers, products and deliverers fresh from Firestore"""
+    bypass_catalog_cache()
+
+
 @admin_bp.route('/dashboard')
 @admin_required
 def admin_dashboard_enhanced():
@@ -32,30 +39,18 @@ def admin_dashboard_enhanced():
     db = get_firestore_db()
     product_service = get_product_service()
 
-    # Get summary statistics
-    # Count sellers
-    total_sellers = len(seller_service.get_all_sellers())
-
-    # Count active products
-    all_products = product_service.get_all()
-    total_products = sum(1 for p in all_products if p.get('is_active', True))
-
-    # Count transactions
-    all_transactions = db.collection('transactions').stream()
-    total_transactions = sum(1 for _ in all_transactions)
+    # Get summary statistics (server-side aggregations, no documents transferred)
+    total_sellers = seller_service.count()
+    total_products = product_service.count([('is_active', '==', True)])
+    total_transactions = transaction_service.count()
 
     # Calculate total revenue and commission
-    completed_trans = db.collection('transactions').where(
-        filter=FieldFilter('status', 'in', ['COMPLETED', 'DELIVERED'])
-    ).stream()
-
-    total_revenue = 0.0
-    platform_commission = 0.0
-
-    for doc in completed_trans:
-        trans = doc.to_dict()
-        total_revenue += float(trans.get('total_amount', 0))
-        platform_commission += float(trans.get('platform_commission', 0))
+    completed_totals = transaction_service.aggregate(
+        [('status', 'in', ['COMPLETED', 'DELIVERED'])],
+        sum_fields=['total_amount', 'platform_commission']
+    )
+    total_revenue = completed_totals['sum_total_amount']
+    platform_commission = completed_totals['sum_platform_commission']
 
     summary = {
         'total_sellers': total_sellers,
@@ -70,31 +65,37 @@ def admin_dashboard_enhanced():
         'created_at', direction='DESCENDING'
     ).limit(15).stream()
 
-    transactions = []
-    for doc in recent_trans:
-        trans = {**doc.to_dict(), 'id': doc.id}
+    transactions = [{**doc.to_dict(), 'id': doc.id} for doc in recent_trans]
 
+    # Get the newest active products with seller info
+    active_products = product_service.query(
+        [('is_active', '==', True)], limit=50, order_by='created_at', direction='DESCENDING'
+    )
+
+    # Batch-load the users and sellers referenced on this page
+    users_by_id = get_user_service().get_map([t.get('user_id') for t in transactions])
+    sellers_by_id = seller_service.get_map(
+        [t.get('seller_id') for t in transactions] + [p.get('seller_id') for p in active_products]
+    )
+
+    for trans in transactions:
         # Get user email
         if trans.get('user_id'):
-            user = get_user_service().get(trans['user_id'])
+            user = users_by_id.get(trans['user_id'])
             trans['user_email'] = user.get('email', '') if user else ''
 
         # Get seller name
         if trans.get('seller_id'):
-            seller = seller_service.get(trans['seller_id'])
+            seller = sellers_by_id.get(trans['seller_id'])
             trans['seller_name'] = seller.get('name', '') if seller else ''
 
         trans['display_amount'] = f"R{float(trans.get('total_amount', 0)):.2f}"
-        transactions.append(trans)
-
-    # Get all active products with seller info
-    active_products = [p for p in all_products if p.get('is_active', True)]
 
     products = []
-    for product in active_products[:50]:  # Limit to 50
+    for product in active_products:
         # Get seller info
         if product.get('seller_id'):
-            seller = seller_service.get(product['seller_id'])
+            seller = sellers_by_id.get(product['seller_id'])
             product['seller_name'] = seller.get('name', '') if seller else ''
             product['handle'] = seller.get('handle', '') if seller else ''
             product['verification_status'] = seller.get('verification_status', '') if seller else ''
@@ -103,9 +104,6 @@ def admin_dashboard_enhanced():
         product['display_price'] = f"R{float(product.get('price', 0)):.2f}"
         products.append(product)
 
-    # Sort products by created_at
-    products.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-
     return render_template('admin_dashboard.html',
         summary=summary,
         transactions=transactions,
@@ -122,15 +120,18 @@ def admin_verification():
     pending = verification_submission_service.get_pending_submissions()
 
     # Enrich with user and seller info
+    users_by_id = get_user_service().get_map([s.get('user_id') for s in pending])
+    sellers_by_id = seller_service.get_map([s.get('seller_id') for s in pending])
+
     for submission in pending:
         # Get user email
         if submission.get('user_id'):
-            user = get_user_service().get(submission['user_id'])
+            user = users_by_id.get(submission['user_id'])
             submission['email'] = user.get('email', '') if user else ''
 
         # Get seller name
         if submission.get('seller_id'):
-            seller = seller_service.get(submission['seller_id'])
+            seller = sellers_by_id.get(submission['seller_id'])
             submission['seller_name'] = seller.get('name', '') if seller else ''
 
     return render_template('admin_verification.html', submissions=pending)
@@ -180,22 +181,22 @@ def admin_moderation():
         filter=FieldFilter('status', '==', 'pending')
     ).stream()
 
-    queue = []
-    for doc in queue_query:
-        item = {**doc.to_dict(), 'id': doc.id}
+    queue = [{**doc.to_dict(), 'id': doc.id} for doc in queue_query]
 
+    sellers_by_id = seller_service.get_map([item.get('seller_id') for item in queue])
+    users_by_id = get_user_service().get_map([item.get('flagged_by') for item in queue])
+
+    for item in queue:
         # Get seller name
         if item.get('seller_id'):
-            seller = seller_service.get(item['seller_id'])
+            seller = sellers_by_id.get(item['seller_id'])
             item['seller_name'] = seller.get('name', '') if seller else ''
 
         # Get flagged by user email
         if item.get('flagged_by'):
-            user = get_user_service().get(item['flagged_by'])
+            user = users_by_id.get(item['flagged_by'])
             item['flagged_by_email'] = user.get('email', '') if user else ''
 
-        queue.append(item)
-
     return render_template('admin_moderation.html', queue=queue)
 
 
@@ -203,24 +204,22 @@ def admin_moderation():
 @admin_required
 def admin_tax_compliance():
     """Tax and Compliance Section"""
-    db = get_firestore_db()
     vat_rate = app.config['VAT_RATE']
 
     # Calculate VAT for the last month
     current_month = datetime.now().month
     current_year = datetime.now().year
 
-    # Query for all completed sales this month
-    completed_trans = db.collection('transactions').where(
-        filter=FieldFilter('status', '==', 'COMPLETED')
-    ).stream()
+    # Stream completed sales page by page (only the fields needed for VAT)
+    completed_trans = transaction_service.iter_query(
+        [('status', '==', 'COMPLETED')],
+        fields=['funds_settled_at', 'seller_id', 'seller_amount']
+    )
 
     # Group by seller
     seller_vat = {}
 
-    for doc in completed_trans:
-        trans = doc.to_dict()
-
+    for trans in completed_trans:
         # Check if transaction is from current month/year
         funds_settled_at = trans.get('funds_settled_at')
         if funds_settled_at and isinstance(funds_settled_at, str):
@@ -239,9 +238,11 @@ def admin_tax_compliance():
                 pass
 
     # Enrich with seller names
+    sellers_by_id = seller_service.get_map(list(seller_vat))
+
     vat_reports = []
     for seller_id, data in seller_vat.items():
-        seller = seller_service.get(seller_id)
+        seller = sellers_by_id.get(seller_id)
         vat_reports.append({
             'seller_name': seller.get('name', '') if seller else 'Unknown',
             'total_gross_sales': data['gross_sales'],
@@ -259,7 +260,6 @@ def admin_tax_compliance():
 @admin_required
 def export_vat_report():
     """Export VAT reports to CSV"""
-    db = get_firestore_db()
     vat_rate = app.config['VAT_RATE']
 
     output = StringIO()
@@ -272,14 +272,14 @@ def export_vat_report():
     current_month = datetime.now().month
     current_year = datetime.now().year
 
-    completed_trans = db.collection('transactions').where(
-        filter=FieldFilter('status', '==', 'COMPLETED')
-    ).stream()
+    completed_trans = transaction_service.iter_query(
+        [('status', '==', 'COMPLETED')],
+        fields=['funds_settled_at', 'seller_id', 'seller_amount']
+    )
 
     seller_vat = {}
 
-    for doc in completed_trans:
-        trans = doc.to_dict()
+    for trans in completed_trans:
         funds_settled_at = trans.get('funds_settled_at')
 
         if funds_settled_at and isinstance(funds_settled_at, str):
@@ -297,8 +297,10 @@ def export_vat_report():
                 pass
 
     # Write data rows
+    sellers_by_id = seller_service.get_map(list(seller_vat))
+
     for seller_id, data in seller_vat.items():
-        seller = seller_service.get(seller_id)
+        seller = sellers_by_id.get(seller_id)
         seller_name = seller.get('name', 'Unknown') if seller else 'Unknown'
         gross_sales = data['gross_sales']
         vat_due = gross_sales * vat_rate
@@ -331,3 +333,16 @@ def cleanup_expired_codes():
         }), 200
     else:
         return jsonify(result), 500
+
+
+# ==================== CACHE MONITORING ====================
+
+@admin_bp.route('/api/cache-stats')
+@admin_required
+def cache_stats():
+    """Catalog cache hit/miss counters for this worker process"""
+    return jsonify({
+        'success': True,
+        'enabled': catalog_cache.enabled,
+        'stats': catalog_cache.stats()
+    }), 200
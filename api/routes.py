@@ -15,11 +15,16 @@ from config import Config
 from firebase_db import (
     get_user_service,
     transaction_service,
+    token_transaction_service,
     get_product_service,
     seller_service
 )
 from firebase_config import get_firestore_db
-from google.cloud.firestore_v1.base_query import FieldFilter
+from firebase_pagination import InvalidCursor, encode_offset_cursor, decode_offset_cursor
+from search import product_search
+from firebase_geo import parse_coordinates, parse_radius
+from http_cache import Validator
+from marketplace.product_bundle import ProductBundle, parse_expand
 from google.cloud import firestore
 
 
@@ -411,39 +416,23 @@ def withdraw_tokens():
 @api_bp.route('/fintech/transactions', methods=['GET'])
 @api_login_required
 def get_transactions():
-    """Get user's transaction history"""
+    """Get user's transaction history (cursor paginated)"""
     limit = request.args.get('limit', 50, type=int)
-    offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor', None)
     transaction_type = request.args.get('type', None)
 
-    db = get_firestore_db()
-
-    # Query transactions where user is sender or recipient
-    query1 = db.collection('token_transactions').where(
-        filter=FieldFilter('from_user_id', '==', request.user_id)
-    )
-
-    query2 = db.collection('token_transactions').where(
-        filter=FieldFilter('to_user_id', '==', request.user_id)
-    )
-
-    # Apply type filter if provided
-    if transaction_type:
-        query1 = query1.where(filter=FieldFilter('transaction_type', '==', transaction_type))
-        query2 = query2.where(filter=FieldFilter('transaction_type', '==', transaction_type))
-
-    # Get results
-    transactions = []
-    for doc in query1.stream():
-        transactions.append({**doc.to_dict(), 'id': doc.id})
-    for doc in query2.stream():
-        transactions.append({**doc.to_dict(), 'id': doc.id})
-
-    # Sort by created_at
-    transactions.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    # Transactions where user is sender or recipient, newest first
+    try:
+        page = token_transaction_service.get_user_history_page(
+            request.user_id,
+            transaction_type=transaction_type,
+            page_size=limit,
+            cursor=cursor
+        )
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    # Apply pagination
-    paginated = transactions[offset:offset + limit]
+    paginated = page['items']
 
     # Format transactions
     result = []
@@ -468,7 +457,8 @@ def get_transactions():
         'transactions': result,
         'count': len(result),
         'limit': limit,
-        'offset': offset
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more']
     }), 200
 
 
@@ -476,40 +466,44 @@ def get_transactions():
 
 @api_bp.route('/marketplace/products', methods=['GET'])
 def get_products():
-    """Get marketplace products (public endpoint)"""
-    limit = request.args.get('limit', 20, type=int)
-    offset = request.args.get('offset', 0, type=int)
-    category = request.args.get('category', None)
-    search = request.args.get('search', None)
-
+    """Get marketplace products (public endpoint, cursor paginated)"""
     product_service = get_product_service()
 
-    # Get all active products
-    all_products = product_service.get_all()
-    active_products = [p for p in all_products if p.get('is_active', True)]
-
-    # Filter by category
-    if category:
-        active_products = [p for p in active_products if p.get('category') == category]
+    # Searches are capped like pages: each result is hydrated from Firestore
+    limit = max(1, min(request.args.get('limit', 20, type=int), product_service.MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', None)
+    category = request.args.get('category', None)
+    search = request.args.get('search', None)
 
-    # Filter by search
+    facets = None
     if search:
-        search_lower = search.lower()
-        active_products = [
-            p for p in active_products
-            if search_lower in p.get('name', '').lower() or search_lower in p.get('description', '').lower()
-        ]
+        # Ranked by relevance from the search index: the cursor is an offset into the ranking
+        try:
+            offset = decode_offset_cursor(cursor) if cursor else 0
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        found = product_search.faceted_search(search, category=category, limit=limit, offset=offset)
+        paginated, facets = found['products'], found['facets']
+        has_more = found['total'] > offset + limit
+        page = {'next_cursor': encode_offset_cursor(offset + limit) if has_more else None, 'has_more': has_more}
+    else:
+        try:
+            page = product_service.get_active_products_page(category=category, page_size=limit, cursor=cursor)
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        paginated = page['items']
 
-    # Sort by created_at
-    active_products.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    # Format products with seller info
+    sellers_by_id = seller_service.get_map([p.get('seller_id') for p in paginated])
 
-    # Apply pagination
-    paginated = active_products[offset:offset + limit]
+    # The page's products and sellers version the response (facet counts too, for searches)
+    validator = Validator(paginated + list(sellers_by_id.values()), page['next_cursor'], page['has_more'], facets)
+    if validator.is_fresh():
+        return validator.not_modified()
 
-    # Format products with seller info
     result = []
     for p in paginated:
-        seller = seller_service.get(p.get('seller_id')) if p.get('seller_id') else None
+        seller = sellers_by_id.get(p.get('seller_id'))
 
         result.append({
             'id': p.get('id'),
@@ -531,52 +525,128 @@ def get_products():
             } if seller else None
         })
 
-    return jsonify({
+    response = {
         'success': True,
         'products': result,
         'count': len(result),
         'limit': limit,
-        'offset': offset
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more']
+    }
+    if facets is not None:
+        # Result counts per category, price bucket, seller verification and location
+        response['facets'] = facets
+
+    return validator.apply(jsonify(response)), 200
+
+
+@api_bp.route('/marketplace/suggest', methods=['GET'])
+def get_suggestions():
+    """Search-as-you-type suggestions: product names, categories and seller handles (public endpoint)"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+
+    suggestions = product_search.suggest(query, limit=limit) if query else []
+
+    response = jsonify({
+        'success': True,
+        'query': query,
+        'suggestions': suggestions
+    })
+    # Suggestions change slowly; let clients and proxies reuse them between keystrokes
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response, 200
+
+
+@api_bp.route('/marketplace/sellers/nearby', methods=['GET'])
+def get_nearby_sellers():
+    """Sellers within radius_km (default 10) of lat/lon, nearest first (public endpoint)"""
+    try:
+        latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lon'))
+        radius_km = parse_radius(request.args.get('radius_km'), 10, Config.NEARBY_MAX_RADIUS_KM)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    sellers = seller_service.within_radius(latitude, longitude, radius_km, limit=limit)
+
+    return jsonify({
+        'success': True,
+        'radius_km': radius_km,
+        'sellers': [{
+            'id': seller['id'],
+            'name': seller.get('name'),
+            'handle': seller.get('handle'),
+            'location': seller.get('location'),
+            'distance_km': seller['distance_km'],
+            'is_verified': seller.get('verification_status') == 'verified'
+        } for seller in sellers],
+        'count': len(sellers)
     }), 200
 
 
 @api_bp.route('/marketplace/product/<product_id>', methods=['GET'])
 def get_product_detail(product_id):
-    """Get detailed product information"""
-    product_service = get_product_service()
+    """
+    Get detailed product information
 
-    product = product_service.get(product_id)
+    Query params:
+        expand: Related data to include, comma separated: seller (default), reviews
+    """
+    expand = parse_expand(request.args.get('expand'))
+    bundle = ProductBundle.load(product_id, expand=expand)
 
-    if not product or not product.get('is_active', True):
+    if bundle is None:
         return jsonify({'error': 'Product not found'}), 404
 
-    # Get seller info
-    seller = seller_service.get(product.get('seller_id')) if product.get('seller_id') else None
+    validator = Validator(bundle.documents(), sorted(expand))
+    if validator.is_fresh():
+        return validator.not_modified()
+
+    product = bundle.product
+    seller = bundle.seller
+    product_json = {
+        'id': product.get('id'),
+        'name': product.get('name'),
+        'description': product.get('description'),
+        'category': product.get('category'),
+        'price': float(product.get('price', 0)),
+        'original_price': float(product.get('original_price')) if product.get('original_price') else None,
+        'stock_count': product.get('stock_count'),
+        'sku': product.get('sku'),
+        'images': product.get('images', []),
+        'rating': float(product.get('avg_rating', 0)),
+        'reviews_count': product.get('total_reviews', 0)
+    }
+
+    if 'seller' in expand:
+        product_json['seller'] = {
+            'id': seller.get('id'),
+            'name': seller.get('name', ''),
+            'handle': seller.get('handle', ''),
+            'location': seller.get('location', ''),
+            'rating': float(seller.get('avg_rating', 0)),
+            'is_verified': seller.get('verification_status') == 'verified'
+        } if seller else None
+
+    if 'reviews' in expand:
+        reviewers = bundle.reviewers()
+        product_json['reviews'] = [{
+            'id': review.get('id'),
+            'rating': review.get('rating'),
+            'review_text': review.get('review_text'),
+            'created_at': review['created_at'].isoformat() if isinstance(review.get('created_at'), datetime) else None,
+            'reviewer': {
+                'id': review.get('user_id'),
+                'name': reviewers.get(review.get('user_id'), {}).get('full_name', '')
+            }
+        } for review in bundle.reviews or []]
 
-    return jsonify({
+    return validator.apply(jsonify({
         'success': True,
-        'product': {
-            'id': product.get('id'),
-            'name': product.get('name'),
-            'description': product.get('description'),
-            'category': product.get('category'),
-            'price': float(product.get('price', 0)),
-            'original_price': float(product.get('original_price')) if product.get('original_price') else None,
-            'stock_count': product.get('stock_count'),
-            'sku': product.get('sku'),
-            'images': product.get('images', []),
-            'rating': float(product.get('avg_rating', 0)),
-            'reviews_count': product.get('total_reviews', 0),
-            'seller': {
-                'id': seller.get('id') if seller else None,
-                'name': seller.get('name') if seller else '',
-                'handle': seller.get('handle') if seller else '',
-                'location': seller.get('location') if seller else '',
-                'rating': float(seller.get('avg_rating', 0)) if seller else 0,
-                'is_verified': seller.get('verification_status') == 'verified' if seller else False
-            } if seller else None
-        }
-    }), 200
+        'product': product_json
+    })), 200
 
 
 # ==================== ERROR HANDLERS ====================
@@ -73,6 +73,9 @@ def create_app(config_name='development'):
     # Register context processors
     register_context_processors(app)
 
+    # Register per-request hooks
+    register_request_hooks(app)
+
     # Note: Firebase handles connection pooling automatically
     # No teardown needed unlike SQLite
 
@@ -146,9 +149,61 @@ def register_error_handlers(app):
                              error_message="Internal server error"), 500
 
 
+def register_request_hooks(app):
+    """Register before/after request hooks"""
+    from flask import request
+    from firebase_metrics import start_request_metrics, get_request_metrics
+
+    @app.before_request
+    def begin_firestore_metrics():
+        """Start counting Firestore calls made by this request"""
+        if app.config.get('FIRESTORE_METRICS_ENABLED'):
+            start_request_metrics()
+
+    @app.after_request
+    def report_firestore_metrics(response):
+        """Attach Firestore totals to the response and log them"""
+        metrics = get_request_metrics()
+        if metrics is None:
+            return response
+
+        response.headers['Server-Timing'] = metrics.server_timing()
+
+        route = request.url_rule.rule if request.url_rule else request.path
+        totals = metrics.as_dict()
+        app.logger.info(
+            "firestore route=%s method=%s status=%s reads=%d writes=%d queries=%d rpcs=%d db_ms=%.2f",
+            route, request.method, response.status_code, totals['reads'], totals['writes'],
+            totals['queries'], totals['rpcs'], totals['db_ms']
+        )
+
+        threshold = app.config.get('N_PLUS_ONE_THRESHOLD')
+        if threshold and metrics.point_reads > threshold:
+            app.logger.warning(
+                "N+1 suspected: route=%s issued %d point reads (threshold %d)",
+                route, metrics.point_reads, threshold
+            )
+        return response
+
+    @app.after_request
+    def add_loader_stats(response):
+        """Expose request loader hit/miss counts in debug mode"""
+        loader = g.get('_request_loader')
+        if loader is not None and app.debug:
+            stats = loader.stats()
+            response.headers['X-Request-Loader'] = (
+                f"hits={stats['hits']}; misses={stats['misses']}; batches={stats['batches']}"
+            )
+        return response
+
+
 def register_context_processors(app):
     """Register context processors for templates"""
-    
+    from fragment_cache import cached_fragment
+
+    # {{ cached_fragment(...) }}: per-entity HTML reused across requests
+    app.add_template_global(cached_fragment)
+
     @app.context_processor
     def inject_common_data():
         """Make common data available to all templates"""
@@ -66,6 +66,38 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'pdf'}
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'static/uploads')
 
+    # Catalog cache (process-wide TTL/LRU cache for sellers, products and deliverers)
+    CATALOG_CACHE_ENABLED = os.environ.get('CATALOG_CACHE_ENABLED', 'True') == 'True'
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))  # seconds
+    CATALOG_CACHE_MAXSIZE = int(os.environ.get('CATALOG_CACHE_MAXSIZE', 5000))  # documents per worker
+
+    # Materialized marketplace feed (see marketplace/feed.py)
+    FEED_SNAPSHOT_TTL = int(os.environ.get('FEED_SNAPSHOT_TTL', 300))  # seconds before a rebuild
+    FEED_REBUILD_INTERVAL = int(os.environ.get('FEED_REBUILD_INTERVAL', 30))  # min seconds between rebuilds after writes
+
+    # Rendered seller cards / product tiles (see fragment_cache.py)
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', 'True') == 'True'
+    FRAGMENT_CACHE_MAXSIZE = int(os.environ.get('FRAGMENT_CACHE_MAXSIZE', 2000))  # fragments per worker
+
+    # ETag / Last-Modified validation of read-heavy pages and APIs (see http_cache.py)
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'True') == 'True'
+
+    # Write-behind and sharded counters: views, likes, followers, sales (see firebase_counters.py)
+    COUNTER_FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', 10))  # seconds; 0 writes immediately
+    SELLER_LIKES_SHARDS = int(os.environ.get('SELLER_LIKES_SHARDS', 10))  # shard documents per seller
+    SELLER_FOLLOWERS_SHARDS = int(os.environ.get('SELLER_FOLLOWERS_SHARDS', 10))
+    VIDEO_LIKES_SHARDS = int(os.environ.get('VIDEO_LIKES_SHARDS', 10))  # shard documents per video
+    PRODUCT_SALES_SHARDS = int(os.environ.get('PRODUCT_SALES_SHARDS', 5))  # shard documents per product
+
+    # Product search index (see search/products.py)
+    SEARCH_INDEX_SYNC_INTERVAL = int(os.environ.get('SEARCH_INDEX_SYNC_INTERVAL', 30))  # seconds between syncs
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 200))  # results per search page
+    NEARBY_MAX_RADIUS_KM = float(os.environ.get('NEARBY_MAX_RADIUS_KM', 100))  # largest "near me" radius
+
+    # Firestore instrumentation (per-request read/write counts, Server-Timing header)
+    FIRESTORE_METRICS_ENABLED = os.environ.get('FIRESTORE_METRICS_ENABLED', 'True') == 'True'
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 25))  # point reads per request
+
     # Pagination
     PRODUCTS_PER_PAGE = int(os.environ.get('PRODUCTS_PER_PAGE', 20))
     TRANSACTIONS_PER_PAGE = int(os.environ.get('TRANSACTIONS_PER_PAGE', 50))
@@ -11,6 +11,7 @@ from google.cloud.firestore_v1.base_query import FieldFilter
 
 # Firebase imports
 from firebase_config import get_firestore_db
+from firebase_service import FirebaseService
 from firebase_db import (
     transaction_service,
     seller_service,
@@ -388,18 +389,14 @@ def expire_old_verification_codes():
     Cleanup job to expire old verification codes
     Should be run periodically (e.g., daily via cron job)
     """
-    db = get_firestore_db()
+    codes = FirebaseService('verification_codes')
 
     try:
-        codes_ref = db.collection('verification_codes')
-        # Get all unused codes
-        query = codes_ref.where(filter=FieldFilter('is_used', '==', False))
-
-        expired_count = 0
+        expired_ids = []
         now = datetime.now()
 
-        for doc in query.stream():
-            code_data = doc.to_dict()
+        # Stream unused codes page by page
+        for code_data in codes.iter_query([('is_used', '==', False)], fields=['expires_at']):
             expires_at = code_data.get('expires_at')
 
             if isinstance(expires_at, str):
@@ -409,12 +406,14 @@ def expire_old_verification_codes():
 
             # Check if expired
             if expires_at and now > expires_at:
-                doc.reference.update({'is_used': True})
-                expired_count += 1
+                expired_ids.append(code_data['id'])
+
+        result = codes.bulk_update({code_id: {'is_used': True} for code_id in expired_ids})
 
         return {
-            'success': True,
-            'expired_count': expired_count
+            'success': result['failed'] == 0,
+            'expired_count': result['written'],
+            'failed_count': result['failed']
         }
 
     except Exception as e:
@@ -19,6 +19,7 @@ from firebase_db import (
     seller_service,
     get_notification_service
 )
+from firebase_geo import parse_coordinates
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud import firestore
 
@@ -319,27 +320,11 @@ def dashboard():
         filter=FieldFilter('delivery_method', '==', 'public_transport')
     ).stream()
 
-    available_pickups = []
-    for doc in available_pickups_query:
-        trans_data = {**doc.to_dict(), 'id': doc.id}
-        # Skip if already has deliverer
-        if trans_data.get('deliverer_id'):
-            continue
-
-        # Get seller and buyer info
-        if trans_data.get('seller_id'):
-            seller = seller_service.get(trans_data['seller_id'])
-            trans_data['seller_name'] = seller.get('name', '') if seller else ''
-            trans_data['seller_location'] = seller.get('location', '') if seller else ''
-
-        if trans_data.get('user_id'):
-            buyer = user_service.get(trans_data['user_id'])
-            trans_data['buyer_email'] = buyer.get('email', '') if buyer else ''
-            trans_data['buyer_address'] = buyer.get('address', '') if buyer else ''
-
-        available_pickups.append(trans_data)
-
-    deliverer['available_pickups'] = sorted(available_pickups, key=lambda x: x.get('created_at', ''), reverse=True)
+    # Skip pickups that already have a deliverer
+    available_pickups = [
+        trans_data for trans_data in ({**doc.to_dict(), 'id': doc.id} for doc in available_pickups_query)
+        if not trans_data.get('deliverer_id')
+    ]
 
     # Get active deliveries (assigned to this deliverer)
     active_deliveries_query = db.collection('transactions').where(
@@ -348,10 +333,24 @@ def dashboard():
         filter=FieldFilter('status', 'in', ['PICKED_UP', 'IN_TRANSIT'])
     ).stream()
 
-    active_deliveries = []
-    for doc in active_deliveries_query:
-        trans_data = {**doc.to_dict(), 'id': doc.id}
+    active_deliveries = [{**doc.to_dict(), 'id': doc.id} for doc in active_deliveries_query]
 
+    # Get completed deliveries (last 10)
+    completed_deliveries_query = db.collection('transactions').where(
+        filter=FieldFilter('deliverer_id', '==', deliverer['id'])
+    ).where(
+        filter=FieldFilter('status', 'in', ['DELIVERED', 'COMPLETED'])
+    ).limit(10).stream()
+
+    completed_deliveries = [{**doc.to_dict(), 'id': doc.id} for doc in completed_deliveries_query]
+
+    # Queue every seller and buyer on the page so the lookups below resolve
+    # with one batched read per collection
+    all_trans = available_pickups + active_deliveries + completed_deliveries
+    seller_service.prefetch([t.get('seller_id') for t in all_trans])
+    user_service.prefetch([t.get('user_id') for t in all_trans])
+
+    for trans_data in available_pickups + active_deliveries:
         # Get seller and buyer info
         if trans_data.get('seller_id'):
             seller = seller_service.get(trans_data['seller_id'])
@@ -363,21 +362,7 @@ def dashboard():
             trans_data['buyer_email'] = buyer.get('email', '') if buyer else ''
             trans_data['buyer_address'] = buyer.get('address', '') if buyer else ''
 
-        active_deliveries.append(trans_data)
-
-    deliverer['active_deliveries'] = sorted(active_deliveries, key=lambda x: x.get('created_at', ''), reverse=True)
-
-    # Get completed deliveries (last 10)
-    completed_deliveries_query = db.collection('transactions').where(
-        filter=FieldFilter('deliverer_id', '==', deliverer['id'])
-    ).where(
-        filter=FieldFilter('status', 'in', ['DELIVERED', 'COMPLETED'])
-    ).limit(10).stream()
-
-    completed_deliveries = []
-    for doc in completed_deliveries_query:
-        trans_data = {**doc.to_dict(), 'id': doc.id}
-
+    for trans_data in completed_deliveries:
         # Get seller and buyer info
         if trans_data.get('seller_id'):
             seller = seller_service.get(trans_data['seller_id'])
@@ -387,8 +372,8 @@ def dashboard():
             buyer = user_service.get(trans_data['user_id'])
             trans_data['buyer_email'] = buyer.get('email', '') if buyer else ''
 
-        completed_deliveries.append(trans_data)
-
+    deliverer['available_pickups'] = sorted(available_pickups, key=lambda x: x.get('created_at', ''), reverse=True)
+    deliverer['active_deliveries'] = sorted(active_deliveries, key=lambda x: x.get('created_at', ''), reverse=True)
     deliverer['completed_deliveries'] = sorted(completed_deliveries, key=lambda x: x.get('delivered_at', ''), reverse=True)
 
     # Calculate today's earnings
@@ -407,15 +392,12 @@ def dashboard():
 
     deliverer['today_earnings'] = today_earnings
 
-    # Calculate total earnings (all time)
-    all_completed = db.collection('transactions').where(
-        filter=FieldFilter('deliverer_id', '==', deliverer['id'])
-    ).where(
-        filter=FieldFilter('status', 'in', ['DELIVERED', 'COMPLETED'])
-    ).stream()
-
-    total_earnings = sum(float(doc.to_dict().get('deliverer_fee', 0)) for doc in all_completed)
-    deliverer['total_earnings'] = total_earnings
+    # Calculate total earnings and completed count (all time) in one aggregation
+    completed_totals = transaction_service.aggregate(
+        [('deliverer_id', '==', deliverer['id']), ('status', 'in', ['DELIVERED', 'COMPLETED'])],
+        sum_fields=['deliverer_fee']
+    )
+    deliverer['total_earnings'] = completed_totals['sum_deliverer_fee']
 
     # Calculate pending settlements (picked up but not delivered)
     pending_settlements = sum(float(trans.get('deliverer_fee', 0)) for trans in active_deliveries)
@@ -426,14 +408,7 @@ def dashboard():
 
     # === PERFORMANCE METRICS ===
 
-    # Recount all completed deliveries for metrics
-    all_completed = db.collection('transactions').where(
-        filter=FieldFilter('deliverer_id', '==', deliverer['id'])
-    ).where(
-        filter=FieldFilter('status', 'in', ['DELIVERED', 'COMPLETED'])
-    ).stream()
-
-    total_deliveries_count = sum(1 for _ in all_completed)
+    total_deliveries_count = completed_totals['count']
     deliverer['total_deliveries'] = total_deliveries_count
 
     # On-time delivery rate (95% placeholder)
@@ -447,13 +422,10 @@ def dashboard():
     deliverer['acceptance_rate'] = round(acceptance_rate, 1)
 
     # Cancellation rate
-    cancelled_query = db.collection('transactions').where(
-        filter=FieldFilter('deliverer_id', '==', deliverer['id'])
-    ).where(
-        filter=FieldFilter('status', '==', 'CANCELLED')
-    ).stream()
-
-    cancelled_count = sum(1 for _ in cancelled_query)
+    cancelled_count = transaction_service.count([
+        ('deliverer_id', '==', deliverer['id']),
+        ('status', '==', 'CANCELLED')
+    ])
     total_assigned = total_deliveries_count + cancelled_count
     cancellation_rate = (cancelled_count / total_assigned * 100) if total_assigned > 0 else 0.0
     deliverer['cancellation_rate'] = round(cancellation_rate, 1)
@@ -583,6 +555,11 @@ def update_location():
     if not all([order_id, latitude, longitude]):
         return jsonify({'success': False, 'error': 'Missing parameters'}), 400
 
+    try:
+        latitude, longitude = parse_coordinates(latitude, longitude)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
     try:
         # Add tracking with location
         delivery_tracking_service.create({
@@ -594,6 +571,11 @@ def update_location():
             'created_by': user['id']
         })
 
+        # Keep the deliverer's last known location (and geohash) for nearby searches
+        deliverer = deliverer_service.get_by_user_id(user['id'])
+        if deliverer:
+            deliverer_service.set_location(deliverer['id'], latitude, longitude)
+
         return jsonify({'success': True})
 
     except Exception as e:
@@ -705,9 +687,6 @@ def earnings():
 @deliverer_bp.route('/leaderboard')
 def leaderboard():
     """Gamified deliverer leaderboard"""
-    from firebase_config import get_firestore_db
-    db = get_firestore_db()
-
     # Get time period
     period = request.args.get('period', 'month')
 
@@ -723,6 +702,9 @@ def leaderboard():
     # Get all verified deliverers
     all_deliverers = deliverer_service.get_all_deliverers(is_active=True)
 
+    # Their users in one batched read
+    users = get_user_service().get_map([d.get('user_id') for d in all_deliverers])
+
     leaderboard_data = []
 
     for deliverer in all_deliverers:
@@ -730,21 +712,19 @@ def leaderboard():
             continue
 
         # Get user email
-        deliverer_user = get_user_service().get(deliverer['user_id'])
+        deliverer_user = users.get(deliverer.get('user_id'))
         deliverer_name = deliverer_user.get('email', '').split('@')[0] if deliverer_user else 'Unknown'
 
         # Count deliveries and earnings in period
-        transactions = db.collection('transactions').where(
-            filter=FieldFilter('deliverer_id', '==', deliverer['id'])
-        ).where(
-            filter=FieldFilter('status', 'in', ['DELIVERED', 'COMPLETED'])
-        ).stream()
+        transactions = transaction_service.iter_query(
+            [('deliverer_id', '==', deliverer['id']), ('status', 'in', ['DELIVERED', 'COMPLETED'])],
+            fields=['delivered_at', 'deliverer_fee']
+        )
 
         delivery_count = 0
         total_earned = 0.0
 
-        for doc in transactions:
-            trans = doc.to_dict()
+        for trans in transactions:
             delivered_at = trans.get('delivered_at')
 
             # Filter by date
@@ -1096,21 +1076,21 @@ def view_delivery_codes():
         filter=FieldFilter('status', 'in', ['IN_TRANSIT', 'PICKED_UP'])
     ).stream()
 
-    orders = []
-    for doc in orders_query:
-        trans = {**doc.to_dict(), 'id': doc.id}
+    orders = [{**doc.to_dict(), 'id': doc.id} for doc in orders_query]
+
+    buyers_by_id = get_user_service().get_map([t.get('user_id') for t in orders])
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in orders])
 
+    for trans in orders:
         # Get buyer and seller info
         if trans.get('user_id'):
-            buyer = get_user_service().get(trans['user_id'])
+            buyer = buyers_by_id.get(trans['user_id'])
             trans['buyer_email'] = buyer.get('email', '') if buyer else ''
 
         if trans.get('seller_id'):
-            seller = seller_service.get(trans['seller_id'])
+            seller = sellers_by_id.get(trans['seller_id'])
             trans['seller_name'] = seller.get('name', '') if seller else ''
 
-        orders.append(trans)
-
     # Sort by updated_at
     orders.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
 
@@ -1135,31 +1115,34 @@ def return_pickups():
         filter=FieldFilter('status', 'in', ['APPROVED', 'PICKUP_SCHEDULED'])
     ).stream()
 
+    return_requests = [{**doc.to_dict(), 'id': doc.id} for doc in returns_query]
+
+    # Get transactions to check which returns are assigned to this deliverer
+    transactions_by_id = transaction_service.get_map([r.get('transaction_id') for r in return_requests])
+    assigned = [
+        r for r in return_requests
+        if transactions_by_id.get(r.get('transaction_id'), {}).get('deliverer_id') == deliverer['id']
+    ]
+
+    sellers_by_id = seller_service.get_map([r.get('seller_id') for r in assigned])
+    buyers_by_id = get_user_service().get_map([r.get('user_id') for r in assigned])
+
     returns = []
-    for doc in returns_query:
-        return_req = {**doc.to_dict(), 'id': doc.id}
-
-        # Get transaction to check if assigned to this deliverer
-        trans_id = return_req.get('transaction_id')
-        if trans_id:
-            trans_doc = db.collection('transactions').document(trans_id).get()
-            if trans_doc.exists:
-                trans = trans_doc.to_dict()
-                if trans.get('deliverer_id') == deliverer['id']:
-                    return_req['transaction_id'] = trans_id
-                    return_req['delivery_address'] = trans.get('delivery_address', '')
-
-                    # Get seller and buyer info
-                    if return_req.get('seller_id'):
-                        seller = seller_service.get(return_req['seller_id'])
-                        return_req['seller_name'] = seller.get('name', '') if seller else ''
-                        return_req['seller_location'] = seller.get('location', '') if seller else ''
-
-                    if return_req.get('user_id'):
-                        buyer = get_user_service().get(return_req['user_id'])
-                        return_req['buyer_email'] = buyer.get('email', '') if buyer else ''
-
-                    returns.append(return_req)
+    for return_req in assigned:
+        trans = transactions_by_id[return_req['transaction_id']]
+        return_req['delivery_address'] = trans.get('delivery_address', '')
+
+        # Get seller and buyer info
+        if return_req.get('seller_id'):
+            seller = sellers_by_id.get(return_req['seller_id'])
+            return_req['seller_name'] = seller.get('name', '') if seller else ''
+            return_req['seller_location'] = seller.get('location', '') if seller else ''
+
+        if return_req.get('user_id'):
+            buyer = buyers_by_id.get(return_req['user_id'])
+            return_req['buyer_email'] = buyer.get('email', '') if buyer else ''
+
+        returns.append(return_req)
 
     # Sort by created_at
     returns.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -396,20 +396,9 @@ def calculate_delivery_distance(lat1, lon1, lat2, lon2):
     Calculate distance between two coordinates using Haversine formula
     Returns distance in kilometers
     """
-    from math import radians, sin, cos, sqrt, atan2
+    from firebase_geo import haversine_km
 
-    R = 6371  # Earth's radius in kilometers
-
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-
-    distance = R * c
-    return round(distance, 2)
+    return round(haversine_km(lat1, lon1, lat2, lon2), 2)
 
 
 def estimate_delivery_time(distance_km, vehicle_type):
@@ -483,24 +472,16 @@ def get_deliverer_performance_stats(deliverer_id, days=30):
 
 def get_nearby_deliverers(latitude, longitude, radius_km=10):
     """
-    Find deliverers within a certain radius
-    (In production, this would use spatial database queries)
+    Find active, verified deliverers within a certain radius, nearest first
+    Uses geohash range queries on each deliverer's last known location
+    (set by the update-location endpoint); each result has 'distance_km' and 'email'
     """
-    conn = get_db_connection()
+    from firebase_db import deliverer_service, get_user_service
 
-    # For now, return all active verified deliverers
-    # In production, filter by last known location
-    deliverers = conn.execute("""
-        SELECT d.*, u.email
-        FROM deliverers d
-        JOIN users u ON d.user_id = u.id
-        WHERE d.is_verified = 1
-        AND d.is_active = 1
-        ORDER BY d.rating DESC
-        LIMIT 10
-    """).fetchall()
+    deliverers = deliverer_service.get_nearby(latitude, longitude, radius_km=radius_km, limit=10)
 
-    return [dict(d) for d in deliverers]
+    users = get_user_service().get_map([d.get('user_id') for d in deliverers])
+    return [{**d, 'email': users.get(d.get('user_id'), {}).get('email')} for d in deliverers]
 
 
 def assign_best_deliverer(transaction_id):
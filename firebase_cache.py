@@ -0,0 +1,105 @@
+"""
+Process-wide catalog cache for SparzaFI
+Bounded TTL/LRU read-through cache for rarely changing documents
+(sellers, products, deliverers), shared by all requests in a worker
+"""
+
+import threading
+from typing import Dict, Optional
+from cachetools import TTLCache
+from flask import g, has_request_context
+from config import Config
+
+
+class CatalogCache:
+    """
+    TTL/LRU cache of documents keyed by (collection, doc_id)
+
+    Secondary lookups (e.g. seller handle -> seller id) are cached separately and
+    always resolve through the document entry, so invalidating a document also
+    invalidates every lookup that points at it. Each worker process has its own
+    cache; changes made by other workers become visible after at most `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._documents = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lookups = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get(self, collection_name: str, doc_id: str) -> Optional[Dict]:
+        """Get a cached document (None on miss)"""
+        with self._lock:
+            doc = self._documents.get((collection_name, doc_id))
+            self._record(collection_name, doc is not None)
+        return dict(doc) if doc is not None else None
+
+    def put(self, collection_name: str, doc: Dict):
+        """Store a document (must contain its 'id')"""
+        with self._lock:
+            self._documents[(collection_name, doc['id'])] = dict(doc)
+
+    def get_by(self, collection_name: str, field: str, value) -> Optional[Dict]:
+        """Get a cached document by a unique field (None on miss or stale lookup)"""
+        with self._lock:
+            doc_id = self._lookups.get((collection_name, field, value))
+            doc = self._documents.get((collection_name, doc_id)) if doc_id else None
+            if doc is not None and doc.get(field) != value:
+                doc = None
+            self._record(collection_name, doc is not None)
+        return dict(doc) if doc is not None else None
+
+    def put_by(self, collection_name: str, field: str, value, doc: Dict):
+        """Store a document and remember which document a unique field value maps to"""
+        with self._lock:
+            self._documents[(collection_name, doc['id'])] = dict(doc)
+            self._lookups[(collection_name, field, value)] = doc['id']
+
+    def invalidate(self, collection_name: str, doc_id: str):
+        """Drop a document (lookups pointing at it are dropped lazily)"""
+        with self._lock:
+            self._documents.pop((collection_name, doc_id), None)
+
+    def clear(self):
+        """Drop everything and reset statistics"""
+        with self._lock:
+            self._documents.clear()
+            self._lookups.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-collection hit/miss counters and hit ratio"""
+        with self._lock:
+            result = {}
+            for collection_name, counts in self._stats.items():
+                total = counts['hits'] + counts['misses']
+                result[collection_name] = {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / total, 3) if total else 0.0,
+                }
+            result['_size'] = {'documents': len(self._documents), 'lookups': len(self._lookups)}
+            return result
+
+    def _record(self, collection_name: str, hit: bool):
+        counts = self._stats.setdefault(collection_name, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+catalog_cache = CatalogCache(
+    maxsize=Config.CATALOG_CACHE_MAXSIZE,
+    ttl=Config.CATALOG_CACHE_TTL,
+    enabled=Config.CATALOG_CACHE_ENABLED,
+)
+
+
+def bypass_catalog_cache():
+    """Opt the current request out of catalog cache reads (e.g. admin pages)"""
+    g.bypass_catalog_cache = True
+
+
+def catalog_cache_active() -> bool:
+    """Whether cached catalog reads may be served for the current request"""
+    if not catalog_cache.enabled:
+        return False
+    return not (has_request_context() and g.get('bypass_catalog_cache'))
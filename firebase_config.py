@@ -1,20 +1,72 @@
 """
 Firebase Configuration for SparzaFI
 Handles Firebase Admin SDK initialization and connection management
+
+Clients are created per process: a gRPC channel must not be shared across fork(),
+so a worker forked from a preloading master (gunicorn --preload) builds its own
+client on first use. gunicorn.conf.py also drops inherited clients in post_fork.
 """
 
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore, storage
-from google.cloud.firestore_v1.base_query import FieldFilter
 import json
 
+# firebase_admin is imported on first use: it pulls in google-auth and the Storage
+# client, which most imports of this module (and offline tooling) never need
+
+# 'firestore' (default) or 'memory' for the offline stand-in in firebase_memory.py
+DB_BACKEND = os.environ.get('SPARZAFI_DB_BACKEND', 'firestore').lower()
+
+
+def grpc_channel_options():
+    """Firestore gRPC channel options (keepalive and message size), tunable via env"""
+    return [
+        # Ping idle connections so load balancers/NATs do not silently drop them
+        ('grpc.keepalive_time_ms', int(os.environ.get('FIRESTORE_GRPC_KEEPALIVE_MS', 30000))),
+        ('grpc.keepalive_timeout_ms', int(os.environ.get('FIRESTORE_GRPC_KEEPALIVE_TIMEOUT_MS', 10000))),
+        ('grpc.keepalive_permit_without_calls',
+         int(os.environ.get('FIRESTORE_GRPC_KEEPALIVE_WITHOUT_CALLS', 1))),
+        ('grpc.http2.max_pings_without_data', 0),
+        ('grpc.max_receive_message_length',
+         int(os.environ.get('FIRESTORE_GRPC_MAX_RECEIVE_MB', 32)) * 1024 * 1024),
+    ]
+
+
+def _create_firestore_client():
+    """Firestore client for the default Firebase app, using grpc_channel_options()"""
+    import firebase_admin
+    from google.cloud import firestore
+    from google.cloud.firestore_v1.services.firestore import client as firestore_client
+    from google.cloud.firestore_v1.services.firestore.transports.grpc import FirestoreGrpcTransport
+
+    class TunedFirestoreClient(firestore.Client):
+        """firestore.Client whose channel uses our options instead of the library's fixed keepalive"""
+
+        @property
+        def _firestore_api(self):
+            if self._firestore_api_internal is None and self._emulator_host is None:
+                channel = FirestoreGrpcTransport.create_channel(
+                    self._target, credentials=self._credentials, options=grpc_channel_options()
+                )
+                self._transport = FirestoreGrpcTransport(host=self._target, channel=channel)
+                self._firestore_api_internal = firestore_client.FirestoreClient(
+                    transport=self._transport, client_options=self._client_options
+                )
+                firestore_client._client_info = self._client_info
+            return super()._firestore_api
+
+    # Not firebase_admin.firestore.client(): it caches one client per app, which a
+    # forked worker would inherit from its parent
+    app = firebase_admin.get_app()
+    return TunedFirestoreClient(credentials=app.credential.get_credential(), project=app.project_id)
+
+
 class FirebaseConfig:
     """Firebase configuration and initialization"""
 
     _initialized = False
     _db = None
     _storage_bucket = None
+    _pid = None  # process that created _db and _storage_bucket
 
     @classmethod
     def initialize(cls, service_account_path=None):
@@ -28,6 +80,11 @@ class FirebaseConfig:
         if cls._initialized:
             return
 
+        if DB_BACKEND == 'memory':
+            cls._initialized = True
+            print("✓ Using in-memory Firestore backend (SPARZAFI_DB_BACKEND=memory)")
+            return
+
         # Get service account path
         if service_account_path is None:
             service_account_path = os.environ.get('FIREBASE_SERVICE_ACCOUNT')
@@ -41,6 +98,9 @@ class FirebaseConfig:
         if not os.path.exists(service_account_path):
             raise FileNotFoundError(f"Service account file not found: {service_account_path}")
 
+        import firebase_admin
+        from firebase_admin import credentials
+
         try:
             # Initialize Firebase Admin
             cred = credentials.Certificate(service_account_path)
@@ -65,12 +125,22 @@ class FirebaseConfig:
 
     @classmethod
     def get_db(cls):
-        """Get Firestore database instance"""
+        """Get Firestore database instance (one client per process)"""
         if not cls._initialized:
             cls.initialize()
 
+        cls._check_pid()
         if cls._db is None:
-            cls._db = firestore.client()
+            if DB_BACKEND == 'memory':
+                from firebase_memory import MemoryFirestore
+                cls._db = MemoryFirestore(latency_ms=float(os.environ.get('SPARZAFI_MEMORY_LATENCY_MS', 0)))
+            else:
+                cls._db = _create_firestore_client()
+
+            # Per-request read/write accounting (see firebase_metrics)
+            if os.environ.get('FIRESTORE_METRICS_ENABLED', 'True') == 'True':
+                from firebase_metrics import InstrumentedClient
+                cls._db = InstrumentedClient(cls._db)
 
         return cls._db
 
@@ -80,11 +150,44 @@ class FirebaseConfig:
         if not cls._initialized:
             cls.initialize()
 
+        # The in-memory backend has no Storage; uploads are unavailable offline
+        if DB_BACKEND == 'memory':
+            return None
+
+        cls._check_pid()
         if cls._storage_bucket is None:
-            cls._storage_bucket = storage.bucket()
+            import firebase_admin
+            from google.cloud import storage
+
+            # Built directly for the same reason as _create_firestore_client()
+            app = firebase_admin.get_app()
+            client = storage.Client(credentials=app.credential.get_credential(), project=app.project_id)
+            cls._storage_bucket = client.bucket(app.options.get('storageBucket'))
 
         return cls._storage_bucket
 
+    @classmethod
+    def reset_after_fork(cls):
+        """
+        Forget clients inherited from the parent process
+
+        They are dropped, not closed: closing would tear down the parent's connections.
+        The in-memory backend keeps its data, it holds no connections.
+        """
+        if DB_BACKEND != 'memory':
+            cls._db = None
+        cls._storage_bucket = None
+        cls._pid = os.getpid()
+
+    @classmethod
+    def _check_pid(cls):
+        """Drop clients created by another process (e.g. before a fork)"""
+        pid = os.getpid()
+        if cls._pid != pid:
+            if cls._pid is not None:
+                cls.reset_after_fork()
+            cls._pid = pid
+
     @classmethod
     def is_initialized(cls):
         """Check if Firebase is initialized"""
@@ -0,0 +1,346 @@
+"""
+Counters for SparzaFI
+High-frequency counter updates are kept off single hot documents:
+
+- CounterBuffer (product views): increments are added up in memory and written
+  as one Increment per document every few seconds, in batches, by a
+  background thread. Requests never wait on the write.
+- ShardedCounter (likes, followers, sales): each increment is written at once
+  to one of N shard documents chosen at random, so a popular document can take
+  N times as many writes per second, and periodically folded into the
+  document's own field.
+
+Pending work is flushed at exit (atexit and gunicorn's worker_exit); a worker
+killed outright loses at most one interval of buffered views.
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from cachetools import TTLCache
+from google.cloud import firestore
+from google.api_core.exceptions import NotFound
+
+from config import Config
+from firebase_service import FirebaseService
+from firebase_db import seller_service, video_service, get_product_service
+
+logger = logging.getLogger(__name__)
+
+# Every CounterBuffer/ShardedCounter, flushed by flush_counters() at exit
+_flushers: List['_BackgroundFlush'] = []
+
+# gRPC NOT_FOUND: the document was deleted, its pending increments are dropped
+_NOT_FOUND = 5
+
+
+class _BackgroundFlush:
+    """
+    Calls flush() every flush_interval seconds from a daemon thread
+
+    The thread starts on first use in each process, so none exists before the
+    server forks its workers (threads do not survive fork()).
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        _flushers.append(self)
+
+    def flush(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self):
+        """Stop the flush thread and flush what is left"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _forget_parent_state(self):
+        """Drop state inherited from the parent process (called once per process)"""
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                self._forget_parent_state()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name=f'counter-flush-{id(self):x}', daemon=True)
+            self._pid = pid
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Counter flush failed")
+
+
+class CounterBuffer(_BackgroundFlush):
+    """
+    Per-document increments of one numeric field, written behind
+
+    Args:
+        collection_name: Collection holding the counted documents
+        field: Field to increment
+        flush_interval: Seconds between flushes; 0 writes every increment immediately
+    """
+
+    def __init__(self, collection_name: str, field: str, flush_interval: float):
+        super().__init__(flush_interval)
+        self.field = field
+        self._service = FirebaseService(collection_name)
+        self._pending: Dict[str, int] = {}
+
+    def add(self, doc_id: str, amount: int = 1):
+        """Count amount against a document (written on the next flush)"""
+        if self.flush_interval <= 0:
+            self._write({doc_id: amount})
+            return
+
+        self._ensure_thread()
+        with self._lock:
+            self._pending[doc_id] = self._pending.get(doc_id, 0) + amount
+
+    def pending(self, doc_id: str) -> int:
+        """Increments counted for a document but not written yet"""
+        with self._lock:
+            return self._pending.get(doc_id, 0)
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Write every pending increment now
+
+        Returns:
+            {'written': documents updated, 'failed': documents whose increments were kept for
+            the next flush}; increments for deleted documents are dropped
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return self._write(pending)
+
+    def _write(self, increments: Dict[str, int]) -> Dict[str, int]:
+        """Write increments in batches; failures other than deleted documents are re-queued"""
+        increments = {doc_id: amount for doc_id, amount in increments.items() if amount}
+        if not increments:
+            return {'written': 0, 'failed': 0}
+
+        operations = [('update', doc_id, {self.field: firestore.Increment(amount)})
+                      for doc_id, amount in increments.items()]
+        try:
+            # Counters are not part of any cached view: leave caches and listeners alone
+            summary = self._service._bulk_write(operations, invalidate=False)
+            written = summary['written']
+            failed = [error['id'] for error in summary['errors'] if error['code'] != _NOT_FOUND]
+        except Exception:
+            logger.exception("Writing %d %s.%s counters failed", len(increments),
+                             self._service.collection_name, self.field)
+            written, failed = 0, list(increments)
+
+        if failed:
+            with self._lock:
+                for doc_id in failed:
+                    self._pending[doc_id] = self._pending.get(doc_id, 0) + increments[doc_id]
+        return {'written': written, 'failed': len(failed)}
+
+    def _forget_parent_state(self):
+        # Increments inherited from the parent are the parent's to write
+        self._pending.clear()
+
+
+class ShardedCounter(_BackgroundFlush):
+    """
+    A counter field spread over shard documents
+
+    Each increment goes to one of `shards` documents in the counted document's
+    counter_shards subcollection ('<field>_<n>', holding a 'count'), chosen at
+    random, so concurrent writers rarely touch the same document.
+
+    The value of the counter is the document's own field plus its shards.
+    Every flush_interval seconds the shards of documents counted in this
+    process are folded into the field: one atomic batch adds their sum to the
+    field (without touching updated_at) and subtracts each shard's value from it, so
+    the value never changes, even when two workers fold the same document.
+    Pages reading the field directly lag by about one interval; get() and
+    get_many() are exact (one batched read, cached for flush_interval seconds
+    and kept current by this process's own increments).
+
+    Folds are not content changes: they do not fire change listeners, so the
+    feed snapshot and search index pick up the folded field with the
+    document's next real write or rebuild.
+
+    Args:
+        service: Service of the counted collection (its caches are invalidated on folds)
+        field: Counter field on the counted documents
+        shards: Number of shard documents per counted document
+        flush_interval: Seconds between folds; 0 folds after every increment
+    """
+
+    SHARD_COLLECTION = 'counter_shards'
+
+    def __init__(self, service: FirebaseService, field: str, shards: int, flush_interval: float):
+        super().__init__(flush_interval)
+        self.service = service
+        self.field = field
+        self.shards = max(1, shards)
+        self._dirty: set = set()
+        self._totals = TTLCache(maxsize=10000, ttl=max(flush_interval, 1))
+
+    def increment(self, doc_id: str, amount: int = 1):
+        """Add amount (may be negative) to a document's counter"""
+        shard = self._shard_refs(doc_id)[random.randrange(self.shards)]
+        shard.set({'count': firestore.Increment(amount)}, merge=True)
+
+        with self._lock:
+            if doc_id in self._totals:
+                self._totals[doc_id] += amount
+            self._dirty.add(doc_id)
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def decrement(self, doc_id: str, amount: int = 1):
+        self.increment(doc_id, -amount)
+
+    def get(self, doc_id: str) -> int:
+        """Current value of a document's counter"""
+        return self.get_many([doc_id])[doc_id]
+
+    def get_many(self, doc_ids: Iterable[str]) -> Dict[str, int]:
+        """{doc_id: value} (documents and shards of uncached ids read in one batched get)"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        with self._lock:
+            totals = {doc_id: self._totals[doc_id] for doc_id in doc_ids if doc_id in self._totals}
+
+        missing = [doc_id for doc_id in doc_ids if doc_id not in totals]
+        if missing:
+            fields, shards = self._read(missing)
+            read = {doc_id: fields[doc_id] + sum(shards[doc_id].values()) for doc_id in missing}
+            with self._lock:
+                self._totals.update(read)
+            totals.update(read)
+        return totals
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Fold the shards of documents counted since the last flush into their field
+
+        Returns:
+            {'written': documents folded, 'failed': documents kept for the next flush}
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return {'written': 0, 'failed': 0}
+
+        written, failed = 0, []
+        try:
+            _, shards = self._read(list(dirty))
+        except Exception:
+            logger.exception("Reading %s.%s shards failed", self.service.collection_name, self.field)
+            shards, failed = {}, list(dirty)
+
+        for doc_id, values in shards.items():
+            folded = {shard_id: count for shard_id, count in values.items() if count}
+            if not folded:
+                continue
+
+            batch = self.service.db.batch()
+            # updated_at is left alone: it versions pages, caches and the search index
+            batch.update(self.service.collection.document(doc_id), {
+                self.field: firestore.Increment(sum(folded.values()))
+            })
+            for shard_id, count in folded.items():
+                batch.set(self._shard_collection(doc_id).document(shard_id),
+                          {'count': firestore.Increment(-count)}, merge=True)
+            try:
+                batch.commit()
+            except NotFound:
+                # The counted document was deleted
+                continue
+            except Exception:
+                logger.exception("Folding %s.%s shards of %s failed", self.service.collection_name, self.field, doc_id)
+                failed.append(doc_id)
+                continue
+
+            # Evict cached copies only: change listeners would mark the feed snapshot
+            # stale and re-index the document on every fold
+            self.service._invalidate(doc_id, notify=False)
+            written += 1
+
+        if failed:
+            with self._lock:
+                self._dirty.update(failed)
+        return {'written': written, 'failed': len(failed)}
+
+    def _shard_collection(self, doc_id: str):
+        return self.service.collection.document(doc_id).collection(self.SHARD_COLLECTION)
+
+    def _shard_refs(self, doc_id: str) -> List:
+        shards = self._shard_collection(doc_id)
+        return [shards.document(f'{self.field}_{n}') for n in range(self.shards)]
+
+    def _read(self, doc_ids: List[str]):
+        """
+        ({doc_id: field value}, {doc_id: {shard_id: count}}) with batched gets of
+        the documents and all their shards (one RPC per MAX_BATCH_GET references)
+        """
+        references, owners = [], {}
+        for doc_id in doc_ids:
+            document = self.service.collection.document(doc_id)
+            references.append(document)
+            owners[document.path] = (doc_id, None)
+            for shard in self._shard_refs(doc_id):
+                references.append(shard)
+                owners[shard.path] = (doc_id, shard.id)
+
+        fields = {doc_id: 0 for doc_id in doc_ids}
+        shards: Dict[str, Dict[str, int]] = {doc_id: {} for doc_id in doc_ids}
+        step = FirebaseService.MAX_BATCH_GET
+        for start in range(0, len(references), step):
+            # get_all() may return snapshots in any order: match them by path
+            for snapshot in self.service.db.get_all(references[start:start + step]):
+                if not snapshot.exists:
+                    continue
+                doc_id, shard_id = owners[snapshot.reference.path]
+                data = snapshot.to_dict()
+                if shard_id is None:
+                    fields[doc_id] = data.get(self.field) or 0
+                else:
+                    shards[doc_id][shard_id] = data.get('count') or 0
+        return fields, shards
+
+
+def flush_counters():
+    """Stop every counter's flush thread and write what is pending (shutdown hook)"""
+    for flusher in _flushers:
+        flusher.close()
+
+
+view_counts = CounterBuffer('products', 'view_count', flush_interval=Config.COUNTER_FLUSH_INTERVAL)
+
+seller_likes = ShardedCounter(seller_service, 'likes_count', shards=Config.SELLER_LIKES_SHARDS,
+                              flush_interval=Config.COUNTER_FLUSH_INTERVAL)
+seller_followers = ShardedCounter(seller_service, 'follower_count', shards=Config.SELLER_FOLLOWERS_SHARDS,
+                                  flush_interval=Config.COUNTER_FLUSH_INTERVAL)
+video_likes = ShardedCounter(video_service, 'likes_count', shards=Config.VIDEO_LIKES_SHARDS,
+                             flush_interval=Config.COUNTER_FLUSH_INTERVAL)
+product_sales = ShardedCounter(get_product_service(), 'total_sales', shards=Config.PRODUCT_SALES_SHARDS,
+                               flush_interval=Config.COUNTER_FLUSH_INTERVAL)
+
+atexit.register(flush_counters)
@@ -4,10 +4,13 @@ Replaces database_seed.py with Firebase Firestore operations
 Provides backward-compatible wrappers for existing code migration
 """
 
+from functools import partial
+
 from firebase_config import get_firestore_db
+from firebase_indexes import QuerySpec
 from firebase_service import (
-    ProductService, OrderService, UserService,
-    DeliveryService, NotificationService, StorageService
+    FirebaseService, ProductService, OrderService, UserService,
+    DeliveryService, NotificationService, StorageService, run_concurrently
 )
 from google.cloud import firestore
 
@@ -110,53 +113,22 @@ def init_db(app=None):
 
 # ==================== ADDITIONAL SERVICES ====================
 
-class SellerService:
+class SellerService(FirebaseService):
     """Seller-specific operations"""
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('sellers')
+    request_cached = True
+    catalog_cached = True
 
-    def create(self, data, doc_id=None):
-        """Create a seller profile"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
-
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-
-        self.collection.document(doc_id).set(data)
-        return doc_id
-
-    def get(self, seller_id):
-        """Get seller by ID"""
-        doc = self.collection.document(seller_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
+    def __init__(self):
+        super().__init__('sellers')
 
     def get_by_user_id(self, user_id):
         """Get seller by user_id"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        docs = self.collection.where(filter=FieldFilter('user_id', '==', user_id)).limit(1).stream()
-        for doc in docs:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
+        return self._get_by_field('user_id', user_id)
 
     def get_by_handle(self, handle):
         """Get seller by handle"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        docs = self.collection.where(filter=FieldFilter('handle', '==', handle)).limit(1).stream()
-        for doc in docs:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
-
-    def update(self, seller_id, data):
-        """Update seller"""
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-        self.collection.document(seller_id).update(data)
-        return True
+        return self._get_by_field('handle', handle)
 
     def get_all_sellers(self, limit=None, order_by='created_at'):
         """Get all sellers"""
@@ -168,64 +140,54 @@ class SellerService:
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
 
-class ReviewService:
+class ReviewService(FirebaseService):
     """Review operations"""
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('reviews')
-
-    def create(self, data, doc_id=None):
-        """Create a review"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
-
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
+    QUERIES = (
+        QuerySpec('product_reviews', ('product_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_reviews', ('seller_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_visible_rating', ('seller_id', 'is_visible'), (('rating', 'ASCENDING'),)),
+    )
 
-        self.collection.document(doc_id).set(data)
-        return doc_id
+    def __init__(self):
+        super().__init__('reviews')
 
     def get_product_reviews(self, product_id, limit=50):
-        """Get reviews for a product"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        query = self.collection.where(filter=FieldFilter('product_id', '==', product_id))
-        # Note: Sorting in Python to avoid composite index requirement
-        # query = query.order_by('created_at', direction=firestore.Query.DESCENDING)
-
-        docs = query.stream()
-        reviews = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Sort in Python instead of Firestore to avoid needing composite index
-        reviews.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-
-        # Apply limit after sorting
-        return reviews[:limit] if limit else reviews
+        """Get reviews for a product, newest first"""
+        return self.query([('product_id', '==', product_id)], limit=limit,
+                          order_by='created_at', direction='DESCENDING')
 
     def get_seller_reviews(self, seller_id, limit=50):
-        """Get reviews for a seller"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        query = self.collection.where(filter=FieldFilter('seller_id', '==', seller_id))
-        # Note: Sorting in Python to avoid composite index requirement
-        # query = query.order_by('created_at', direction=firestore.Query.DESCENDING)
-
-        docs = query.stream()
-        reviews = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Sort in Python instead of Firestore to avoid needing composite index
-        reviews.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        """Get reviews for a seller, newest first"""
+        return self.query([('seller_id', '==', seller_id)], limit=limit,
+                          order_by='created_at', direction='DESCENDING')
 
-        # Apply limit after sorting
-        return reviews[:limit] if limit else reviews
+    def get_seller_reviews_page(self, seller_id, page_size=20, cursor=None):
+        """Get one page of a seller's reviews, newest first (see FirebaseService.paginate)"""
+        return self.paginate([('seller_id', '==', seller_id)], order_by='created_at',
+                             direction='DESCENDING', page_size=page_size, cursor=cursor)
 
 
-class TransactionService:
+class TransactionService(FirebaseService):
     """SPZ Token transaction operations"""
 
+    # Also covers the transaction explorer's and deliverer dashboard's queries
+    QUERIES = (
+        QuerySpec('buyer_transactions_legacy', ('buyer_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_transactions_legacy', ('seller_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('deliverer_by_status', ('deliverer_id', 'status')),
+        QuerySpec('buyer_transactions', ('user_id',), (('timestamp', 'DESCENDING'),)),
+        QuerySpec('seller_transactions', ('seller_id',), (('timestamp', 'DESCENDING'),)),
+        QuerySpec('deliverer_transactions', ('deliverer_id',), (('timestamp', 'DESCENDING'),)),
+        # Admin search (every transaction has created_at; seller_id is covered above)
+        QuerySpec('admin_search_by_buyer', ('user_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('admin_search_by_deliverer', ('deliverer_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('transactions_by_status', ('status',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('transactions_by_payment_method', ('payment_method',), (('created_at', 'DESCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('transactions')
+        super().__init__('transactions')
 
     def create(self, data, doc_id=None):
         """Create a transaction"""
@@ -241,30 +203,62 @@ class TransactionService:
 
     def get_user_transactions(self, user_id, limit=100):
         """Get transactions for a user"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-
         # Get transactions where user is sender or recipient
-        query1 = self.collection.where(filter=FieldFilter('from_user_id', '==', user_id))
-        query2 = self.collection.where(filter=FieldFilter('to_user_id', '==', user_id))
+        return self.fan_out(
+            [[('from_user_id', '==', user_id)], [('to_user_id', '==', user_id)]],
+            order_by='created_at',
+            descending=True,
+            limit=limit
+        )
+
+    def get_party_transactions(self, field, party_id, limit=50):
+        """Get the newest transactions where `field` (user_id, seller_id or deliverer_id) is party_id"""
+        return self.query([(field, '==', party_id)], limit=limit,
+                          order_by='timestamp', direction='DESCENDING')
+
+    def get_buyer_transactions_page(self, user_id, page_size=20, cursor=None):
+        """Get one page of a buyer's purchases, newest first (see FirebaseService.paginate)"""
+        return self.paginate([('user_id', '==', user_id)], order_by='timestamp',
+                             direction='DESCENDING', page_size=page_size, cursor=cursor)
+
+
+class TokenTransactionService(FirebaseService):
+    """SPZ token transfer ledger (token_transactions collection)"""
+
+    QUERIES = (
+        QuerySpec('sent', ('from_user_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('received', ('to_user_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('sent_by_type', ('from_user_id', 'transaction_type'), (('created_at', 'DESCENDING'),)),
+        QuerySpec('received_by_type', ('to_user_id', 'transaction_type'), (('created_at', 'DESCENDING'),)),
+    )
+
+    def __init__(self):
+        super().__init__('token_transactions')
 
-        transactions = []
-        for doc in query1.stream():
-            transactions.append({**doc.to_dict(), 'id': doc.id})
-        for doc in query2.stream():
-            transactions.append({**doc.to_dict(), 'id': doc.id})
+    def get_user_history_page(self, user_id, transaction_type=None, page_size=50, cursor=None):
+        """Get one page of transfers the user sent or received, newest first"""
+        from google.cloud.firestore_v1.base_query import FieldFilter, Or
 
-        # Sort by created_at
-        transactions.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        filters = [Or(filters=[
+            FieldFilter('from_user_id', '==', user_id),
+            FieldFilter('to_user_id', '==', user_id)
+        ])]
+        if transaction_type:
+            filters.append(('transaction_type', '==', transaction_type))
 
-        return transactions[:limit] if limit else transactions
+        return self.paginate(filters, order_by='created_at', direction='DESCENDING',
+                             page_size=page_size, cursor=cursor)
 
 
-class WithdrawalService:
+class WithdrawalService(FirebaseService):
     """Withdrawal request operations"""
 
+    QUERIES = (
+        QuerySpec('user_withdrawals', ('user_id',), (('created_at', 'DESCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('withdrawals')
+        super().__init__('withdrawals')
 
     def create(self, data, doc_id=None):
         """Create a withdrawal request"""
@@ -304,31 +298,15 @@ class WithdrawalService:
         return True
 
 
-class VideoService:
+class VideoService(FirebaseService):
     """Video operations"""
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('videos')
+    QUERIES = (
+        QuerySpec('seller_videos_last_updated', ('seller_id',), (('updated_at', 'DESCENDING'),)),
+    )
 
-    def create(self, data, doc_id=None):
-        """Create a video"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
-
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-
-        self.collection.document(doc_id).set(data)
-        return doc_id
-
-    def get(self, video_id):
-        """Get video by ID"""
-        doc = self.collection.document(video_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
+    def __init__(self):
+        super().__init__('videos')
 
     def get_seller_videos(self, seller_id):
         """Get videos for a seller ordered by video type"""
@@ -346,24 +324,21 @@ class VideoService:
         return videos
 
     def increment_likes(self, video_id):
-        """Increment video likes count"""
-        self.collection.document(video_id).update({
-            'likes_count': firestore.Increment(1)
-        })
+        """Increment video likes count (a sharded counter, see firebase_counters)"""
+        from firebase_counters import video_likes
+        video_likes.increment(video_id)
 
     def decrement_likes(self, video_id):
-        """Decrement video likes count"""
-        self.collection.document(video_id).update({
-            'likes_count': firestore.Increment(-1)
-        })
+        """Decrement video likes count (a sharded counter, see firebase_counters)"""
+        from firebase_counters import video_likes
+        video_likes.decrement(video_id)
 
 
-class FollowService:
+class FollowService(FirebaseService):
     """Follow/unfollow operations"""
 
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('follows')
+        super().__init__('follows')
 
     def follow(self, user_id, seller_id):
         """Follow a seller"""
@@ -373,12 +348,14 @@ class FollowService:
             'seller_id': seller_id,
             'created_at': firestore.SERVER_TIMESTAMP
         })
+        self._forget_request_memo(('followed_seller_ids', user_id))
         return True
 
     def unfollow(self, user_id, seller_id):
         """Unfollow a seller"""
         doc_id = f"{user_id}_{seller_id}"
         self.collection.document(doc_id).delete()
+        self._forget_request_memo(('followed_seller_ids', user_id))
         return True
 
     def is_following(self, user_id, seller_id):
@@ -387,6 +364,22 @@ class FollowService:
         doc = self.collection.document(doc_id).get()
         return doc.exists
 
+    def get_followed_seller_ids(self, user_id):
+        """
+        IDs of all sellers the user follows, as a set
+
+        One query per request, whatever the number of sellers being rendered;
+        check membership instead of calling is_following() per seller.
+        """
+        if not user_id:
+            return frozenset()
+
+        def fetch():
+            docs = self.query([('user_id', '==', user_id)], fields=['seller_id'])
+            return frozenset(doc['seller_id'] for doc in docs if doc.get('seller_id'))
+
+        return self._request_memo(('followed_seller_ids', user_id), fetch)
+
     def get_user_follows(self, user_id):
         """Get all sellers that user follows"""
         from google.cloud.firestore_v1.base_query import FieldFilter
@@ -395,13 +388,19 @@ class FollowService:
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
 
-class LikeService:
+class LikeService(FirebaseService):
     """Like operations for sellers and videos"""
 
     def __init__(self):
-        self.db = get_firestore_db()
-        self.seller_likes = self.db.collection('seller_likes')
-        self.video_likes = self.db.collection('video_likes')
+        super().__init__('seller_likes')
+
+    @property
+    def seller_likes(self):
+        return self.collection
+
+    @property
+    def video_likes(self):
+        return self.db.collection('video_likes')
 
     def like_seller(self, user_id, seller_id):
         """Like a seller"""
@@ -411,12 +410,14 @@ class LikeService:
             'seller_id': seller_id,
             'created_at': firestore.SERVER_TIMESTAMP
         })
+        self._forget_request_memo(('liked_ids', 'seller', user_id))
         return True
 
     def unlike_seller(self, user_id, seller_id):
         """Unlike a seller"""
         doc_id = f"{user_id}_{seller_id}"
         self.seller_likes.document(doc_id).delete()
+        self._forget_request_memo(('liked_ids', 'seller', user_id))
         return True
 
     def is_seller_liked(self, user_id, seller_id):
@@ -433,12 +434,14 @@ class LikeService:
             'video_id': video_id,
             'created_at': firestore.SERVER_TIMESTAMP
         })
+        self._forget_request_memo(('liked_ids', 'video', user_id))
         return True
 
     def unlike_video(self, user_id, video_id):
         """Unlike a video"""
         doc_id = f"{user_id}_{video_id}"
         self.video_likes.document(doc_id).delete()
+        self._forget_request_memo(('liked_ids', 'video', user_id))
         return True
 
     def is_video_liked(self, user_id, video_id):
@@ -447,13 +450,37 @@ class LikeService:
         doc = self.video_likes.document(doc_id).get()
         return doc.exists
 
+    def get_liked_ids(self, user_id, kind):
+        """
+        IDs of everything of one kind ('seller' or 'video') the user has liked, as a set
+
+        One query per request and kind; check membership instead of calling
+        is_seller_liked()/is_video_liked() per item.
+        """
+        if kind not in ('seller', 'video'):
+            raise ValueError(f"Unknown like kind: {kind}")
+        if not user_id:
+            return frozenset()
+
+        collection = self.seller_likes if kind == 'seller' else self.video_likes
+        field = f'{kind}_id'
+
+        def fetch():
+            query = self._select(self._apply_filters(collection, [('user_id', '==', user_id)]), [field])
+            return frozenset(filter(None, (doc.to_dict().get(field) for doc in query.stream())))
+
+        return self._request_memo(('liked_ids', kind, user_id), fetch)
 
-class DeliveryTrackingService:
+
+class DeliveryTrackingService(FirebaseService):
     """Delivery tracking operations"""
 
+    QUERIES = (
+        QuerySpec('transaction_tracking', ('transaction_id',), (('created_at', 'ASCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('delivery_tracking')
+        super().__init__('delivery_tracking')
 
     def create(self, data, doc_id=None):
         """Create a tracking event"""
@@ -476,12 +503,15 @@ class DeliveryTrackingService:
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
 
-class ConversationService:
+class ConversationService(FirebaseService):
     """Conversation operations for chat"""
 
+    QUERIES = (
+        QuerySpec('transaction_chat', ('transaction_id', 'chat_type')),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('conversations')
+        super().__init__('conversations')
 
     def create(self, data, doc_id=None):
         """Create a conversation"""
@@ -495,48 +525,17 @@ class ConversationService:
         self.collection.document(doc_id).set(data)
         return doc_id
 
-    def get(self, conversation_id):
-        """Get conversation by ID"""
-        doc = self.collection.document(conversation_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
-
     def get_user_conversations(self, user_id):
         """Get all conversations for a user"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
+        # Conversations where user is a participant (user1/user2) or holds a role
+        # (buyer, seller, deliverer), queried concurrently
+        participant_fields = ['user1_id', 'user2_id', 'buyer_id', 'seller_id', 'deliverer_id']
 
-        # Get conversations where user is participant (user1 or user2)
-        query1 = self.collection.where(filter=FieldFilter('user1_id', '==', user_id))
-        query2 = self.collection.where(filter=FieldFilter('user2_id', '==', user_id))
-
-        conversations = []
-        for doc in query1.stream():
-            conversations.append({**doc.to_dict(), 'id': doc.id})
-        for doc in query2.stream():
-            conversations.append({**doc.to_dict(), 'id': doc.id})
-
-        # Also check by role-specific IDs (buyer_id, seller_id, deliverer_id)
-        query3 = self.collection.where(filter=FieldFilter('buyer_id', '==', user_id))
-        query4 = self.collection.where(filter=FieldFilter('seller_id', '==', user_id))
-        query5 = self.collection.where(filter=FieldFilter('deliverer_id', '==', user_id))
-
-        for doc in query3.stream():
-            conv_dict = {**doc.to_dict(), 'id': doc.id}
-            if conv_dict not in conversations:
-                conversations.append(conv_dict)
-        for doc in query4.stream():
-            conv_dict = {**doc.to_dict(), 'id': doc.id}
-            if conv_dict not in conversations:
-                conversations.append(conv_dict)
-        for doc in query5.stream():
-            conv_dict = {**doc.to_dict(), 'id': doc.id}
-            if conv_dict not in conversations:
-                conversations.append(conv_dict)
-
-        # Sort by last_message_at
-        conversations.sort(key=lambda x: x.get('last_message_at', ''), reverse=True)
-        return conversations
+        return self.fan_out(
+            [[(field, '==', user_id)] for field in participant_fields],
+            order_by='last_message_at',
+            descending=True
+        )
 
     def get_or_create_conversation(self, user1_id, user2_id, transaction_id=None, chat_type='buyer_seller'):
         """
@@ -607,7 +606,7 @@ class ConversationService:
         self.collection.document(conversation_id).update(update_data)
 
 
-class MessageService:
+class MessageService(FirebaseService):
     """
     Message operations for chat
 
@@ -616,9 +615,18 @@ class MessageService:
     transaction_id (optional), message_text, is_read, created_at
     """
 
+    QUERIES = (
+        QuerySpec('conversation_history', ('conversation_id',), (('created_at', 'ASCENDING'),)),
+        QuerySpec('conversation_latest', ('conversation_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('unread', ('recipient_id', 'is_read')),
+        QuerySpec('conversation_unread', ('conversation_id', 'is_read')),
+        QuerySpec('conversation_unread_own', ('conversation_id', 'is_read', 'sender_id')),
+        QuerySpec('transaction_messages', ('transaction_id',), (('created_at', 'ASCENDING'),)),
+        QuerySpec('conversation_role_messages', ('conversation_id', 'sender_role'), (('created_at', 'ASCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('messages')
+        super().__init__('messages')
 
     def create(self, data, doc_id=None):
         """
@@ -646,35 +654,25 @@ class MessageService:
         return doc_id
 
     def get_conversation_messages(self, conversation_id, limit=100):
-        """Get all messages for a conversation"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
+        """Get the latest messages for a conversation, oldest first"""
+        filters = [('conversation_id', '==', conversation_id)]
+        if not limit:
+            return self.query(filters, order_by='created_at')
 
-        query = self.collection.where(filter=FieldFilter('conversation_id', '==', conversation_id))
-        # Note: Sorting in Python to avoid composite index requirement
-        # query = query.order_by('created_at')
-
-        docs = query.stream()
-        messages = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
+        # Read the newest `limit` messages, then restore chronological order
+        messages = self.query(filters, limit=limit, order_by='created_at', direction='DESCENDING')
+        messages.reverse()
+        return messages
 
-        # Sort in Python instead of Firestore to avoid needing composite index
-        messages.sort(key=lambda x: x.get('created_at', ''))
-
-        # Apply limit after sorting
-        return messages[:limit] if limit else messages
+    def get_conversation_messages_page(self, conversation_id, page_size=50, cursor=None):
+        """Get one page of messages, newest first; pass next_cursor to load older messages"""
+        return self.paginate([('conversation_id', '==', conversation_id)], order_by='created_at',
+                             direction='DESCENDING', page_size=page_size, cursor=cursor)
 
     def get_transaction_messages(self, transaction_id, limit=100):
-        """Get all messages for a transaction (all chat types)"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-
-        query = self.collection.where(filter=FieldFilter('transaction_id', '==', transaction_id))
-
-        docs = query.stream()
-        messages = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Sort by created_at
-        messages.sort(key=lambda x: x.get('created_at', ''))
-
-        return messages[:limit] if limit else messages
+        """Get messages for a transaction (all chat types), oldest first"""
+        return self.query([('transaction_id', '==', transaction_id)], limit=limit or None,
+                          order_by='created_at')
 
     def mark_as_read(self, conversation_id, user_id):
         """Mark all messages in conversation as read for user"""
@@ -683,26 +681,27 @@ class MessageService:
         query = self.collection.where(filter=FieldFilter('conversation_id', '==', conversation_id))
         query = query.where(filter=FieldFilter('is_read', '==', False))
 
-        batch = self.db.batch()
-        for doc in query.stream():
-            # Only mark as read if current user is not the sender
-            if doc.to_dict().get('sender_id') != user_id:
-                batch.update(doc.reference, {
-                    'is_read': True,
-                    'read_at': firestore.SERVER_TIMESTAMP
-                })
-
-        batch.commit()
+        # Only mark as read if current user is not the sender
+        self.bulk_update({
+            doc.id: {'is_read': True, 'read_at': firestore.SERVER_TIMESTAMP}
+            for doc in query.select(['sender_id']).stream()
+            if doc.to_dict().get('sender_id') != user_id
+        })
 
     def get_unread_count(self, user_id):
         """Get count of unread messages for a user"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-
-        query = self.collection.where(filter=FieldFilter('recipient_id', '==', user_id))
-        query = query.where(filter=FieldFilter('is_read', '==', False))
-
-        docs = query.stream()
-        return sum(1 for _ in docs)
+        return self.count([('recipient_id', '==', user_id), ('is_read', '==', False)])
+
+    def get_conversation_unread_count(self, conversation_id, user_id):
+        """Get count of unread messages in a conversation that were not sent by the user"""
+        # Unread minus the user's own: a sender_id != user_id filter would also
+        # leave out messages without a sender_id, which count as unread
+        unread = [('conversation_id', '==', conversation_id), ('is_read', '==', False)]
+        total, own = run_concurrently(
+            partial(self.count, unread),
+            partial(self.count, [*unread, ('sender_id', '==', user_id)])
+        )
+        return total - own
 
     def get_messages_by_sender_role(self, conversation_id, sender_role, limit=100):
         """
@@ -716,59 +715,29 @@ class MessageService:
         Returns:
             List of messages from the specified role
         """
-        from google.cloud.firestore_v1.base_query import FieldFilter
-
-        query = self.collection.where(filter=FieldFilter('conversation_id', '==', conversation_id))
-        query = query.where(filter=FieldFilter('sender_role', '==', sender_role))
-
-        docs = query.stream()
-        messages = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Sort by created_at
-        messages.sort(key=lambda x: x.get('created_at', ''))
-
-        return messages[:limit] if limit else messages
+        return self.query(
+            [('conversation_id', '==', conversation_id), ('sender_role', '==', sender_role)],
+            limit=limit or None,
+            order_by='created_at'
+        )
 
 
-class DelivererService:
+class DelivererService(FirebaseService):
     """Deliverer operations"""
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('deliverers')
-
-    def create(self, data, doc_id=None):
-        """Create a deliverer profile"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
-
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
+    request_cached = True
+    catalog_cached = True
 
-        self.collection.document(doc_id).set(data)
-        return doc_id
+    QUERIES = (
+        QuerySpec('nearby_deliverers', ('is_active', 'is_verified'), (('geohash', 'ASCENDING'),)),
+    )
 
-    def get(self, deliverer_id):
-        """Get deliverer by ID"""
-        doc = self.collection.document(deliverer_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
+    def __init__(self):
+        super().__init__('deliverers')
 
     def get_by_user_id(self, user_id):
         """Get deliverer by user_id"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        docs = self.collection.where(filter=FieldFilter('user_id', '==', user_id)).limit(1).stream()
-        for doc in docs:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
-
-    def update(self, deliverer_id, data):
-        """Update deliverer"""
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-        self.collection.document(deliverer_id).update(data)
-        return True
+        return self._get_by_field('user_id', user_id)
 
     def get_all_deliverers(self, is_active=None, is_available=None):
         """Get all deliverers with optional filters"""
@@ -785,32 +754,23 @@ class DelivererService:
         docs = query.stream()
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
+    def get_nearby(self, latitude, longitude, radius_km=10, limit=10):
+        """Active, verified deliverers whose last known location is within radius_km, nearest first"""
+        return self.within_radius(latitude, longitude, radius_km,
+                                  filters=[('is_active', '==', True), ('is_verified', '==', True)],
+                                  limit=limit)
 
-class DeliveryRouteService:
-    """Delivery route operations"""
-
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('delivery_routes')
-
-    def create(self, data, doc_id=None):
-        """Create a delivery route"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
 
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
+class DeliveryRouteService(FirebaseService):
+    """Delivery route operations"""
 
-        self.collection.document(doc_id).set(data)
-        return doc_id
+    QUERIES = (
+        QuerySpec('deliverer_routes', ('deliverer_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('active_deliverer_routes', ('deliverer_id', 'is_active')),
+    )
 
-    def get(self, route_id):
-        """Get route by ID"""
-        doc = self.collection.document(route_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
+    def __init__(self):
+        super().__init__('delivery_routes')
 
     def get_deliverer_routes(self, deliverer_id):
         """Get all routes for a deliverer"""
@@ -833,24 +793,16 @@ class DeliveryRouteService:
         docs = query.stream()
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
-    def update(self, route_id, data):
-        """Update route"""
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-        self.collection.document(route_id).update(data)
-        return True
-
-    def delete(self, route_id):
-        """Delete route"""
-        self.collection.document(route_id).delete()
-        return True
 
-
-class VerificationSubmissionService:
+class VerificationSubmissionService(FirebaseService):
     """Verification submission operations for admin"""
 
+    QUERIES = (
+        QuerySpec('submissions_by_status', ('status',), (('created_at', 'ASCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('verification_submissions')
+        super().__init__('verification_submissions')
 
     def create(self, data, doc_id=None):
         """Create a verification submission"""
@@ -864,23 +816,9 @@ class VerificationSubmissionService:
         self.collection.document(doc_id).set(data)
         return doc_id
 
-    def get(self, submission_id):
-        """Get submission by ID"""
-        doc = self.collection.document(submission_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
-
     def get_pending_submissions(self):
-        """Get all pending verification submissions"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-        query = self.collection.where(filter=FieldFilter('status', '==', 'pending'))
-
-        docs = query.stream()
-        submissions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-        # Sort by created_at in Python (avoids need for composite index)
-        submissions.sort(key=lambda x: x.get('created_at') or '', reverse=False)
-        return submissions
+        """Get all pending verification submissions, oldest first"""
+        return self.query([('status', '==', 'pending')], order_by='created_at')
 
     def update_status(self, submission_id, status, reviewed_by=None):
         """Update verification status"""
@@ -896,12 +834,11 @@ class VerificationSubmissionService:
         return True
 
 
-class SellerBadgeService:
+class SellerBadgeService(FirebaseService):
     """Seller badge operations"""
 
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('seller_badges')
+        super().__init__('seller_badges')
 
     def create(self, data, doc_id=None):
         """Create a seller badge"""
@@ -941,24 +878,15 @@ class SellerBadgeService:
         return self.create(badge_data)
 
 
-class AddressService:
+class AddressService(FirebaseService):
     """User address operations"""
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('addresses')
-
-    def create(self, data, doc_id=None):
-        """Create an address"""
-        import uuid
-        if doc_id is None:
-            doc_id = str(uuid.uuid4())
+    QUERIES = (
+        QuerySpec('user_addresses', ('user_id',), (('created_at', 'DESCENDING'),)),
+    )
 
-        data['created_at'] = firestore.SERVER_TIMESTAMP
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-
-        self.collection.document(doc_id).set(data)
-        return doc_id
+    def __init__(self):
+        super().__init__('addresses')
 
     def get_user_addresses(self, user_id):
         """Get all addresses for a user"""
@@ -969,31 +897,16 @@ class AddressService:
         docs = query.stream()
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
-    def get(self, address_id):
-        """Get address by ID"""
-        doc = self.collection.document(address_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
-        return None
-
-    def update(self, address_id, data):
-        """Update address"""
-        data['updated_at'] = firestore.SERVER_TIMESTAMP
-        self.collection.document(address_id).update(data)
-        return True
-
-    def delete(self, address_id):
-        """Delete address"""
-        self.collection.document(address_id).delete()
-        return True
 
-
-class NotificationService:
+class NotificationService(FirebaseService):
     """Notification operations"""
 
+    QUERIES = (
+        QuerySpec('user_notifications', ('user_id',), (('created_at', 'DESCENDING'),)),
+    )
+
     def __init__(self):
-        self.db = get_firestore_db()
-        self.collection = self.db.collection('notifications')
+        super().__init__('notifications')
 
     def create(self, user_id, data, doc_id=None):
         """Create a notification for a user"""
@@ -1025,18 +938,9 @@ class NotificationService:
         return self.create(user_id, notification_data)
 
     def get_by_user(self, user_id, limit=50):
-        """Get notifications for a user"""
-        from google.cloud.firestore_v1.base_query import FieldFilter
-
-        query = self.collection.where(filter=FieldFilter('user_id', '==', user_id))
-        # Sort in Python to avoid composite index requirement
-        docs = query.stream()
-        notifications = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Sort by created_at descending
-        notifications.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-
-        return notifications[:limit] if limit else notifications
+        """Get notifications for a user, newest first"""
+        return self.query([('user_id', '==', user_id)], limit=limit or None,
+                          order_by='created_at', direction='DESCENDING')
 
     def mark_as_read(self, notification_id):
         """Mark a notification as read"""
@@ -1053,14 +957,11 @@ class NotificationService:
         query = self.collection.where(filter=FieldFilter('user_id', '==', user_id))
         query = query.where(filter=FieldFilter('is_read', '==', False))
 
-        docs = query.stream()
-        for doc in docs:
-            doc.reference.update({
-                'is_read': True,
-                'read_at': firestore.SERVER_TIMESTAMP
-            })
-
-        return True
+        result = self.bulk_update({
+            doc.id: {'is_read': True, 'read_at': firestore.SERVER_TIMESTAMP}
+            for doc in query.select(['__name__']).stream()
+        })
+        return result['failed'] == 0
 
     def delete(self, notification_id):
         """Delete a notification"""
@@ -1072,6 +973,7 @@ class NotificationService:
 seller_service = SellerService()
 review_service = ReviewService()
 transaction_service = TransactionService()
+token_transaction_service = TokenTransactionService()
 withdrawal_service = WithdrawalService()
 video_service = VideoService()
 follow_service = FollowService()
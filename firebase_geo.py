@@ -0,0 +1,159 @@
+"""
+Geohash helpers for SparzaFI
+Documents with coordinates also store a geohash, so "within R km of a point"
+becomes a handful of Firestore range queries on the geohash field (cells around
+the point) followed by an exact distance check, instead of a collection scan.
+"""
+
+import math
+from typing import Dict, List, Mapping, Tuple
+
+EARTH_RADIUS_KM = 6371
+
+# Characters of geohash stored on documents (precision 9 is a cell of about 5 x 5 m)
+GEOHASH_PRECISION = 9
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Kilometres per degree of latitude
+_KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                value = value * 2 + 1
+                lon_range[0] = middle
+            else:
+                value *= 2
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                value = value * 2 + 1
+                lat_range[0] = middle
+            else:
+                value *= 2
+                lat_range[1] = middle
+        even = not even
+
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+
+    return ''.join(chars)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def parse_coordinates(latitude, longitude) -> Tuple[float, float]:
+    """
+    Validate a latitude/longitude pair (numbers or numeric strings)
+
+    Raises:
+        ValueError: if either is missing, not a number or out of range
+    """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError('Latitude and longitude must be numbers')
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('Coordinates out of range')
+    return latitude, longitude
+
+
+def parse_radius(radius_km, default: float, max_km: float) -> float:
+    """
+    Validate a search radius in kilometres (a number, numeric string or None for
+    default), capped at max_km
+
+    Raises:
+        ValueError: if it is not a finite, positive number
+    """
+    if radius_km is None or radius_km == '':
+        radius_km = default
+    try:
+        radius_km = float(radius_km)
+    except (TypeError, ValueError):
+        raise ValueError('Radius must be a number')
+
+    if not math.isfinite(radius_km) or radius_km <= 0:
+        raise ValueError('Radius must be a positive number of kilometres')
+    return min(radius_km, max_km)
+
+
+def geo_fields(latitude, longitude) -> Dict:
+    """Fields to store on a document located at a point (raises ValueError like parse_coordinates)"""
+    latitude, longitude = parse_coordinates(latitude, longitude)
+    return {'latitude': latitude, 'longitude': longitude, 'geohash': encode(latitude, longitude)}
+
+
+def geo_fields_from(values: Mapping) -> Dict:
+    """geo_fields() for the 'latitude'/'longitude' of a form or JSON body ({} if absent or invalid)"""
+    try:
+        return geo_fields(values.get('latitude'), values.get('longitude'))
+    except ValueError:
+        return {}
+
+
+def _cell_size_km(precision: int, latitude: float) -> Tuple[float, float]:
+    """(height, width) in km of a geohash cell at a latitude"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    height = 180 / 2 ** lat_bits * _KM_PER_DEGREE
+    width = 360 / 2 ** lon_bits * _KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+    return height, width
+
+
+def query_bounds(latitude: float, longitude: float, radius_km: float) -> List[Tuple[str, str]]:
+    """
+    Geohash ranges [start, end) that together cover every point within radius_km
+
+    Uses the longest geohash whose cells are at least radius_km across; the circle
+    then lies within the 3 x 3 block of cells around the centre, so at most nine
+    ranges are returned. Ranges are a superset: check the exact distance afterwards.
+    """
+    precision = 0
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size_km(candidate, latitude)
+        if height >= radius_km and width >= radius_km:
+            precision = candidate
+            break
+    if precision == 0:
+        # Wider than a top-level cell: every geohash
+        return [('', '~')]
+
+    height, width = _cell_size_km(precision, latitude)
+    lat_step = height / _KM_PER_DEGREE
+    lon_step = 360 / 2 ** (5 * precision - 5 * precision // 2)
+
+    hashes = set()
+    for dlat in (-lat_step, 0, lat_step):
+        for dlon in (-lon_step, 0, lon_step):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lon = (longitude + dlon + 180) % 360 - 180
+            hashes.add(encode(lat, lon, precision))
+
+    return [(geohash, geohash + '~') for geohash in sorted(hashes)]
@@ -0,0 +1,88 @@
+"""
+Query registry for SparzaFI
+Services declare the filtered + ordered queries they run (FirebaseService.QUERIES);
+scripts/generate_indexes.py turns the declarations into firestore.indexes.json
+"""
+
+import json
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+
+class QuerySpec(NamedTuple):
+    """
+    Shape of one query that needs a composite index
+
+    Attributes:
+        name: Identifier, unique within the service
+        equals: Fields filtered with == or in, in index order
+        order_by: (field, direction) pairs; inequality-filtered and aggregated
+                  (sum/avg) fields go here too, ascending
+    """
+    name: str
+    equals: Tuple[str, ...] = ()
+    order_by: Tuple[Tuple[str, str], ...] = ()
+
+    def index_fields(self) -> List[Dict[str, str]]:
+        """Composite index fields for this query"""
+        fields = [{'fieldPath': field, 'order': ASCENDING} for field in self.equals]
+        fields += [{'fieldPath': field, 'order': direction} for field, direction in self.order_by]
+        return fields
+
+
+def collect_queries(services: Iterable) -> List[Tuple[str, QuerySpec]]:
+    """
+    (collection, spec) pairs declared by the given service instances
+
+    Raises:
+        ValueError: if a service declares the same query name twice
+    """
+    queries = []
+    seen = set()
+    for service in services:
+        names = [spec.name for spec in type(service).QUERIES]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"{type(service).__name__} declares {sorted(duplicates)} more than once")
+
+        for spec in type(service).QUERIES:
+            key = (type(service), service.collection_name, spec)
+            if key not in seen:
+                seen.add(key)
+                queries.append((service.collection_name, spec))
+    return queries
+
+
+def build_indexes(queries: Iterable[Tuple[str, QuerySpec]]) -> List[Dict]:
+    """
+    Composite index definitions for the given queries
+
+    Queries on a single field are served by Firestore's automatic indexes and are
+    skipped; queries that need the same index share one definition.
+    """
+    indexes = []
+    seen = set()
+    for collection_name, spec in queries:
+        fields = spec.index_fields()
+        if len(fields) < 2:
+            continue
+
+        key = (collection_name, tuple((f['fieldPath'], f['order']) for f in fields))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        indexes.append({
+            'collectionGroup': collection_name,
+            'queryScope': 'COLLECTION',
+            'fields': fields,
+        })
+    return indexes
+
+
+def render_indexes_file(indexes: List[Dict], field_overrides: List[Dict] = ()) -> str:
+    """firestore.indexes.json contents"""
+    return json.dumps({'indexes': indexes, 'fieldOverrides': list(field_overrides)}, indent=2) + '\n'
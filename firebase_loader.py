@@ -0,0 +1,119 @@
+"""
+Request-scoped document loader for SparzaFI
+Identity map that memoizes Firestore point reads for the duration of one request
+and resolves queued lookups with a single batched read
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from flask import g, has_request_context
+
+
+# Fetch callable: takes a list of distinct document IDs, returns {doc_id: document}
+FetchFn = Callable[[List[str]], Dict[str, Dict]]
+
+
+class RequestLoader:
+    """
+    Per-request identity map keyed by (collection, doc_id)
+
+    Usage:
+        loader.want('sellers', ids)          # queue ids while looping
+        loader.load('sellers', id, fetch)    # first load resolves every queued id in one batch
+    """
+
+    def __init__(self):
+        self._documents: Dict[Tuple[str, str], Optional[Dict]] = {}
+        self._pending: Dict[str, Set[str]] = {}
+        self._memo: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def want(self, collection_name: str, doc_ids: Iterable[str]):
+        """Queue document IDs to be fetched by the next load on this collection"""
+        pending = self._pending.setdefault(collection_name, set())
+        for doc_id in doc_ids:
+            if doc_id and (collection_name, doc_id) not in self._documents:
+                pending.add(doc_id)
+
+    def load(self, collection_name: str, doc_id: str, fetch: FetchFn) -> Optional[Dict]:
+        """Get one document, fetching it (with any queued IDs) on first access"""
+        if not doc_id:
+            return None
+
+        key = (collection_name, doc_id)
+        if key in self._documents:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.want(collection_name, [doc_id])
+            self.dispatch(collection_name, fetch)
+
+        doc = self._documents.get(key)
+        return dict(doc) if doc is not None else None
+
+    def load_many(self, collection_name: str, doc_ids: Iterable[str], fetch: FetchFn) -> Dict[str, Dict]:
+        """Get several documents as {doc_id: document}, fetching only the ones not seen yet"""
+        doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id]
+
+        missing = [doc_id for doc_id in doc_ids if (collection_name, doc_id) not in self._documents]
+        self.hits += len(doc_ids) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            self.want(collection_name, missing)
+            self.dispatch(collection_name, fetch)
+
+        found = {}
+        for doc_id in doc_ids:
+            doc = self._documents.get((collection_name, doc_id))
+            if doc is not None:
+                found[doc_id] = doc
+        return found
+
+    def dispatch(self, collection_name: str, fetch: FetchFn):
+        """Resolve all queued IDs for a collection with one batched fetch"""
+        pending = self._pending.pop(collection_name, None)
+        if not pending:
+            return
+
+        found = fetch(list(pending))
+        self.batches += 1
+
+        # Missing documents are remembered as None so they are not fetched again
+        for doc_id in pending:
+            self._documents[(collection_name, doc_id)] = found.get(doc_id)
+
+    def forget(self, collection_name: str, doc_id: str):
+        """Drop a document after it has been written during this request"""
+        self._documents.pop((collection_name, doc_id), None)
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Compute a derived value (e.g. a user's followed seller IDs) once per request"""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def forget_memo(self, key: Hashable):
+        """Drop a memoized value after the data behind it has been written"""
+        self._memo.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for debugging"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'batches': self.batches,
+            'documents': len(self._documents),
+        }
+
+
+def get_request_loader() -> Optional[RequestLoader]:
+    """Get the loader for the current request (None outside a request)"""
+    if not has_request_context():
+        return None
+
+    loader = g.get('_request_loader')
+    if loader is None:
+        loader = g._request_loader = RequestLoader()
+    return loader
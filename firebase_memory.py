@@ -0,0 +1,721 @@
+"""
+In-memory Firestore stand-in for SparzaFI
+Implements the subset of the google-cloud-firestore client API used by the app so
+routes and services can run offline (tests, local profiling). Selected with
+SPARZAFI_DB_BACKEND=memory; SPARZAFI_MEMORY_LATENCY_MS adds a simulated delay to
+every RPC so N+1 access patterns show up in local benchmarks.
+"""
+
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+from google.cloud.firestore_v1.base_query import FieldFilter, Or, And
+
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+# gRPC status codes reported to BulkWriter error callbacks
+_NOT_FOUND = 5
+_ALREADY_EXISTS = 6
+
+# Firestore's cross-type ordering: null < bool < number < timestamp < string < bytes
+# < reference < array < map
+_TYPE_RANK = {'null': 0, 'bool': 1, 'number': 2, 'timestamp': 3, 'string': 4,
+              'bytes': 5, 'reference': 6, 'array': 8, 'map': 9}
+
+_MISSING = object()
+
+
+# ==================== VALUE HELPERS ====================
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _sort_key(value: Any) -> Tuple:
+    """Total ordering key matching Firestore's value ordering"""
+    if value is None:
+        return (_TYPE_RANK['null'],)
+    if isinstance(value, bool):
+        return (_TYPE_RANK['bool'], value)
+    if isinstance(value, (int, float)):
+        return (_TYPE_RANK['number'], value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (_TYPE_RANK['timestamp'], value)
+    if isinstance(value, str):
+        return (_TYPE_RANK['string'], value)
+    if isinstance(value, bytes):
+        return (_TYPE_RANK['bytes'], value)
+    if isinstance(value, (list, tuple)):
+        return (_TYPE_RANK['array'], tuple(_sort_key(v) for v in value))
+    if isinstance(value, dict):
+        return (_TYPE_RANK['map'], tuple((k, _sort_key(v)) for k, v in sorted(value.items())))
+    if hasattr(value, 'path'):
+        return (_TYPE_RANK['reference'], value.path)
+    return (_TYPE_RANK['map'], repr(value))
+
+
+def _get_path(data: Dict, field_path: str) -> Any:
+    """Read a dotted field path (returns _MISSING if absent)"""
+    value = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_value(current: Any, value: Any) -> Any:
+    """Resolve sentinels and transforms against the current stored value"""
+    if value is transforms.SERVER_TIMESTAMP:
+        return _now()
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(copy.deepcopy(item))
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        result = list(current) if isinstance(current, list) else []
+        return [item for item in result if item not in value.values]
+    if isinstance(value, dict):
+        current = current if isinstance(current, dict) else {}
+        resolved = {}
+        for key, item in value.items():
+            if item is transforms.DELETE_FIELD:
+                continue
+            resolved[key] = _apply_value(current.get(key, _MISSING), item)
+        return resolved
+    return copy.deepcopy(value)
+
+
+def _set_path(data: Dict, field_path: str, value: Any):
+    """Write (or delete, for DELETE_FIELD) a dotted field path"""
+    parts = field_path.split('.')
+    target = data
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+
+    if value is transforms.DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = _apply_value(target.get(parts[-1], _MISSING), value)
+
+
+def _merge(target: Dict, data: Dict):
+    """Deep-merge data into target (set(..., merge=True))"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        elif value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        else:
+            target[key] = _apply_value(target.get(key, _MISSING), value)
+
+
+# ==================== CLIENT ====================
+
+class MemoryFirestore:
+    """Process-local, thread-safe replacement for firestore.Client"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.rpc_count = 0
+        self._collections: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.RLock()
+
+    def collection(self, *path: str) -> 'MemoryCollection':
+        return MemoryCollection(self, '/'.join(path))
+
+    def document(self, *path: str) -> 'MemoryDocument':
+        full_path = '/'.join(path)
+        collection_path, _, doc_id = full_path.rpartition('/')
+        return MemoryDocument(self, collection_path, doc_id)
+
+    def get_all(self, references, field_paths=None, transaction=None) -> Iterator['MemorySnapshot']:
+        references = list(references)
+        self._rpc()
+        for reference in references:
+            yield reference._snapshot(field_paths)
+
+    def batch(self) -> 'MemoryWriteBatch':
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> 'MemoryTransaction':
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def bulk_writer(self, options=None) -> 'MemoryBulkWriter':
+        return MemoryBulkWriter(self)
+
+    def collections(self) -> List['MemoryCollection']:
+        with self._lock:
+            return [MemoryCollection(self, path) for path in self._collections if '/' not in path]
+
+    def reset(self):
+        """Drop all data and counters"""
+        with self._lock:
+            self._collections.clear()
+            self.rpc_count = 0
+
+    def _rpc(self):
+        """Account for one round trip (and simulate its latency)"""
+        with self._lock:
+            self.rpc_count += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def _store(self, collection_path: str) -> Dict[str, Dict]:
+        return self._collections.setdefault(collection_path, {})
+
+    def _write(self, method: str, reference: 'MemoryDocument', data: Optional[Dict] = None,
+               merge: bool = False):
+        """Apply one write (caller accounts for the RPC)"""
+        with self._lock:
+            store = self._store(reference._collection_path)
+            existing = store.get(reference.id)
+
+            if method == 'create':
+                if existing is not None:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+                store[reference.id] = _apply_value({}, data)
+            elif method == 'set':
+                if merge and existing is not None:
+                    _merge(existing, data)
+                else:
+                    store[reference.id] = _apply_value({}, data)
+            elif method == 'update':
+                if existing is None:
+                    raise NotFound(f"No document to update: {reference.path}")
+                for field_path, value in data.items():
+                    _set_path(existing, field_path, value)
+            elif method == 'delete':
+                store.pop(reference.id, None)
+
+
+class _WriteResult:
+    def __init__(self):
+        self.update_time = _now()
+
+
+# ==================== DOCUMENTS ====================
+
+class MemoryDocument:
+    """Stand-in for DocumentReference"""
+
+    def __init__(self, client: MemoryFirestore, collection_path: str, doc_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> 'MemoryCollection':
+        return MemoryCollection(self._client, self._collection_path)
+
+    def collection(self, collection_id: str) -> 'MemoryCollection':
+        return MemoryCollection(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths=None, transaction=None, **kwargs) -> 'MemorySnapshot':
+        self._client._rpc()
+        return self._snapshot(field_paths)
+
+    def create(self, document_data: Dict) -> _WriteResult:
+        self._client._rpc()
+        self._client._write('create', self, document_data)
+        return _WriteResult()
+
+    def set(self, document_data: Dict, merge: bool = False) -> _WriteResult:
+        self._client._rpc()
+        self._client._write('set', self, document_data, merge=merge)
+        return _WriteResult()
+
+    def update(self, field_updates: Dict, option=None) -> _WriteResult:
+        self._client._rpc()
+        self._client._write('update', self, field_updates)
+        return _WriteResult()
+
+    def delete(self, option=None) -> _WriteResult:
+        self._client._rpc()
+        self._client._write('delete', self)
+        return _WriteResult()
+
+    def _snapshot(self, field_paths=None) -> 'MemorySnapshot':
+        with self._client._lock:
+            data = self._client._store(self._collection_path).get(self.id)
+            data = copy.deepcopy(data) if data is not None else None
+        return MemorySnapshot(self, data, field_paths)
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocument) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+class MemorySnapshot:
+    """Stand-in for DocumentSnapshot"""
+
+    def __init__(self, reference: MemoryDocument, data: Optional[Dict], field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        # Like Firestore, an empty projection returns every field and ['__name__']
+        # returns none (only the reference)
+        if data is not None and field_paths:
+            data = {field: data[field] for field in field_paths if field != '__name__' and field in data}
+        self._data = data
+        self.read_time = _now()
+        self.create_time = self.update_time = self.read_time if self.exists else None
+
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value = _get_path(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+# ==================== QUERIES ====================
+
+class MemoryQuery:
+    """Stand-in for Query (immutable: every method returns a new query)"""
+
+    def __init__(self, client: MemoryFirestore, collection_path: str):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters: List = []
+        self._orders: List[Tuple[str, str]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._projection: Optional[List[str]] = None
+        self._start: Optional[Tuple[Any, bool]] = None
+        self._end: Optional[Tuple[Any, bool]] = None
+
+    def _copy(self) -> 'MemoryQuery':
+        query = MemoryQuery.__new__(MemoryQuery)
+        query.__dict__.update(self.__dict__)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        return query
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> 'MemoryQuery':
+        query = self._copy()
+        query._filters.append(filter if filter is not None else FieldFilter(field_path, op_string, value))
+        return query
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> 'MemoryQuery':
+        query = self._copy()
+        query._orders.append((field_path, direction))
+        return query
+
+    def limit(self, count: int) -> 'MemoryQuery':
+        query = self._copy()
+        query._limit = count
+        return query
+
+    def offset(self, num_to_skip: int) -> 'MemoryQuery':
+        query = self._copy()
+        query._offset = num_to_skip
+        return query
+
+    def select(self, field_paths) -> 'MemoryQuery':
+        query = self._copy()
+        query._projection = list(field_paths)
+        return query
+
+    def start_at(self, document_fields) -> 'MemoryQuery':
+        query = self._copy()
+        query._start = (document_fields, True)
+        return query
+
+    def start_after(self, document_fields) -> 'MemoryQuery':
+        query = self._copy()
+        query._start = (document_fields, False)
+        return query
+
+    def end_at(self, document_fields) -> 'MemoryQuery':
+        query = self._copy()
+        query._end = (document_fields, True)
+        return query
+
+    def end_before(self, document_fields) -> 'MemoryQuery':
+        query = self._copy()
+        query._end = (document_fields, False)
+        return query
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[MemorySnapshot]:
+        self._client._rpc()
+        for doc_id, data in self._run():
+            reference = MemoryDocument(self._client, self._collection_path, doc_id)
+            yield MemorySnapshot(reference, data, self._projection)
+
+    def get(self, transaction=None, **kwargs) -> List[MemorySnapshot]:
+        return list(self.stream(transaction=transaction))
+
+    def count(self, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        return MemoryAggregationQuery(self).count(alias=alias)
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        return MemoryAggregationQuery(self).sum(field_ref, alias=alias)
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        return MemoryAggregationQuery(self).avg(field_ref, alias=alias)
+
+    # -------------------- evaluation --------------------
+
+    def _orderings(self) -> List[Tuple[str, str]]:
+        """Explicit orderings plus the implicit document-ID tie-breaker"""
+        orders = list(self._orders)
+        if not any(field == '__name__' for field, _ in orders):
+            orders.append(('__name__', orders[-1][1] if orders else ASCENDING))
+        return orders
+
+    def _run(self) -> List[Tuple[str, Dict]]:
+        with self._client._lock:
+            documents = [
+                (doc_id, copy.deepcopy(data))
+                for doc_id, data in self._client._store(self._collection_path).items()
+            ]
+
+        orders = self._orderings()
+        rows = []
+        for doc_id, data in documents:
+            if not all(self._matches(f, data) for f in self._filters):
+                continue
+            values = [doc_id if field == '__name__' else _get_path(data, field) for field, _ in orders]
+            # Ordering on a field excludes documents that do not have it
+            if any(value is _MISSING for value in values):
+                continue
+            rows.append((values, doc_id, data))
+
+        directions = [direction for _, direction in orders]
+        for position in reversed(range(len(orders))):
+            rows.sort(key=lambda row: _sort_key(row[0][position]), reverse=directions[position] == DESCENDING)
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            cursor = self._cursor_values(cursor, orders)
+            rows = [row for row in rows
+                    if self._compare(row[0], cursor, directions) > 0
+                    or (inclusive and self._compare(row[0], cursor, directions) == 0)]
+
+        if self._end is not None:
+            cursor, inclusive = self._end
+            cursor = self._cursor_values(cursor, orders)
+            rows = [row for row in rows
+                    if self._compare(row[0], cursor, directions) < 0
+                    or (inclusive and self._compare(row[0], cursor, directions) == 0)]
+
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [(doc_id, data) for _, doc_id, data in rows]
+
+    @staticmethod
+    def _cursor_values(cursor, orders: List[Tuple[str, str]]) -> List[Any]:
+        if isinstance(cursor, MemorySnapshot):
+            data = cursor.to_dict() or {}
+            return [cursor.id if field == '__name__' else _get_path(data, field) for field, _ in orders]
+        if isinstance(cursor, dict):
+            values = []
+            for field, _ in orders:
+                if field not in cursor:
+                    break
+                values.append(cursor[field])
+            return values
+        return list(cursor)
+
+    @staticmethod
+    def _compare(values: List[Any], cursor: List[Any], directions: List[str]) -> int:
+        """Compare a row to a (possibly partial) cursor in query order"""
+        for value, cursor_value, direction in zip(values, cursor, directions):
+            if hasattr(cursor_value, 'id') and not isinstance(cursor_value, (str, bytes)):
+                cursor_value = cursor_value.id
+            left, right = _sort_key(value), _sort_key(cursor_value)
+            if left != right:
+                result = 1 if left > right else -1
+                return -result if direction == DESCENDING else result
+        return 0
+
+    def _matches(self, condition, data: Dict) -> bool:
+        if isinstance(condition, Or):
+            return any(self._matches(f, data) for f in condition.filters)
+        if isinstance(condition, And):
+            return all(self._matches(f, data) for f in condition.filters)
+
+        value = _get_path(data, condition.field_path)
+        if value is _MISSING:
+            return False
+
+        op = condition.op_string
+        expected = condition.value
+        if not isinstance(op, str):
+            # IS_NULL / IS_NOT_NULL / IS_NAN / IS_NOT_NAN unary operators
+            name = getattr(op, 'name', str(op))
+            is_null = value is None
+            return not is_null if 'NOT' in name else is_null
+
+        key = _sort_key(value)
+        if op == '==':
+            return key == _sort_key(expected)
+        if op == '!=':
+            return value is not None and key != _sort_key(expected)
+        if op == 'in':
+            return key in [_sort_key(v) for v in expected]
+        if op == 'not-in':
+            return value is not None and key not in [_sort_key(v) for v in expected]
+        if op == 'array_contains':
+            return isinstance(value, list) and _sort_key(expected) in [_sort_key(v) for v in value]
+        if op == 'array_contains_any':
+            wanted = [_sort_key(v) for v in expected]
+            return isinstance(value, list) and any(_sort_key(v) in wanted for v in value)
+
+        # Range comparisons only match values of the same type
+        other = _sort_key(expected)
+        if key[0] != other[0]:
+            return False
+        if op == '<':
+            return key < other
+        if op == '<=':
+            return key <= other
+        if op == '>':
+            return key > other
+        if op == '>=':
+            return key >= other
+        raise ValueError(f"Unsupported operator: {op}")
+
+
+class MemoryCollection(MemoryQuery):
+    """Stand-in for CollectionReference"""
+
+    def __init__(self, client: MemoryFirestore, collection_path: str):
+        super().__init__(client, collection_path)
+        self.id = collection_path.rpartition('/')[2]
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocument:
+        if document_id is None:
+            document_id = uuid.uuid4().hex[:20]
+        return MemoryDocument(self._client, self._collection_path, document_id)
+
+    def add(self, document_data: Dict, document_id: Optional[str] = None) -> Tuple[datetime, MemoryDocument]:
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return _now(), reference
+
+    def list_documents(self, page_size=None) -> Iterator[MemoryDocument]:
+        with self._client._lock:
+            doc_ids = list(self._client._store(self._collection_path))
+        for doc_id in doc_ids:
+            yield MemoryDocument(self._client, self._collection_path, doc_id)
+
+
+class MemoryAggregationQuery:
+    """Stand-in for AggregationQuery (count/sum/avg)"""
+
+    def __init__(self, query: MemoryQuery):
+        self._query = query
+        self._aggregations: List[Tuple[str, Optional[str], str]] = []
+
+    def count(self, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        self._aggregations.append(('count', None, alias or 'field_1'))
+        return self
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        self._aggregations.append(('sum', field_ref, alias or f'field_{len(self._aggregations) + 1}'))
+        return self
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> 'MemoryAggregationQuery':
+        self._aggregations.append(('avg', field_ref, alias or f'field_{len(self._aggregations) + 1}'))
+        return self
+
+    def get(self, transaction=None, **kwargs) -> List[List[AggregationResult]]:
+        self._query._client._rpc()
+        documents = [data for _, data in self._query._run()]
+
+        results = []
+        for kind, field, alias in self._aggregations:
+            if kind == 'count':
+                value = len(documents)
+            else:
+                numbers = [
+                    value for value in (_get_path(doc, field) for doc in documents)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                ]
+                if kind == 'sum':
+                    value = sum(numbers)
+                else:
+                    value = sum(numbers) / len(numbers) if numbers else None
+            results.append(AggregationResult(alias=alias, value=value, read_time=_now()))
+        return [results]
+
+
+# ==================== WRITES ====================
+
+class MemoryWriteBatch:
+    """Stand-in for WriteBatch: writes are applied together on commit()"""
+
+    MAX_OPERATIONS = 500
+
+    def __init__(self, client: MemoryFirestore):
+        self._client = client
+        self._operations: List[Tuple] = []
+
+    def create(self, reference, document_data):
+        self._operations.append(('create', reference, document_data, False))
+
+    def set(self, reference, document_data, merge=False):
+        self._operations.append(('set', reference, document_data, merge))
+
+    def update(self, reference, field_updates, option=None):
+        self._operations.append(('update', reference, field_updates, False))
+
+    def delete(self, reference, option=None):
+        self._operations.append(('delete', reference, None, False))
+
+    def commit(self, **kwargs) -> List[_WriteResult]:
+        if len(self._operations) > self.MAX_OPERATIONS:
+            raise ValueError(f"A batch can contain at most {self.MAX_OPERATIONS} writes")
+
+        self._client._rpc()
+        with self._client._lock:
+            # Validate before applying so the batch stays atomic
+            for method, reference, _, _ in self._operations:
+                exists = reference.id in self._client._store(reference._collection_path)
+                if method == 'update' and not exists:
+                    raise NotFound(f"No document to update: {reference.path}")
+                if method == 'create' and exists:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+
+            for method, reference, data, merge in self._operations:
+                self._client._write(method, reference, data, merge=merge)
+
+        results = [_WriteResult() for _ in self._operations]
+        self._operations = []
+        return results
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Stand-in for Transaction, compatible with @firestore.transactional"""
+
+    def __init__(self, client: MemoryFirestore, max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, MemoryDocument):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+    def get_all(self, references, **kwargs):
+        return self._client.get_all(references)
+
+    def _clean_up(self):
+        self._operations = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self) -> List[_WriteResult]:
+        results = self.commit()
+        self._clean_up()
+        return results
+
+    def _rollback(self):
+        self._clean_up()
+
+
+class _BulkOperation:
+    def __init__(self, reference: MemoryDocument):
+        self.reference = reference
+        self.attempts = 0
+
+
+class MemoryBulkWriteFailure:
+    """Stand-in for BulkWriteFailure passed to on_write_error callbacks"""
+
+    def __init__(self, operation: _BulkOperation, code: int, message: str):
+        self.operation = operation
+        self.code = code
+        self.message = message
+
+    @property
+    def attempts(self) -> int:
+        return self.operation.attempts
+
+
+class MemoryBulkWriter:
+    """Stand-in for BulkWriter: writes are applied immediately, one RPC each"""
+
+    def __init__(self, client: MemoryFirestore):
+        self._client = client
+        self._on_result = lambda reference, result, bulk_writer: None
+        self._on_error = lambda failure, bulk_writer: False
+
+    def on_write_result(self, callback):
+        self._on_result = callback or (lambda reference, result, bulk_writer: None)
+
+    def on_write_error(self, callback):
+        self._on_error = callback or (lambda failure, bulk_writer: False)
+
+    def create(self, reference, document_data, attempts: int = 0):
+        self._run('create', reference, document_data)
+
+    def set(self, reference, document_data, merge=False, attempts: int = 0):
+        self._run('set', reference, document_data, merge)
+
+    def update(self, reference, field_updates, option=None, attempts: int = 0):
+        self._run('update', reference, field_updates)
+
+    def delete(self, reference, option=None, attempts: int = 0):
+        self._run('delete', reference)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _run(self, method: str, reference: MemoryDocument, data: Optional[Dict] = None, merge: bool = False):
+        operation = _BulkOperation(reference)
+        while True:
+            operation.attempts += 1
+            self._client._rpc()
+            try:
+                self._client._write(method, reference, data, merge=merge)
+            except NotFound as e:
+                failure = MemoryBulkWriteFailure(operation, _NOT_FOUND, str(e))
+            except AlreadyExists as e:
+                failure = MemoryBulkWriteFailure(operation, _ALREADY_EXISTS, str(e))
+            else:
+                self._on_result(reference, _WriteResult(), self)
+                return
+
+            if not self._on_error(failure, self):
+                return
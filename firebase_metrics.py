@@ -0,0 +1,328 @@
+"""
+Firestore RPC accounting for SparzaFI
+Wraps the Firestore client so every request records how many reads, writes and
+queries it issued and how long it spent waiting on the database
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from flask import g, has_request_context
+
+
+class RequestMetrics:
+    """Firestore call counters for one request"""
+
+    def __init__(self):
+        self.point_reads = 0      # DocumentReference.get()
+        self.batch_reads = 0      # documents returned by get_all()
+        self.queries = 0          # query streams
+        self.streamed_docs = 0    # documents returned by queries
+        self.aggregations = 0     # count/sum/avg queries
+        self.writes = 0           # document writes (direct, batched or bulk)
+        self.rpcs = 0
+        self.db_time = 0.0        # seconds spent inside Firestore calls
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, rpcs: int = 1, **counts: int):
+        """Add one call's duration and counters (thread-safe, fan_out() runs in workers)"""
+        with self._lock:
+            self.db_time += elapsed
+            self.rpcs += rpcs
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def reads(self) -> int:
+        """Documents read, however they were fetched"""
+        return self.point_reads + self.batch_reads + self.streamed_docs
+
+    def as_dict(self) -> Dict:
+        return {
+            'reads': self.reads,
+            'point_reads': self.point_reads,
+            'batch_reads': self.batch_reads,
+            'queries': self.queries,
+            'streamed_docs': self.streamed_docs,
+            'aggregations': self.aggregations,
+            'writes': self.writes,
+            'rpcs': self.rpcs,
+            'db_ms': round(self.db_time * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header"""
+        return (
+            f'firestore;dur={self.db_time * 1000:.2f};'
+            f'desc="reads={self.reads} writes={self.writes} queries={self.queries} rpcs={self.rpcs}"'
+        )
+
+
+def start_request_metrics() -> RequestMetrics:
+    """Begin accounting for the current request"""
+    g._firestore_metrics = RequestMetrics()
+    return g._firestore_metrics
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the current request (None outside requests or before start_request_metrics)"""
+    if not has_request_context():
+        return None
+    return g.get('_firestore_metrics')
+
+
+@contextmanager
+def _timed(rpcs: int = 1, **counts: int):
+    metrics = get_request_metrics()
+    if metrics is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(time.perf_counter() - started, rpcs=rpcs, **counts)
+
+
+def _unwrap(obj):
+    """Return the wrapped Firestore object (or obj itself)"""
+    return getattr(obj, '_target', obj) if isinstance(obj, _Proxy) else obj
+
+
+def _unwrap_kwargs(kwargs: Dict) -> Dict:
+    if 'transaction' in kwargs:
+        kwargs['transaction'] = _unwrap(kwargs['transaction'])
+    return kwargs
+
+
+# ==================== PROXIES ====================
+
+class _Proxy:
+    """Delegates everything that is not instrumented to the wrapped object"""
+
+    __slots__ = ('_target',)
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return f"<instrumented {self._target!r}>"
+
+
+class InstrumentedClient(_Proxy):
+    """Firestore client whose calls are recorded in the current request's metrics"""
+
+    __slots__ = ()
+
+    def collection(self, *path):
+        return InstrumentedQuery(self._target.collection(*path))
+
+    def document(self, *path):
+        return InstrumentedDocument(self._target.document(*path))
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        references = [_unwrap(ref) for ref in references]
+        with _timed(batch_reads=len(references)):
+            snapshots = list(self._target.get_all(references, field_paths=field_paths,
+                                                  transaction=_unwrap(transaction), **kwargs))
+        return iter(snapshots)
+
+    def batch(self):
+        return InstrumentedWriteBatch(self._target.batch())
+
+    def transaction(self, **kwargs):
+        return InstrumentedWriteBatch(self._target.transaction(**kwargs))
+
+    def bulk_writer(self, *args, **kwargs):
+        return InstrumentedBulkWriter(self._target.bulk_writer(*args, **kwargs))
+
+
+class InstrumentedDocument(_Proxy):
+    """DocumentReference wrapper"""
+
+    __slots__ = ()
+
+    def get(self, *args, **kwargs):
+        with _timed(point_reads=1):
+            return self._target.get(*args, **_unwrap_kwargs(kwargs))
+
+    def create(self, *args, **kwargs):
+        with _timed(writes=1):
+            return self._target.create(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        with _timed(writes=1):
+            return self._target.set(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        with _timed(writes=1):
+            return self._target.update(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with _timed(writes=1):
+            return self._target.delete(*args, **kwargs)
+
+    def collection(self, collection_id):
+        return InstrumentedQuery(self._target.collection(collection_id))
+
+
+class InstrumentedQuery(_Proxy):
+    """CollectionReference/Query wrapper; builder methods keep the wrapper"""
+
+    __slots__ = ()
+
+    def _wrap(name):
+        def method(self, *args, **kwargs):
+            return InstrumentedQuery(getattr(self._target, name)(*args, **kwargs))
+        method.__name__ = name
+        return method
+
+    where = _wrap('where')
+    order_by = _wrap('order_by')
+    limit = _wrap('limit')
+    limit_to_last = _wrap('limit_to_last')
+    offset = _wrap('offset')
+    select = _wrap('select')
+    start_at = _wrap('start_at')
+    start_after = _wrap('start_after')
+    end_at = _wrap('end_at')
+    end_before = _wrap('end_before')
+    del _wrap
+
+    def document(self, *args, **kwargs):
+        return InstrumentedDocument(self._target.document(*args, **kwargs))
+
+    def add(self, *args, **kwargs):
+        with _timed(writes=1):
+            update_time, reference = self._target.add(*args, **kwargs)
+        return update_time, InstrumentedDocument(reference)
+
+    def stream(self, *args, **kwargs) -> Iterator:
+        metrics = get_request_metrics()
+        stream = self._target.stream(*args, **_unwrap_kwargs(kwargs))
+        if metrics is None:
+            yield from stream
+            return
+
+        # Time only the waits on Firestore, not the caller's work between documents
+        elapsed, count = 0.0, 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    doc = next(stream)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - started
+                count += 1
+                yield doc
+        finally:
+            metrics.record(elapsed, queries=1, streamed_docs=count)
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+    def count(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.count(*args, **kwargs))
+
+    def sum(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.sum(*args, **kwargs))
+
+    def avg(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.avg(*args, **kwargs))
+
+
+class InstrumentedAggregation(_Proxy):
+    """AggregationQuery wrapper"""
+
+    __slots__ = ()
+
+    def count(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.count(*args, **kwargs))
+
+    def sum(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.sum(*args, **kwargs))
+
+    def avg(self, *args, **kwargs):
+        return InstrumentedAggregation(self._target.avg(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        with _timed(aggregations=1):
+            return self._target.get(*args, **_unwrap_kwargs(kwargs))
+
+
+class InstrumentedWriteBatch(_Proxy):
+    """WriteBatch/Transaction wrapper: writes are counted when committed"""
+
+    __slots__ = ()
+
+    def create(self, reference, *args, **kwargs):
+        return self._target.create(_unwrap(reference), *args, **kwargs)
+
+    def set(self, reference, *args, **kwargs):
+        return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def get(self, ref_or_query, *args, **kwargs):
+        return self._target.get(_unwrap(ref_or_query), *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        with _timed(writes=len(getattr(self._target, '_write_pbs', None) or
+                               getattr(self._target, '_operations', None) or [])):
+            return self._target.commit(*args, **kwargs)
+
+    def _commit(self, *args, **kwargs):
+        # Called by @firestore.transactional
+        with _timed(writes=len(getattr(self._target, '_write_pbs', None) or
+                               getattr(self._target, '_operations', None) or [])):
+            return self._target._commit(*args, **kwargs)
+
+
+class InstrumentedBulkWriter(_Proxy):
+    """BulkWriter wrapper: each enqueued write counts as one write"""
+
+    __slots__ = ()
+
+    def create(self, reference, *args, **kwargs):
+        with _timed(rpcs=0, writes=1):
+            return self._target.create(_unwrap(reference), *args, **kwargs)
+
+    def set(self, reference, *args, **kwargs):
+        with _timed(rpcs=0, writes=1):
+            return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        with _timed(rpcs=0, writes=1):
+            return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        with _timed(rpcs=0, writes=1):
+            return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def close(self, *args, **kwargs):
+        with _timed():
+            return self._target.close(*args, **kwargs)
+
+    def flush(self, *args, **kwargs):
+        with _timed():
+            return self._target.flush(*args, **kwargs)
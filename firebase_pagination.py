@@ -0,0 +1,84 @@
+"""
+Cursor pagination helpers for SparzaFI
+Encodes the position of the last document on a page as an opaque, URL-safe token
+that can be passed back to FirebaseService.paginate() to read the next page.
+Ranked results that are not Firestore queries (search) page by offset, with
+the offset wrapped in the same kind of token.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+class Page(TypedDict):
+    """One page of results"""
+    items: List[Dict]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def encode_cursor(order_by: str, value: Any, doc_id: str) -> str:
+    """Encode (order field, last value, last document ID) as an opaque token"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        value = {'$dt': value.isoformat()}
+
+    payload = json.dumps({'f': order_by, 'v': value, 'id': doc_id}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, order_by: str) -> Dict[str, Any]:
+    """
+    Decode a token into a start_after() position for the given order field
+
+    Raises:
+        InvalidCursor: if the token is malformed or was issued for another ordering
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        field, value, doc_id = payload['f'], payload['v'], payload['id']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+    if field != order_by or not isinstance(doc_id, str):
+        raise InvalidCursor(f"Cursor does not match ordering by '{order_by}'")
+
+    if isinstance(value, dict) and '$dt' in value:
+        try:
+            value = datetime.fromisoformat(value['$dt'])
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+    return {order_by: value, '__name__': doc_id}
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode the offset of the next result as an opaque token"""
+    payload = json.dumps({'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_offset_cursor(token: str) -> int:
+    """
+    Decode a token from encode_offset_cursor()
+
+    Raises:
+        InvalidCursor: if the token is malformed or is not an offset cursor
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))['o']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise InvalidCursor(f"Invalid cursor: {token}")
+    return offset
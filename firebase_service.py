@@ -3,21 +3,118 @@ Firebase Service Layer for SparzaFI
 Provides high-level database operations using Firestore
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from firebase_config import get_firestore_db, get_storage_bucket
+from firebase_loader import get_request_loader
+from firebase_cache import catalog_cache, catalog_cache_active
+from firebase_pagination import Page, encode_cursor, decode_cursor
+from firebase_indexes import QuerySpec
+from firebase_geo import geo_fields, haversine_km, query_bounds
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud import firestore
+import math
+import os
+import threading
 import uuid
 
 
+# Worker threads shared by all fan_out() calls; created on first use so that
+# no threads exist before the server forks its workers. Threads do not survive
+# fork(), so a process never reuses an executor created by its parent.
+_fan_out_executor: Optional[ThreadPoolExecutor] = None
+_fan_out_executor_pid: Optional[int] = None
+
+
+def _get_fan_out_executor() -> ThreadPoolExecutor:
+    global _fan_out_executor, _fan_out_executor_pid
+    if _fan_out_executor is None or _fan_out_executor_pid != os.getpid():
+        _fan_out_executor = ThreadPoolExecutor(max_workers=FirebaseService.FAN_OUT_WORKERS,
+                                               thread_name_prefix='firestore-fan-out')
+        _fan_out_executor_pid = os.getpid()
+    return _fan_out_executor
+
+
+def run_concurrently(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Run independent Firestore calls on the fan-out threads; returns their results in order
+
+    Each call runs in a copy of the caller's context so request-scoped state
+    (flask.g, Firestore metrics) is visible in the worker threads.
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    executor = _get_fan_out_executor()
+    futures = [executor.submit(copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+# Callbacks run after a service writes a document: {collection_name: [callback(collection_name, doc_id)]}
+_change_listeners: Dict[str, List[Callable[[str, str], None]]] = {}
+
+
+def add_change_listener(collection_names: List[str], callback: Callable[[str, str], None]):
+    """
+    Call callback(collection_name, doc_id) whenever a service creates, updates or
+    deletes a document in one of the collections (writes in this process only)
+    """
+    for collection_name in collection_names:
+        _change_listeners.setdefault(collection_name, []).append(callback)
+
+
 class FirebaseService:
     """Base service class for Firestore operations"""
 
+    # Maximum number of document references sent in one batched read
+    MAX_BATCH_GET = 300
+
+    # Upper bound for a single page returned by paginate()
+    MAX_PAGE_SIZE = 100
+
+    # Threads used to run the queries of a fan_out() concurrently
+    FAN_OUT_WORKERS = 8
+
+    # Documents read per request by iter_query()
+    ITER_PAGE_SIZE = 500
+
+    # Attempts per document for bulk writes that fail with a retryable error
+    BULK_MAX_ATTEMPTS = 5
+
+    # gRPC status codes worth retrying: DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED,
+    # ABORTED (contention) and UNAVAILABLE
+    BULK_RETRY_CODES = frozenset({4, 8, 10, 14})
+
+    # Route point reads through the request-scoped loader (see firebase_loader)
+    request_cached = False
+
+    # Serve point reads from the process-wide catalog cache (see firebase_cache)
+    catalog_cached = False
+
+    # Filtered + ordered queries this service runs; firestore.indexes.json is
+    # generated from these (scripts/generate_indexes.py)
+    QUERIES: tuple = ()
+
     def __init__(self, collection_name: str):
         self.collection_name = collection_name
-        self.db = get_firestore_db()
-        self.collection = self.db.collection(collection_name)
+
+    @property
+    def db(self):
+        """
+        Firestore client
+
+        Resolved on every access rather than stored, so constructing a service never
+        touches Firebase and always sees the client of the current process.
+        """
+        return get_firestore_db()
+
+    @property
+    def collection(self):
+        """Reference to this service's collection"""
+        return self.db.collection(self.collection_name)
 
     def create(self, data: Dict, doc_id: Optional[str] = None) -> str:
         """
@@ -38,32 +135,265 @@ class FirebaseService:
         data['updated_at'] = firestore.SERVER_TIMESTAMP
 
         self.collection.document(doc_id).set(data)
+        self._invalidate(doc_id)
         return doc_id
 
     def get(self, doc_id: str) -> Optional[Dict]:
         """Get a document by ID"""
-        doc = self.collection.document(doc_id).get()
-        if doc.exists:
-            return {**doc.to_dict(), 'id': doc.id}
+        if not doc_id:
+            return None
+
+        if self.catalog_cached and catalog_cache_active():
+            doc = catalog_cache.get(self.collection_name, doc_id)
+            if doc is not None:
+                return doc
+
+        loader = self._loader()
+        if loader is not None:
+            result = loader.load(self.collection_name, doc_id, self._batch_get)
+        else:
+            doc = self.collection.document(doc_id).get()
+            result = {**doc.to_dict(), 'id': doc.id} if doc.exists else None
+
+        if result is not None and self.catalog_cached and catalog_cache.enabled:
+            catalog_cache.put(self.collection_name, result)
+        return result
+
+    def get_many(self, doc_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Get several documents by ID using batched reads
+
+        Args:
+            doc_ids: Document IDs (duplicates and empty IDs are allowed)
+
+        Returns:
+            List aligned with doc_ids, with None for missing documents
+        """
+        found = self._fetch_many(doc_ids)
+        return [dict(found[doc_id]) if doc_id in found else None for doc_id in doc_ids]
+
+    def get_map(self, doc_ids: List[str]) -> Dict[str, Dict]:
+        """Get several documents by ID as a {doc_id: document} dict (missing IDs are omitted)"""
+        return {doc_id: dict(doc) for doc_id, doc in self._fetch_many(doc_ids).items()}
+
+    def prefetch(self, doc_ids: List[str]):
+        """
+        Queue IDs so the next get() on this service resolves them all in one batched read
+
+        Only has an effect for request-cached services inside a request.
+        """
+        loader = self._loader()
+        if loader is not None:
+            loader.want(self.collection_name, doc_ids)
+
+    def _fetch_many(self, doc_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch distinct documents, through the catalog cache and request loader when enabled"""
+        found = {}
+        doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id]
+
+        if self.catalog_cached and catalog_cache_active():
+            for doc_id in doc_ids:
+                doc = catalog_cache.get(self.collection_name, doc_id)
+                if doc is not None:
+                    found[doc_id] = doc
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id not in found]
+
+        if not doc_ids:
+            return found
+
+        loader = self._loader()
+        if loader is not None:
+            fetched = loader.load_many(self.collection_name, doc_ids, self._batch_get)
+        else:
+            fetched = self._batch_get(doc_ids)
+
+        if self.catalog_cached and catalog_cache.enabled:
+            for doc in fetched.values():
+                catalog_cache.put(self.collection_name, doc)
+
+        found.update(fetched)
+        return found
+
+    def _batch_get(self, doc_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch distinct documents with db.get_all, one RPC per MAX_BATCH_GET ids"""
+        unique_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+
+        found = {}
+        for start in range(0, len(unique_ids), self.MAX_BATCH_GET):
+            refs = [self.collection.document(doc_id) for doc_id in unique_ids[start:start + self.MAX_BATCH_GET]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    found[doc.id] = {**doc.to_dict(), 'id': doc.id}
+
+        return found
+
+    def _get_by_field(self, field: str, value: Any) -> Optional[Dict]:
+        """Get the first document whose field equals value (catalog-cached when enabled)"""
+        if self.catalog_cached and catalog_cache_active():
+            doc = catalog_cache.get_by(self.collection_name, field, value)
+            if doc is not None:
+                return doc
+
+        docs = self.collection.where(filter=FieldFilter(field, '==', value)).limit(1).stream()
+        for doc in docs:
+            result = {**doc.to_dict(), 'id': doc.id}
+            if self.catalog_cached and catalog_cache.enabled:
+                catalog_cache.put_by(self.collection_name, field, value, result)
+            return result
         return None
 
+    def _loader(self):
+        """Request loader for this service, or None when not request-cached"""
+        return get_request_loader() if self.request_cached else None
+
+    @staticmethod
+    def _request_memo(key, compute: Callable[[], Any]) -> Any:
+        """Compute a derived value once per request (every time outside a request)"""
+        loader = get_request_loader()
+        return loader.memo(key, compute) if loader is not None else compute()
+
+    @staticmethod
+    def _forget_request_memo(key):
+        """Drop a value memoized by _request_memo() for the current request"""
+        loader = get_request_loader()
+        if loader is not None:
+            loader.forget_memo(key)
+
+    def _invalidate(self, doc_id: str, notify: bool = True):
+        """
+        Forget cached copies of a document after writing it
+
+        notify=False leaves change listeners alone (for writes that only touch
+        counter fields, which must not re-index or rebuild derived views)
+        """
+        loader = self._loader()
+        if loader is not None:
+            loader.forget(self.collection_name, doc_id)
+
+        if self.catalog_cached:
+            catalog_cache.invalidate(self.collection_name, doc_id)
+
+        if not notify:
+            return
+
+        for callback in _change_listeners.get(self.collection_name, ()):
+            callback(self.collection_name, doc_id)
+
     def update(self, doc_id: str, data: Dict) -> bool:
         """Update a document"""
         data['updated_at'] = firestore.SERVER_TIMESTAMP
         self.collection.document(doc_id).update(data)
+        self._invalidate(doc_id)
         return True
 
     def delete(self, doc_id: str) -> bool:
         """Delete a document"""
         self.collection.document(doc_id).delete()
+        self._invalidate(doc_id)
         return True
 
-    def get_all(self, limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Dict]:
-        """Get all documents in collection"""
-        query = self.collection
+    def bulk_create(self, docs: List[Dict], doc_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Create many documents with Firestore's BulkWriter
+
+        Args:
+            docs: Document data (timestamps are added as in create())
+            doc_ids: Optional IDs aligned with docs (UUIDs are generated otherwise)
+
+        Returns:
+            Result summary (see _bulk_write), with the document IDs under 'ids'
+        """
+        if doc_ids is None:
+            doc_ids = [str(uuid.uuid4()) for _ in docs]
+
+        operations = []
+        for doc_id, data in zip(doc_ids, docs):
+            data['created_at'] = firestore.SERVER_TIMESTAMP
+            data['updated_at'] = firestore.SERVER_TIMESTAMP
+            operations.append(('set', doc_id, data))
+
+        return {**self._bulk_write(operations), 'ids': list(doc_ids)}
+
+    def bulk_update(self, updates: Dict[str, Dict]) -> Dict[str, Any]:
+        """
+        Update many documents with Firestore's BulkWriter
+
+        Args:
+            updates: {doc_id: fields to update} (updated_at is added)
+
+        Returns:
+            Result summary (see _bulk_write)
+        """
+        operations = [
+            ('update', doc_id, {**data, 'updated_at': firestore.SERVER_TIMESTAMP})
+            for doc_id, data in updates.items()
+        ]
+        return self._bulk_write(operations)
+
+    def bulk_delete(self, doc_ids: List[str]) -> Dict[str, Any]:
+        """Delete many documents with Firestore's BulkWriter (returns a result summary)"""
+        return self._bulk_write([('delete', doc_id, None) for doc_id in dict.fromkeys(doc_ids)])
+
+    def _bulk_write(self, operations: List[tuple], invalidate: bool = True) -> Dict[str, Any]:
+        """
+        Run (method, doc_id, data) operations through a BulkWriter
+
+        BulkWriter batches writes and throttles itself; writes failing with a
+        retryable error (e.g. contention) are retried up to BULK_MAX_ATTEMPTS times.
+        invalidate=False skips cache invalidation and change listeners (for
+        fields nothing caches, such as counters).
+
+        Returns:
+            {'written': int, 'failed': int, 'errors': [{'id': doc_id, 'code': int, 'error': str}]}
+        """
+        summary = {'written': 0, 'failed': 0, 'errors': []}
+        if not operations:
+            return summary
+
+        lock = threading.Lock()
+
+        def on_result(reference, result, bulk_writer):
+            with lock:
+                summary['written'] += 1
+
+        def on_error(failure, bulk_writer):
+            retry = failure.code in self.BULK_RETRY_CODES and failure.attempts < self.BULK_MAX_ATTEMPTS
+            if not retry:
+                with lock:
+                    summary['failed'] += 1
+                    summary['errors'].append({
+                        'id': failure.operation.reference.id,
+                        'code': failure.code,
+                        'error': failure.message
+                    })
+            return retry
+
+        bulk_writer = self.db.bulk_writer()
+        bulk_writer.on_write_result(on_result)
+        bulk_writer.on_write_error(on_error)
+
+        for method, doc_id, data in operations:
+            reference = self.collection.document(doc_id)
+            if method == 'delete':
+                bulk_writer.delete(reference)
+            else:
+                getattr(bulk_writer, method)(reference, data)
+
+        bulk_writer.close()
+
+        if invalidate:
+            for _, doc_id, _ in operations:
+                self._invalidate(doc_id)
+
+        return summary
+
+    def get_all(self, limit: Optional[int] = None, order_by: Optional[str] = None,
+                direction: str = 'ASCENDING', fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get all documents in collection (only `fields` when given)"""
+        query = self._select(self.collection, fields)
 
         if order_by:
-            query = query.order_by(order_by)
+            query = query.order_by(order_by, direction=direction)
 
         if limit:
             query = query.limit(limit)
@@ -71,26 +401,27 @@ class FirebaseService:
         docs = query.stream()
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
-    def query(self, filters: List[tuple], limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Dict]:
+    def query(self, filters: List[tuple], limit: Optional[int] = None, order_by: Optional[str] = None,
+              direction: str = 'ASCENDING', fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Query documents with filters
 
         Args:
             filters: List of (field, operator, value) tuples
                     e.g., [('status', '==', 'active'), ('price', '>=', 100)]
+                    Composite filters (firestore Or/And) may be passed as-is.
             limit: Maximum number of results
             order_by: Field to order by
+            direction: 'ASCENDING' or 'DESCENDING'
+            fields: Only return these fields (Firestore projection); 'id' is always set
 
         Returns:
             List of matching documents
         """
-        query = self.collection
-
-        for field, operator, value in filters:
-            query = query.where(filter=FieldFilter(field, operator, value))
+        query = self._select(self._apply_filters(self.collection, filters), fields)
 
         if order_by:
-            query = query.order_by(order_by)
+            query = query.order_by(order_by, direction=direction)
 
         if limit:
             query = query.limit(limit)
@@ -98,19 +429,281 @@ class FirebaseService:
         docs = query.stream()
         return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
-    def count(self, filters: Optional[List[tuple]] = None) -> int:
-        """Count documents (with optional filters)"""
-        if filters:
-            docs = self.query(filters)
-            return len(docs)
+    def last_updated(self, filters: List[tuple]) -> Optional[Any]:
+        """
+        updated_at of the most recently written matching document (None if there are none)
+
+        A single-document projected query, cheap enough to validate a cached page
+        against (see http_cache.py). Needs an index on the filters plus updated_at.
+        """
+        docs = self.query(filters, limit=1, order_by='updated_at', direction='DESCENDING', fields=['updated_at'])
+        return docs[0].get('updated_at') if docs else None
+
+    def iter_query(self, filters: Optional[List[tuple]] = None, order_by: Optional[str] = None,
+                   direction: str = 'ASCENDING', page_size: Optional[int] = None,
+                   limit: Optional[int] = None, fields: Optional[List[str]] = None,
+                   predicate: Optional[Callable[[Dict], bool]] = None) -> Iterator[Dict]:
+        """
+        Yield matching documents lazily, one page_size read at a time
+
+        Memory stays bounded by the page size however large the collection is, and
+        reading stops as soon as `limit` documents have passed the predicate.
+
+        Args:
+            filters: Same as query()
+            order_by: Field to order by (document ID is used as tie-breaker)
+            direction: 'ASCENDING' or 'DESCENDING'
+            page_size: Documents per read (default ITER_PAGE_SIZE)
+            limit: Stop after yielding this many documents
+            fields: Same as query() (order_by is always included)
+            predicate: Client-side filter; only documents it accepts are yielded and counted
+
+        Yields:
+            Documents in query order
+        """
+        page_size = page_size or self.ITER_PAGE_SIZE
+        if fields and order_by:
+            fields = list(dict.fromkeys([*fields, order_by]))
+
+        query = self._select(self._apply_filters(self.collection, filters or []), fields)
+        if order_by:
+            query = query.order_by(order_by, direction=direction).order_by('__name__', direction=direction)
         else:
-            docs = self.collection.stream()
-            return sum(1 for _ in docs)
+            query = query.order_by('__name__')
+
+        yielded = 0
+        last_doc = None
+        while True:
+            page = query.limit(page_size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+
+            docs = list(page.stream())
+            for doc in docs:
+                item = {**doc.to_dict(), 'id': doc.id}
+                if predicate is not None and not predicate(item):
+                    continue
+
+                yield item
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
+
+            if len(docs) < page_size:
+                return
+            last_doc = docs[-1]
+
+    def fan_out(self, filter_sets: List[List[tuple]], order_by: Optional[str] = None,
+                descending: bool = False, limit: Optional[int] = None,
+                fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Run several queries concurrently and merge their results (an OR across queries)
+
+        Latency is bounded by the slowest query instead of the sum of all of them.
+
+        Args:
+            filter_sets: One filter list (as for query()) per query
+            order_by: Field to sort the merged results by (documents without it sort last
+                      when descending, first otherwise)
+            descending: Sort newest/largest first
+            limit: Maximum number of merged results
+            fields: Same as query()
+
+        Returns:
+            Matching documents, each included once
+        """
+        results = run_concurrently(*[partial(self.query, filters, fields=fields) for filters in filter_sets])
+
+        # De-duplicate by document ID, keeping the first copy seen
+        merged = {}
+        for docs in results:
+            for doc in docs:
+                merged.setdefault(doc['id'], doc)
+        documents = list(merged.values())
+
+        if order_by:
+            documents.sort(key=lambda doc: self._sort_key(doc.get(order_by)), reverse=descending)
+
+        return documents[:limit] if limit else documents
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float,
+                      filters: Optional[List[tuple]] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Documents located within radius_km of a point, nearest first
+
+        Runs one geohash range query per cell around the point (at most nine,
+        concurrently) and keeps the candidates whose exact distance is within
+        the radius, so only documents near the point are read.
+
+        Args:
+            latitude, longitude: Centre point
+            radius_km: Search radius in kilometres
+            filters: Extra equality filters (as for query()); declare a QuerySpec
+                     with these fields and ('geohash', 'ASCENDING') for the index
+            limit: Maximum number of results
+
+        Returns:
+            Matching documents with 'distance_km' set
+
+        Raises:
+            ValueError: if radius_km is not a finite, positive number
+        """
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            # nan would otherwise become a full collection scan
+            raise ValueError('Radius must be a positive number of kilometres')
+
+        filter_sets = [
+            [*(filters or []), ('geohash', '>=', start), ('geohash', '<', end)]
+            for start, end in query_bounds(latitude, longitude, radius_km)
+        ]
+
+        results = []
+        for doc in self.fan_out(filter_sets):
+            if doc.get('latitude') is None or doc.get('longitude') is None:
+                continue
+            distance = haversine_km(latitude, longitude, doc['latitude'], doc['longitude'])
+            if distance <= radius_km:
+                results.append({**doc, 'distance_km': round(distance, 2)})
+
+        results.sort(key=lambda doc: doc['distance_km'])
+        return results[:limit] if limit else results
+
+    def set_location(self, doc_id: str, latitude: float, longitude: float) -> bool:
+        """
+        Store a document's coordinates and geohash (used by within_radius())
+
+        Raises:
+            ValueError: if the coordinates are invalid
+        """
+        return self.update(doc_id, geo_fields(latitude, longitude))
+
+    @staticmethod
+    def _sort_key(value: Any) -> tuple:
+        """Sort key that tolerates missing values"""
+        return (0, '') if value is None or value == '' else (1, value)
+
+    def paginate(self, filters: Optional[List[tuple]] = None, order_by: str = 'created_at',
+                 direction: str = 'DESCENDING', page_size: int = 20,
+                 cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Page:
+        """
+        Read one page of documents using order_by + start_after + limit
+
+        Each call reads at most page_size + 1 documents, however large the collection is.
+
+        Args:
+            filters: Same as query()
+            order_by: Field to order by (document ID is used as tie-breaker)
+            direction: 'ASCENDING' or 'DESCENDING'
+            page_size: Number of documents per page (capped at MAX_PAGE_SIZE)
+            cursor: Token returned as next_cursor by the previous page
+            fields: Same as query() (order_by is always included for the cursor)
+
+        Returns:
+            Page dict with items, next_cursor (None on the last page) and has_more
+
+        Raises:
+            InvalidCursor: if cursor is malformed
+        """
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+        if fields:
+            fields = list(dict.fromkeys([*fields, order_by]))
+
+        query = self._select(self._apply_filters(self.collection, filters or []), fields)
+        query = query.order_by(order_by, direction=direction).order_by('__name__', direction=direction)
+
+        if cursor:
+            query = query.start_after(decode_cursor(cursor, order_by))
+
+        # Read one extra document to learn whether another page exists
+        docs = list(query.limit(page_size + 1).stream())
+        has_more = len(docs) > page_size
+        docs = docs[:page_size]
+
+        items = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor(order_by, last.get(order_by), last['id'])
+
+        return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+
+    @staticmethod
+    def _select(query, fields: Optional[List[str]]):
+        """Restrict a query to the given fields (no-op when fields is empty)"""
+        return query.select(list(fields)) if fields else query
+
+    @staticmethod
+    def _apply_filters(query, filters: List):
+        """Apply (field, operator, value) tuples or composite filters to a query"""
+        for condition in filters:
+            if isinstance(condition, tuple):
+                field, operator, value = condition
+                condition = FieldFilter(field, operator, value)
+            query = query.where(filter=condition)
+        return query
+
+    def count(self, filters: Optional[List[tuple]] = None) -> int:
+        """Count documents (with optional filters) using a server-side aggregation"""
+        return self.aggregate(filters)['count']
+
+    def sum(self, field: str, filters: Optional[List[tuple]] = None) -> float:
+        """Sum a numeric field over matching documents (non-numeric values are ignored)"""
+        return self.aggregate(filters, sum_fields=[field])[f'sum_{field}']
+
+    def avg(self, field: str, filters: Optional[List[tuple]] = None) -> Optional[float]:
+        """Average a numeric field over matching documents (None if there are none)"""
+        return self.aggregate(filters, avg_fields=[field])[f'avg_{field}']
+
+    def aggregate(self, filters: Optional[List[tuple]] = None, sum_fields: List[str] = (),
+                  avg_fields: List[str] = ()) -> Dict[str, Any]:
+        """
+        Run count, sums and averages over matching documents in one aggregation query
+
+        Only the aggregate values are transferred, never the documents themselves.
+
+        Args:
+            filters: Same as query()
+            sum_fields: Fields to sum, returned as 'sum_<field>'
+            avg_fields: Fields to average, returned as 'avg_<field>'
+
+        Returns:
+            Dict with 'count' plus one entry per requested sum/avg
+        """
+        query = self._apply_filters(self.collection, filters or [])
+
+        aggregation = query.count(alias='count')
+        for field in sum_fields:
+            aggregation = aggregation.sum(field, alias=f'sum_{field}')
+        for field in avg_fields:
+            aggregation = aggregation.avg(field, alias=f'avg_{field}')
+
+        values = {result.alias: result.value for results in aggregation.get() for result in results}
+
+        totals = {'count': int(values.get('count') or 0)}
+        for field in sum_fields:
+            totals[f'sum_{field}'] = float(values.get(f'sum_{field}') or 0)
+        for field in avg_fields:
+            value = values.get(f'avg_{field}')
+            totals[f'avg_{field}'] = float(value) if value is not None else None
+        return totals
 
 
 class ProductService(FirebaseService):
     """Product-specific operations"""
 
+    catalog_cached = True
+
+    QUERIES = (
+        QuerySpec('seller_products', ('seller_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('category_products', ('category',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('active_products', ('status',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('active_category_products', ('status', 'category'), (('created_at', 'DESCENDING'),)),
+        QuerySpec('listed_products', ('is_active',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('listed_category_products', ('is_active', 'category'), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_products_last_updated', ('seller_id',), (('updated_at', 'DESCENDING'),)),
+    )
+
     def __init__(self):
         super().__init__('products')
 
@@ -121,77 +714,81 @@ class ProductService(FirebaseService):
         if category:
             filters.append(('category', '==', category))
 
-        # Query without ordering to avoid composite index requirement
-        products = self.query(filters)
-        # Sort in Python instead of Firestore
-        products.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return products[:limit] if limit else products
+        return self.query(filters, limit=limit or None, order_by='created_at', direction='DESCENDING')
 
-    def search_products(self, search_term: str, limit: int = 20) -> List[Dict]:
-        """
-        Search products by name
-        Note: Firestore doesn't support full-text search natively.
-        For production, use Algolia or Elasticsearch.
+    def get_active_products_page(self, category: Optional[str] = None, page_size: int = 20,
+                                 cursor: Optional[str] = None) -> Page:
+        """Get one page of listed products (is_active), newest first"""
+        filters = [('is_active', '==', True)]
+
+        if category:
+            filters.append(('category', '==', category))
+
+        return self.paginate(filters, order_by='created_at', direction='DESCENDING',
+                             page_size=page_size, cursor=cursor)
+
+    def search_products(self, search_term: str, limit: Optional[int] = 20) -> List[Dict]:
         """
-        # This is a basic implementation - prefix search only
-        search_term_lower = search_term.lower()
+        Full-text search over listed products, best match first
 
-        all_products = self.get_all()
-        results = [
-            p for p in all_products
-            if search_term_lower in p.get('name', '').lower() or
-               search_term_lower in p.get('description', '').lower()
-        ]
+        Every word must match the name, description, category or seller name
+        (case, accents and word endings are ignored). Served from the worker's
+        search index (see search/products.py), not by scanning the collection.
+        """
+        from search import product_search
 
-        return results[:limit]
+        return product_search.search_products(search_term, limit=limit)
 
-    def get_seller_products(self, seller_id: str) -> List[Dict]:
-        """Get all products for a seller"""
-        # Query without ordering to avoid composite index requirement
-        products = self.query([('seller_id', '==', seller_id)])
-        # Sort in Python instead of Firestore
-        products.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return products
+    def get_seller_products(self, seller_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get products for a seller, newest first"""
+        return self.query([('seller_id', '==', seller_id)], limit=limit,
+                          order_by='created_at', direction='DESCENDING')
 
     def increment_views(self, product_id: str):
-        """Increment product view count"""
-        doc_ref = self.collection.document(product_id)
-        doc_ref.update({
-            'view_count': firestore.Increment(1)
-        })
+        """
+        Increment product view count
+
+        Buffered in memory and written in batches every COUNTER_FLUSH_INTERVAL
+        seconds (see firebase_counters), so page views do not wait on a write.
+        Does not invalidate the catalog cache: a view count that lags by up to
+        CATALOG_CACHE_TTL seconds is fine, and evicting on every view would defeat the cache.
+        """
+        from firebase_counters import view_counts
+        view_counts.add(product_id)
 
 
 class OrderService(FirebaseService):
     """Order-specific operations"""
 
+    QUERIES = (
+        QuerySpec('user_orders', ('user_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('user_orders_by_status', ('user_id', 'status'), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_orders', ('seller_id',), (('created_at', 'DESCENDING'),)),
+        QuerySpec('seller_orders_by_status', ('seller_id', 'status'), (('created_at', 'DESCENDING'),)),
+    )
+
     def __init__(self):
         super().__init__('orders')
 
-    def get_user_orders(self, user_id: str, status: Optional[str] = None) -> List[Dict]:
-        """Get orders for a user"""
+    def get_user_orders(self, user_id: str, status: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[Dict]:
+        """Get orders for a user, newest first"""
         filters = [('user_id', '==', user_id)]
 
         if status:
             filters.append(('status', '==', status))
 
-        # Query without ordering to avoid composite index requirement
-        orders = self.query(filters)
-        # Sort in Python instead of Firestore
-        orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return orders
+        return self.query(filters, limit=limit, order_by='created_at', direction='DESCENDING')
 
-    def get_seller_orders(self, seller_id: str, status: Optional[str] = None) -> List[Dict]:
-        """Get orders for a seller"""
+    def get_seller_orders(self, seller_id: str, status: Optional[str] = None,
+                          limit: Optional[int] = None) -> List[Dict]:
+        """Get orders for a seller, newest first"""
         filters = [('seller_id', '==', seller_id)]
 
         if status:
             filters.append(('status', '==', status))
 
-        # Query without ordering to avoid composite index requirement
-        orders = self.query(filters)
-        # Sort in Python instead of Firestore
-        orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return orders
+        return self.query(filters, limit=limit, order_by='created_at', direction='DESCENDING')
 
     def update_order_status(self, order_id: str, new_status: str, updated_by: str) -> bool:
         """Update order status with history tracking"""
@@ -218,6 +815,8 @@ class OrderService(FirebaseService):
 class UserService(FirebaseService):
     """User-specific operations"""
 
+    request_cached = True
+
     def __init__(self):
         super().__init__('users')
 
@@ -246,10 +845,16 @@ class UserService(FirebaseService):
                 'updated_at': firestore.SERVER_TIMESTAMP
             })
 
+        self._invalidate(user_id)
+
 
 class DeliveryService(FirebaseService):
     """Delivery tracking operations"""
 
+    QUERIES = (
+        QuerySpec('active_deliveries', ('deliverer_id', 'status'), (('created_at', 'ASCENDING'),)),
+    )
+
     def __init__(self):
         super().__init__('deliveries')
 
@@ -279,6 +884,11 @@ class DeliveryService(FirebaseService):
 class NotificationService(FirebaseService):
     """Notification operations"""
 
+    QUERIES = (
+        QuerySpec('user_notifications', ('user_id',), (('created_at', 'ASCENDING'),)),
+        QuerySpec('user_unread_notifications', ('user_id', 'read'), (('created_at', 'ASCENDING'),)),
+    )
+
     def __init__(self):
         super().__init__('notifications')
 
@@ -312,19 +922,16 @@ class NotificationService(FirebaseService):
         """Mark all user notifications as read"""
         notifications = self.get_user_notifications(user_id, unread_only=True)
 
-        batch = self.db.batch()
-        for notif in notifications:
-            doc_ref = self.collection.document(notif['id'])
-            batch.update(doc_ref, {'read': True, 'updated_at': firestore.SERVER_TIMESTAMP})
-
-        batch.commit()
+        return self.bulk_update({notif['id']: {'read': True} for notif in notifications})
 
 
 class StorageService:
     """Firebase Storage operations"""
 
-    def __init__(self):
-        self.bucket = get_storage_bucket()
+    @property
+    def bucket(self):
+        """Storage bucket (resolved on use, like FirebaseService.db)"""
+        return get_storage_bucket()
 
     def upload_file(self, file_path: str, destination_path: str, content_type: Optional[str] = None) -> str:
         """
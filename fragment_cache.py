@@ -0,0 +1,98 @@
+"""
+Rendered fragment cache for SparzaFI
+Per-entity template blocks (feed seller cards, product tiles) are rendered once
+per version of their documents and the HTML reused by every request, so a feed
+render is mostly string joins instead of Jinja work for every card.
+
+Fragments must not contain per-user state: pages render them in the anonymous
+state and apply the viewer's follows/likes separately.
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+from cachetools import LRUCache
+from flask import current_app
+from markupsafe import Markup
+
+from config import Config
+
+
+def fragment_version(*docs: Dict) -> Tuple:
+    """Version of a fragment built from documents: each one's (id, updated_at)"""
+    return tuple((doc.get('id'), str(doc.get('updated_at'))) for doc in docs)
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered HTML keyed by (fragment, entity id, version)
+
+    A new version of an entity gets a new key, so nothing is invalidated
+    explicitly; old versions fall out of the LRU. Each worker process has its
+    own cache.
+    """
+
+    def __init__(self, maxsize: int, enabled: bool = True):
+        self.enabled = enabled
+        self._fragments = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> Markup:
+        """Cached HTML for key, rendering (outside the lock) on a miss"""
+        if not self.enabled:
+            return Markup(render())
+
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._hits += 1
+                return html
+            self._misses += 1
+
+        html = Markup(render())
+        with self._lock:
+            self._fragments[key] = html
+        return html
+
+    def clear(self):
+        """Drop everything and reset statistics"""
+        with self._lock:
+            self._fragments.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'size': len(self._fragments),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / total, 3) if total else 0.0,
+            }
+
+
+fragment_cache = FragmentCache(maxsize=Config.FRAGMENT_CACHE_MAXSIZE, enabled=Config.FRAGMENT_CACHE_ENABLED)
+
+
+def cached_fragment(template_name: str, entity: Dict, related: Iterable[Dict] = (),
+                    version_extra: Tuple = (), **context) -> Markup:
+    """
+    Render a partial template for an entity, reusing the HTML while the entity
+    and its related documents keep the same updated_at (template global)
+
+    Values the partial shows that are written without touching updated_at
+    (follower and like counters) must be passed as version_extra.
+
+    The partial only sees **context (no request, session or current_user), which
+    keeps viewer-specific state out of the shared HTML.
+
+    Usage: {{ cached_fragment('seller_card.html', seller, seller.videos,
+                              version_extra=(seller.follower_count,), seller=seller) }}
+    """
+    key = (template_name, entity.get('id'), fragment_version(entity, *related), tuple(version_extra))
+    return fragment_cache.get_or_render(
+        key, lambda: current_app.jinja_env.get_template(template_name).render(**context)
+    )
@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for SparzaFI
+
+The app is preloaded in the master so workers share its imported code
+(copy-on-write) and start instantly. Firestore/Storage clients hold gRPC and HTTP
+connections that must not cross fork(), so each worker drops anything it
+inherited and creates its own clients on first use.
+
+Environment:
+    PORT              Port to bind (default 5000)
+    WEB_CONCURRENCY   Worker processes (default 4)
+    GUNICORN_THREADS  Threads per worker (default 1)
+    GUNICORN_TIMEOUT  Worker timeout in seconds (default 120)
+    GUNICORN_PRELOAD  'False' to import the app in each worker instead
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def post_fork(server, worker):
+    """Give the new worker its own Firestore/Storage clients"""
+    from firebase_config import FirebaseConfig
+
+    FirebaseConfig.reset_after_fork()
+    server.log.info("Worker %s: Firebase clients reset after fork", worker.pid)
+
+
+def worker_exit(server, worker):
+    """Write buffered counter increments before the worker goes away"""
+    from firebase_counters import flush_counters
+
+    flush_counters()
@@ -0,0 +1,90 @@
+"""
+Conditional GET support for SparzaFI
+Read-heavy pages and APIs build a Validator from the updated_at of the
+documents they show, check it against the request's If-None-Match /
+If-Modified-Since before doing the expensive work, and answer 304 Not Modified
+when the client's copy is still current.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Response, request, session
+
+from config import Config
+
+# Public JSON: shared caches may store it, but must revalidate on every use
+PUBLIC = 'public, no-cache'
+
+# HTML pages carry the viewer's header (user, balance, cart): browser cache only
+PRIVATE = 'private, no-cache'
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class Validator:
+    """
+    ETag and Last-Modified of a response, derived from the documents it is built from
+
+    Args:
+        docs: Documents shown (None entries are allowed, e.g. a missing seller)
+        *extra: Anything else the body depends on (query results without
+                updated_at, facet counts, the viewer's follow state, ...)
+        private: The body is rendered for the current viewer; the session user
+                 and cart become part of the ETag and Last-Modified is not sent
+                 (it cannot tell that a different user is logged in)
+
+    Documents are versioned by (id, updated_at), so fields written without
+    touching updated_at (e.g. view_count) do not change the validator.
+    """
+
+    def __init__(self, docs: Iterable[Optional[Dict]], *extra, private: bool = False):
+        docs = [doc for doc in docs if doc is not None]
+        self.private = private
+
+        parts = [[doc.get('id'), str(doc.get('updated_at'))] for doc in docs]
+        parts.append(list(extra))
+        if private:
+            parts.append([session.get('user'), session.get('cart')])
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        self.etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+        updated = [_as_utc(doc.get('updated_at')) for doc in docs]
+        updated = [value for value in updated if value is not None]
+        self.last_modified = None if private or not updated else max(updated).replace(microsecond=0)
+
+    def is_fresh(self) -> bool:
+        """Whether the client already has this version (If-None-Match wins over If-Modified-Since)"""
+        if not Config.CONDITIONAL_GET_ENABLED or request.method not in ('GET', 'HEAD'):
+            return False
+        if self.private and session.get('_flashes'):
+            # Pending flash messages must be rendered
+            return False
+
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        if self.last_modified is not None and request.if_modified_since is not None:
+            return self.last_modified <= _as_utc(request.if_modified_since)
+        return False
+
+    def not_modified(self) -> Response:
+        """Empty 304 response carrying the validators"""
+        return self.apply(Response(status=304))
+
+    def apply(self, response: Response) -> Response:
+        """Set ETag, Last-Modified and Cache-Control on a response"""
+        if not Config.CONDITIONAL_GET_ENABLED:
+            return response
+
+        # Weak: equal validators mean equivalent, not byte-identical, bodies
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = PRIVATE if self.private else PUBLIC
+        return response
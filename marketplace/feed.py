@@ -0,0 +1,226 @@
+"""
+Materialized marketplace feed
+The feed (ranked sellers with their top products and videos) is built from three
+collection queries and stored in the feed_snapshots collection, so rendering
+/marketplace/ costs one query, or nothing while the worker's in-memory copy is fresh.
+
+The snapshot is rebuilt when it is older than FEED_SNAPSHOT_TTL, or after a
+seller, product or video is written through the services in this process. Those
+rebuilds run in the background, at most one at a time and no more often than
+every FEED_REBUILD_INTERVAL seconds, while requests keep getting the current copy;
+only a worker with nothing to serve builds inline. scripts/rebuild_feed.py
+rebuilds it on a schedule.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import Config
+from firebase_db import seller_service, video_service, get_product_service
+from firebase_service import FirebaseService, add_change_listener
+
+
+SNAPSHOT_COLLECTION = 'feed_snapshots'
+FEED_NAME = 'marketplace'
+
+# Products shown per seller
+PRODUCTS_PER_SELLER = 6
+
+# Sellers stored per snapshot document (keeps each well under Firestore's 1 MiB limit)
+SELLERS_PER_CHUNK = 25
+
+VIDEO_TYPE_ORDER = {'intro': 1, 'detailed': 2, 'conclusion': 3}
+
+# Product fields read to rank and store a seller's top products
+PRODUCT_FIELDS = ['seller_id', 'is_active', 'name', 'price', 'images', 'category', 'total_sales', 'created_at']
+
+logger = logging.getLogger(__name__)
+
+
+def _sort_key(value):
+    """Sort key that tolerates missing values"""
+    return FirebaseService._sort_key(value)
+
+
+def build_feed() -> List[Dict]:
+    """
+    Compute the ranked feed: sellers with active products, each with its top
+    products (by sales, then newest) and active videos (intro, detailed, conclusion)
+    """
+    sellers = seller_service.get_all_sellers(order_by='created_at')
+
+    products_by_seller: Dict[str, List[Dict]] = {}
+    for product in get_product_service().get_all(fields=PRODUCT_FIELDS):
+        if product.get('is_active', True) and product.get('seller_id'):
+            products_by_seller.setdefault(product['seller_id'], []).append(product)
+
+    videos_by_seller: Dict[str, List[Dict]] = {}
+    for video in video_service.query([('is_active', '==', True)]):
+        videos_by_seller.setdefault(video.get('seller_id'), []).append(video)
+
+    feed = []
+    for seller in sellers:
+        products = products_by_seller.get(seller['id'])
+        if not products:
+            continue
+
+        products.sort(key=lambda p: (p.get('total_sales', 0), _sort_key(p.get('created_at'))), reverse=True)
+        videos = sorted(videos_by_seller.get(seller['id'], []),
+                        key=lambda v: VIDEO_TYPE_ORDER.get(v.get('video_type', 'detailed'), 2))
+
+        feed.append({**seller, 'products': products[:PRODUCTS_PER_SELLER], 'videos': videos})
+
+    # Subscribed sellers first, then by rating and newest
+    feed.sort(
+        key=lambda s: (s.get('is_subscribed', False), s.get('avg_rating', 0), _sort_key(s.get('created_at'))),
+        reverse=True
+    )
+    return feed
+
+
+class FeedSnapshot:
+    """
+    Per-worker copy of the stored feed snapshot
+
+    Args:
+        ttl: Seconds before the copy is refreshed
+        rebuild_interval: Minimum seconds between background rebuilds (debounces
+                          bursts of writes)
+    """
+
+    def __init__(self, ttl: float, rebuild_interval: float = 0):
+        self.ttl = ttl
+        self.rebuild_interval = rebuild_interval
+        self._sellers: Optional[List[Dict]] = None
+        self._built_at: Optional[datetime] = None
+        self._stale = False
+        self._lock = threading.Lock()
+        # Held while building, so a worker runs one rebuild at a time
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._rebuild_started = float('-inf')
+        self._store = FirebaseService(SNAPSHOT_COLLECTION)
+
+    def get(self) -> List[Dict]:
+        """Ranked feed sellers (treat as read-only, they are shared between requests)"""
+        with self._lock:
+            if self._fresh():
+                return self._sellers
+
+            rebuilding = self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+            if not self._stale and not rebuilding:
+                # Another worker may have stored a newer snapshot
+                self._load()
+                if self._fresh():
+                    return self._sellers
+
+            if self._sellers is not None:
+                # Serve the current copy while it is rebuilt
+                self._rebuild_in_background()
+                return self._sellers
+
+        # Nothing to serve yet: build now (concurrent first requests wait for one build)
+        with self._rebuild_lock:
+            if self._sellers is None:
+                self._rebuild()
+        return self._sellers
+
+    def rebuild(self) -> int:
+        """Rebuild and store the snapshot now; returns the number of sellers"""
+        with self._rebuild_lock:
+            self._rebuild()
+        return len(self._sellers)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for a background rebuild in progress"""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def mark_stale(self, *args):
+        """Rebuild on next use (registered as a seller/product/video change listener)"""
+        self._stale = True
+
+    def _rebuild_in_background(self):
+        """Start a rebuild thread unless one is running or one started too recently (under _lock)"""
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return
+        if self._rebuild_lock.locked():
+            # An explicit rebuild() is running
+            return
+        if time.monotonic() - self._rebuild_started < self.rebuild_interval:
+            return
+
+        self._rebuild_started = time.monotonic()
+        self._rebuild_thread = threading.Thread(target=self._rebuild_quietly, name='feed-rebuild', daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild_quietly(self):
+        try:
+            with self._rebuild_lock:
+                self._rebuild()
+        except Exception:
+            # The current copy keeps being served; the next request tries again
+            logger.exception("Feed rebuild failed")
+
+    def _fresh(self) -> bool:
+        if self._sellers is None or self._stale:
+            return False
+        age = (datetime.now(timezone.utc) - self._built_at).total_seconds()
+        return age < self.ttl
+
+    def _load(self):
+        """Read the stored snapshot (one query); ignored if incomplete"""
+        chunks = self._store.query([('feed', '==', FEED_NAME)])
+        if not chunks:
+            return
+
+        built_at = chunks[0].get('built_at')
+        complete = (
+            len(chunks) == chunks[0].get('chunk_count')
+            and all(chunk.get('built_at') == built_at for chunk in chunks)
+        )
+        if not complete or not isinstance(built_at, datetime):
+            return
+
+        chunks.sort(key=lambda chunk: chunk['chunk'])
+        self._sellers = [seller for chunk in chunks for seller in chunk.get('sellers', [])]
+        self._built_at = built_at if built_at.tzinfo else built_at.replace(tzinfo=timezone.utc)
+
+    def _rebuild(self):
+        """Build the feed and replace the stored snapshot in one atomic batch (under _rebuild_lock)"""
+        # Cleared first so that a write made while building marks it stale again
+        self._stale = False
+        self._rebuild_started = time.monotonic()
+        sellers = build_feed()
+        built_at = datetime.now(timezone.utc)
+
+        chunks = [sellers[i:i + SELLERS_PER_CHUNK] for i in range(0, len(sellers), SELLERS_PER_CHUNK)] or [[]]
+        existing = {doc['id'] for doc in self._store.query([('feed', '==', FEED_NAME)], fields=['chunk'])}
+
+        batch = self._store.db.batch()
+        written = set()
+        for number, chunk in enumerate(chunks):
+            doc_id = f"{FEED_NAME}_{number}"
+            written.add(doc_id)
+            batch.set(self._store.collection.document(doc_id), {
+                'feed': FEED_NAME,
+                'chunk': number,
+                'chunk_count': len(chunks),
+                'built_at': built_at,
+                'sellers': chunk,
+            })
+        for doc_id in existing - written:
+            batch.delete(self._store.collection.document(doc_id))
+        batch.commit()
+
+        with self._lock:
+            self._sellers = sellers
+            self._built_at = built_at
+
+
+feed_snapshot = FeedSnapshot(ttl=Config.FEED_SNAPSHOT_TTL, rebuild_interval=Config.FEED_REBUILD_INTERVAL)
+add_change_listener(['sellers', 'products', 'videos'], feed_snapshot.mark_stale)
@@ -0,0 +1,74 @@
+"""
+Product detail bundle
+Everything the product page (and the mobile product screen) shows, loaded in
+a fixed number of Firestore round trips however many reviews there are:
+
+1. the product (often served from the catalog cache)
+2. its seller and the seller's latest reviews, concurrently
+3. every reviewer, in one batched read (only when asked for)
+"""
+
+from functools import partial
+from typing import Dict, Iterable, List, Optional
+
+from firebase_db import seller_service, review_service, get_product_service, get_user_service
+from firebase_service import run_concurrently
+
+# Related data a bundle can include (the ?expand= values of the product API)
+EXPANSIONS = ('seller', 'reviews')
+
+# Reviews included per product
+REVIEWS_PER_PRODUCT = 5
+
+
+def parse_expand(value: Optional[str], default: Iterable[str] = ('seller',)) -> frozenset:
+    """'seller,reviews' -> frozenset of known expansions (default when absent)"""
+    if value is None:
+        return frozenset(default)
+    return frozenset(part.strip() for part in value.split(',')) & frozenset(EXPANSIONS)
+
+
+class ProductBundle:
+    """A listed product with its seller and reviews"""
+
+    def __init__(self, product: Dict, seller: Optional[Dict], reviews: Optional[List[Dict]]):
+        self.product = product
+        self.seller = seller
+        self.reviews = reviews
+        self._reviewers: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def load(cls, product_id: str, expand: Iterable[str] = EXPANSIONS,
+             review_limit: int = REVIEWS_PER_PRODUCT) -> Optional['ProductBundle']:
+        """
+        Load a product and the related data named in expand
+
+        Returns:
+            The bundle, or None if the product does not exist or is not listed.
+            seller/reviews are None when not expanded (or the product has no seller).
+        """
+        product = get_product_service().get(product_id)
+        if not product or not product.get('is_active', True):
+            return None
+
+        expand = set(expand)
+        seller_id = product.get('seller_id')
+        calls = {}
+        if seller_id and 'seller' in expand:
+            calls['seller'] = partial(seller_service.get, seller_id)
+        if seller_id and 'reviews' in expand:
+            calls['reviews'] = partial(review_service.get_seller_reviews, seller_id, limit=review_limit)
+
+        loaded = dict(zip(calls, run_concurrently(*calls.values())))
+        return cls(product, loaded.get('seller'), loaded.get('reviews'))
+
+    def documents(self) -> List[Dict]:
+        """Every document in the bundle (to version responses built from it)"""
+        return [self.product, *([self.seller] if self.seller else []), *(self.reviews or [])]
+
+    def reviewers(self) -> Dict[str, Dict]:
+        """{user_id: user} for the reviews' authors, read in one batched get on first use"""
+        if self._reviewers is None:
+            user_ids = [review.get('user_id') for review in self.reviews or []]
+            self._reviewers = get_user_service().get_map(user_ids) if user_ids else {}
+        return self._reviewers
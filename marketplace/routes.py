@@ -3,7 +3,7 @@ SparzaFi Marketplace Routes
 Main feed, product browsing, cart, checkout, and order tracking
 """
 
-from flask import render_template, request, redirect, url_for, session, flash, jsonify, current_app
+from flask import render_template, request, redirect, url_for, session, flash, jsonify, current_app, make_response
 from . import marketplace_bp
 from firebase_db import (
     get_db,
@@ -16,8 +16,16 @@ from firebase_db import (
     video_service,
     follow_service,
     like_service,
-    delivery_tracking_service
+    delivery_tracking_service,
+    deliverer_service
 )
+from .feed import feed_snapshot
+from .product_bundle import ProductBundle
+from search import product_search
+from firebase_geo import parse_coordinates, parse_radius
+from http_cache import Validator
+from firebase_service import run_concurrently
+from firebase_counters import seller_followers, seller_likes, video_likes, product_sales
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud import firestore
 from shared.utils import (
@@ -28,65 +36,29 @@ from shared.utils import (
     update_user_token_balance
 )
 from datetime import datetime
+from functools import partial
 import uuid
 
 
 @marketplace_bp.route('/')
 def feed():
     """Main marketplace feed"""
-    db = get_db()
-    product_service = get_product_service()
     current_user = session.get('user')
 
-    # Get all sellers with active products
-    sellers = seller_service.get_all_sellers(order_by='created_at')
-
-    sellers_data = []
-    for seller in sellers:
-        # Check if seller has active products
-        seller_products = product_service.get_seller_products(seller['id'])
-        active_products = [p for p in seller_products if p.get('is_active', True)]
-
-        if not active_products:
-            continue
+    # Ranked sellers with their top products and videos, from the materialized snapshot.
+    # Seller cards are rendered once per seller version and shared (see fragment_cache.py)
+    sellers = feed_snapshot.get()
 
-        seller_dict = seller.copy()
+    # What the current user follows/likes (one query each), applied to the cards client side
+    user_id = current_user['id'] if current_user else None
+    followed = follow_service.get_followed_seller_ids(user_id)
+    liked_sellers = like_service.get_liked_ids(user_id, 'seller')
+    viewer_state = {
+        'following': [seller['id'] for seller in sellers if seller['id'] in followed],
+        'liked': [seller['id'] for seller in sellers if seller['id'] in liked_sellers],
+    }
 
-        # Get seller's videos ordered by type
-        videos = video_service.get_seller_videos(seller['id'])
-        seller_dict['videos'] = videos
-
-        # Get seller's products (limit 6, sorted by total_sales)
-        products = sorted(active_products, key=lambda x: (x.get('total_sales', 0), x.get('created_at', '')), reverse=True)[:6]
-        seller_dict['products'] = products
-
-        # Check if current user is following/liking this seller
-        if current_user:
-            seller_dict['is_following'] = follow_service.is_following(current_user['id'], seller['id'])
-            seller_dict['is_liked'] = like_service.is_seller_liked(current_user['id'], seller['id'])
-
-            # Check which videos user has liked
-            for video in seller_dict['videos']:
-                video['is_liked'] = like_service.is_video_liked(current_user['id'], video['id'])
-        else:
-            seller_dict['is_following'] = False
-            seller_dict['is_liked'] = False
-            for video in seller_dict['videos']:
-                video['is_liked'] = False
-
-        sellers_data.append(seller_dict)
-
-    # Sort sellers by subscription status, rating, and creation date
-    sellers_data.sort(
-        key=lambda s: (
-            s.get('is_subscribed', False),
-            s.get('avg_rating', 0),
-            s.get('created_at', '')
-        ),
-        reverse=True
-    )
-
-    return render_template('index.html', sellers=sellers_data)
+    return render_template('index.html', sellers=sellers, viewer_state=viewer_state)
 
 
 @marketplace_bp.route('/search')
@@ -99,58 +71,52 @@ def search():
     verified_only = request.args.get('verified', type=bool, default=False)
     location = request.args.get('location', '').strip()
 
-    product_service = get_product_service()
-
-    # Get active products
-    filters = [('is_active', '==', True)]
-    if category:
-        filters.append(('category', '==', category))
-
-    products = product_service.query(filters)
-
-    # Apply text search filter (name or description contains query)
-    if query:
-        query_lower = query.lower()
-        products = [
-            p for p in products
-            if query_lower in p.get('name', '').lower() or query_lower in p.get('description', '').lower()
-        ]
-
-    # Apply price filters
-    if min_price is not None:
-        products = [p for p in products if p.get('price', 0) >= min_price]
+    # "Near me": sellers within radius_km of lat/lon, found with geohash range queries
+    nearby_sellers = None
+    if request.args.get('lat') and request.args.get('lon'):
+        try:
+            latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lon'))
+            radius_km = parse_radius(request.args.get('radius_km'), 10, current_app.config['NEARBY_MAX_RADIUS_KM'])
+            nearby_sellers = {s['id']: s for s in seller_service.within_radius(latitude, longitude, radius_km)}
+        except ValueError:
+            pass
+
+    # Filters and facet counts come from the search index (see search/products.py)
+    result = product_search.faceted_search(
+        query,
+        category=category or None,
+        min_price=min_price,
+        max_price=max_price,
+        verified_only=verified_only,
+        location=location or None,
+        seller_ids=nearby_sellers.keys() if nearby_sellers is not None else None,
+        limit=current_app.config['SEARCH_MAX_RESULTS']
+    )
 
-    if max_price is not None:
-        products = [p for p in products if p.get('price', 0) <= max_price]
+    # Get seller information for the returned products in one batched read
+    sellers_by_id = seller_service.get_map([p.get('seller_id') for p in result['products']])
 
-    # Get seller information for each product
     products_list = []
-    for p in products:
+    for p in result['products']:
         product_dict = p.copy()
 
         # Get seller details
-        seller = seller_service.get(p.get('seller_id'))
+        seller = sellers_by_id.get(p.get('seller_id'))
         if seller:
             product_dict['seller_name'] = seller.get('name', '')
             product_dict['handle'] = seller.get('handle', '')
             product_dict['location'] = seller.get('location', '')
             product_dict['verification_status'] = seller.get('verification_status', '')
 
-            # Apply verified filter
-            if verified_only and seller.get('verification_status') != 'verified':
-                continue
-
-            # Apply location filter
-            if location and location.lower() not in seller.get('location', '').lower():
-                continue
+        if nearby_sellers is not None:
+            product_dict['distance_km'] = nearby_sellers.get(p.get('seller_id'), {}).get('distance_km')
 
         products_list.append(product_dict)
 
-    # Sort by rating and sales count
-    products_list.sort(key=lambda p: (p.get('rating', 0), p.get('sales_count', 0)), reverse=True)
-
     return render_template('search.html',
                          products=products_list,
+                         total=result['total'],
+                         facets=result['facets'],
                          query=query,
                          category=category,
                          min_price=min_price,
@@ -172,6 +138,26 @@ def seller_detail(handle):
         flash('Seller not found', 'error')
         return redirect(url_for('marketplace.feed'))
 
+    user_id = current_user['id'] if current_user else None
+    is_following = seller['id'] in follow_service.get_followed_seller_ids(user_id)
+    is_liked = seller['id'] in like_service.get_liked_ids(user_id, 'seller')
+
+    # The seller, the newest product/video write, how many there are (deletes do not
+    # change the newest write), the counters shown (written without touching
+    # updated_at: summed in the same aggregations) and the viewer's follow state
+    # version the page: answer 304 before loading products, videos and reviews
+    by_seller = [('seller_id', '==', seller['id'])]
+    probes = run_concurrently(
+        partial(product_service.last_updated, by_seller),
+        partial(product_service.aggregate, by_seller, sum_fields=['total_sales', 'view_count']),
+        partial(video_service.last_updated, by_seller),
+        partial(video_service.aggregate, by_seller, sum_fields=['likes_count'])
+    )
+    seller_counters = [seller.get(field) for field in ('follower_count', 'likes_count', 'total_sales')]
+    validator = Validator([seller], *probes, seller_counters, is_following, is_liked, private=True)
+    if validator.is_fresh():
+        return validator.not_modified()
+
     seller_dict = seller.copy()
 
     # Get user email
@@ -192,8 +178,9 @@ def seller_detail(handle):
     seller_dict['review_count'] = len(reviews)
 
     # Add user emails to reviews
+    reviewers = user_service.get_map([r.get('user_id') for r in reviews])
     for review in reviews:
-        user = user_service.get(review.get('user_id'))
+        user = reviewers.get(review.get('user_id'))
         if user:
             review['email'] = user.get('email', '')
 
@@ -212,59 +199,55 @@ def seller_detail(handle):
     seller_dict['products'] = active_products
 
     # Check if current user is following/liking
-    if current_user:
-        seller_dict['is_following'] = follow_service.is_following(current_user['id'], seller['id'])
-        seller_dict['is_liked'] = like_service.is_seller_liked(current_user['id'], seller['id'])
-
-        # Check which videos user has liked
-        for video in seller_dict['videos']:
-            video['is_liked'] = like_service.is_video_liked(current_user['id'], video['id'])
-    else:
-        seller_dict['is_following'] = False
-        seller_dict['is_liked'] = False
-        for video in seller_dict['videos']:
-            video['is_liked'] = False
+    liked_videos = like_service.get_liked_ids(user_id, 'video')
+    seller_dict['is_following'] = is_following
+    seller_dict['is_liked'] = is_liked
+    for video in seller_dict['videos']:
+        video['is_liked'] = video['id'] in liked_videos
 
-    return render_template('seller_detail.html', seller=seller_dict)
+    return validator.apply(make_response(render_template('seller_detail.html', seller=seller_dict)))
 
 
 @marketplace_bp.route('/product/<product_id>')
 def product_detail(product_id):
     """Product detail page"""
-    product_service = get_product_service()
-    user_service = get_user_service()
-
-    # Get product
-    product = product_service.get(product_id)
+    # Product, seller and reviews in three round trips (see product_bundle.py)
+    bundle = ProductBundle.load(product_id)
 
-    if not product or not product.get('is_active', True):
+    if bundle is None:
         flash('Product not found', 'error')
         return redirect(url_for('marketplace.feed'))
 
-    product_dict = product.copy()
+    # Increment view count (also for 304s; buffered, so this request's version is unchanged)
+    get_product_service().increment_views(product_id)
+
+    # The product, its seller, the reviews and the counters shown (written without
+    # touching updated_at) version the page: answer 304 before reading the reviewers
+    product_counters = [bundle.product.get(field) for field in ('view_count', 'total_sales')]
+    validator = Validator(bundle.documents(), product_counters, private=True)
+    if validator.is_fresh():
+        return validator.not_modified()
+
+    product_dict = bundle.product.copy()
 
     # Get seller information
-    seller = seller_service.get(product.get('seller_id'))
+    seller = bundle.seller
     if seller:
         product_dict['seller_name'] = seller.get('name', '')
         product_dict['handle'] = seller.get('handle', '')
         product_dict['verification_status'] = seller.get('verification_status', '')
 
-    # Increment view count
-    product_service.increment_views(product_id)
-
-    # Get reviews for seller
-    reviews = review_service.get_seller_reviews(product['seller_id'], limit=5)
-
     # Add user emails to reviews
+    reviewers = bundle.reviewers()
+    reviews = [review.copy() for review in bundle.reviews or []]
     for review in reviews:
-        user = user_service.get(review.get('user_id'))
+        user = reviewers.get(review.get('user_id'))
         if user:
             review['email'] = user.get('email', '')
 
     product_dict['reviews'] = reviews
 
-    return render_template('product_detail.html', product=product_dict)
+    return validator.apply(make_response(render_template('product_detail.html', product=product_dict)))
 
 
 @marketplace_bp.route('/cart')
@@ -489,13 +472,21 @@ def checkout():
             session.pop('promo_code', None)
             session['last_order_id'] = transaction_id
 
-            flash(f'Order placed successfully! Paid {raw_total:.2f} SPZ tokens', 'success')
-            return redirect(url_for('marketplace.order_tracking', order_id=transaction_id))
-
         except Exception as e:
             flash(f'Checkout failed: {str(e)}', 'error')
             return redirect(url_for('marketplace.cart'))
 
+        # Count the sales (sharded: best sellers take many orders at once).
+        # The order is paid for by now: a failed count must not report a failed checkout.
+        try:
+            for product_id, item in cart_items.items():
+                product_sales.increment(product_id, item['quantity'])
+        except Exception:
+            current_app.logger.exception("Recording sales of order %s failed", transaction_id)
+
+        flash(f'Order placed successfully! Paid {raw_total:.2f} SPZ tokens', 'success')
+        return redirect(url_for('marketplace.order_tracking', order_id=transaction_id))
+
     summary = calculate_cart_summary()
     return render_template('checkout.html', summary=summary, user=user)
 
@@ -536,9 +527,10 @@ def order_tracking(order_id):
     tracking = delivery_tracking_service.get_transaction_tracking(order_id)
 
     # Add user emails to tracking
+    creators = user_service.get_map([t.get('created_by') for t in tracking])
     for track in tracking:
         if track.get('created_by'):
-            creator = user_service.get(track['created_by'])
+            creator = creators.get(track['created_by'])
             if creator:
                 track['created_by_email'] = creator.get('email', '')
 
@@ -554,7 +546,6 @@ def order_tracking(order_id):
 @login_required
 def follow_seller(seller_id):
     """Follow/unfollow a seller"""
-    db = get_db()
     user = session.get('user')
 
     is_following = follow_service.is_following(user['id'], seller_id)
@@ -564,20 +555,14 @@ def follow_seller(seller_id):
         follow_service.unfollow(user['id'], seller_id)
 
         # Decrement follower count
-        seller_ref = db.collection('sellers').document(seller_id)
-        seller_ref.update({
-            'follower_count': firestore.Increment(-1)
-        })
+        seller_followers.decrement(seller_id)
         following = False
     else:
         # Follow
         follow_service.follow(user['id'], seller_id)
 
         # Increment follower count
-        seller_ref = db.collection('sellers').document(seller_id)
-        seller_ref.update({
-            'follower_count': firestore.Increment(1)
-        })
+        seller_followers.increment(seller_id)
         following = True
 
     return jsonify({'success': True, 'following': following})
@@ -587,7 +572,6 @@ def follow_seller(seller_id):
 @login_required
 def like_seller(seller_id):
     """Like/unlike a seller"""
-    db = get_db()
     user = session.get('user')
 
     # Check if seller exists
@@ -602,29 +586,20 @@ def like_seller(seller_id):
         like_service.unlike_seller(user['id'], seller_id)
 
         # Decrement likes count
-        seller_ref = db.collection('sellers').document(seller_id)
-        seller_ref.update({
-            'likes_count': firestore.Increment(-1)
-        })
+        seller_likes.decrement(seller_id)
         liked = False
     else:
         # Like
         like_service.like_seller(user['id'], seller_id)
 
         # Increment likes count
-        seller_ref = db.collection('sellers').document(seller_id)
-        seller_ref.update({
-            'likes_count': firestore.Increment(1)
-        })
+        seller_likes.increment(seller_id)
         liked = True
 
-    # Get updated likes count
-    seller_updated = seller_service.get(seller_id)
-
     return jsonify({
         'success': True,
         'liked': liked,
-        'likes_count': seller_updated.get('likes_count', 0)
+        'likes_count': seller_likes.get(seller_id)
     })
 
 
@@ -652,13 +627,10 @@ def like_video(video_id):
         video_service.increment_likes(video_id)
         liked = True
 
-    # Get updated likes count
-    video_updated = video_service.get(video_id)
-
     return jsonify({
         'success': True,
         'liked': liked,
-        'likes_count': video_updated.get('likes_count', 0)
+        'likes_count': video_likes.get(video_id)
     })
 
 
@@ -690,12 +662,7 @@ def transactions_explorer():
             seller_record = seller_service.get_by_user_id(user_id)
             allowed_id = f"seller_{seller_record['id']}" if seller_record else ""
         elif user_type == 'deliverer':
-            # Get deliverer by user_id
-            deliverer_docs = db.collection('deliverers').where(filter=FieldFilter('user_id', '==', user_id)).limit(1).stream()
-            deliverer_record = None
-            for doc in deliverer_docs:
-                deliverer_record = {**doc.to_dict(), 'id': doc.id}
-                break
+            deliverer_record = deliverer_service.get_by_user_id(user_id)
             allowed_id = f"deliverer_{deliverer_record['id']}" if deliverer_record else ""
         else:
             allowed_id = ""
@@ -713,30 +680,22 @@ def transactions_explorer():
     elif current_user:
         # Buyers see their own transactions
         if user_type == 'buyer':
-            trans_docs = db.collection('transactions').where(filter=FieldFilter('user_id', '==', user_id)).limit(50).stream()
-            transactions = [{**doc.to_dict(), 'id': doc.id} for doc in trans_docs]
-            # Sort by timestamp in Python (avoids need for composite index)
-            transactions.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
+            transactions = transaction_service.get_party_transactions('user_id', user_id)
         # Sellers see transactions where they are the seller
         elif user_type == 'seller':
             seller_record = seller_service.get_by_user_id(user_id)
             if seller_record:
-                trans_docs = db.collection('transactions').where(filter=FieldFilter('seller_id', '==', seller_record['id'])).limit(50).stream()
-                transactions = [{**doc.to_dict(), 'id': doc.id} for doc in trans_docs]
-                # Sort by timestamp in Python (avoids need for composite index)
-                transactions.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
+                transactions = transaction_service.get_party_transactions('seller_id', seller_record['id'])
         # Deliverers see transactions where they are the deliverer
         elif user_type == 'deliverer':
-            deliverer_docs = db.collection('deliverers').where(filter=FieldFilter('user_id', '==', user_id)).limit(1).stream()
-            deliverer_record = None
-            for doc in deliverer_docs:
-                deliverer_record = {**doc.to_dict(), 'id': doc.id}
-                break
+            deliverer_record = deliverer_service.get_by_user_id(user_id)
             if deliverer_record:
-                trans_docs = db.collection('transactions').where(filter=FieldFilter('deliverer_id', '==', deliverer_record['id'])).limit(50).stream()
-                transactions = [{**doc.to_dict(), 'id': doc.id} for doc in trans_docs]
-                # Sort by timestamp in Python (avoids need for composite index)
-                transactions.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
+                transactions = transaction_service.get_party_transactions('deliverer_id', deliverer_record['id'])
+
+    # Batch-load related buyers, sellers and deliverers
+    buyers_by_id = user_service.get_map([t.get('user_id') for t in transactions])
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in transactions])
+    deliverers_by_id = deliverer_service.get_map([t.get('deliverer_id') for t in transactions])
 
     # Process transactions and add related data
     transactions_list = []
@@ -745,23 +704,22 @@ def transactions_explorer():
 
         # Get buyer info
         if transaction.get('user_id'):
-            buyer = user_service.get(transaction['user_id'])
+            buyer = buyers_by_id.get(transaction['user_id'])
             if buyer:
                 transaction['buyer_email'] = buyer.get('email', '')
                 transaction['buyer_type'] = buyer.get('user_type', '')
 
         # Get seller info
         if transaction.get('seller_id'):
-            seller = seller_service.get(transaction['seller_id'])
+            seller = sellers_by_id.get(transaction['seller_id'])
             if seller:
                 transaction['seller_name'] = seller.get('name', '')
                 transaction['seller_handle'] = seller.get('handle', '')
 
         # Get deliverer info
         if transaction.get('deliverer_id'):
-            deliverer_doc = db.collection('deliverers').document(transaction['deliverer_id']).get()
-            if deliverer_doc.exists:
-                deliverer = deliverer_doc.to_dict()
+            deliverer = deliverers_by_id.get(transaction['deliverer_id'])
+            if deliverer:
                 transaction['deliverer_user_id'] = deliverer.get('user_id')
 
         # Generate user identifiers - handle string IDs properly
@@ -805,10 +763,9 @@ def transactions_explorer():
             if seller_record:
                 user_identifier = f"seller_{seller_record['id']}"
         elif user_type == 'deliverer':
-            deliverer_docs = db.collection('deliverers').where(filter=FieldFilter('user_id', '==', user_id)).limit(1).stream()
-            for doc in deliverer_docs:
-                user_identifier = f"deliverer_{doc.id}"
-                break
+            deliverer_record = deliverer_service.get_by_user_id(user_id)
+            if deliverer_record:
+                user_identifier = f"deliverer_{deliverer_record['id']}"
 
     return render_template('transactions_explorer.html',
                          transactions=transactions_list,
@@ -1203,12 +1160,8 @@ def submit_review():
             message = 'Review submitted successfully!'
 
         # Update seller's average rating
-        all_reviews = review_service.get_seller_reviews(seller_id)
-        visible_reviews = [r for r in all_reviews if r.get('is_visible', True)]
-
-        if visible_reviews:
-            avg_rating = sum(r.get('rating', 0) for r in visible_reviews) / len(visible_reviews)
-        else:
+        avg_rating = review_service.avg('rating', [('seller_id', '==', seller_id), ('is_visible', '==', True)])
+        if avg_rating is None:
             avg_rating = 5.0
 
         seller_service.update(seller_id, {
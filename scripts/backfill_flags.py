@@ -0,0 +1,52 @@
+"""
+Backfill the listing flags that aggregations filter on
+Counts and averages run server-side with equality filters (is_active == True,
+is_visible == True), which never match documents missing the field. Older and
+seeded documents were treated as active/visible when the field was absent;
+this sets the field explicitly on them. Run once after deploying (safe to re-run):
+
+    python scripts/backfill_flags.py [--dry-run]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_config import initialize_firebase
+from firebase_db import review_service, get_product_service
+
+# (service, field) pairs whose missing value means True
+FLAGS = (
+    (get_product_service(), 'is_active'),
+    (review_service, 'is_visible'),
+)
+
+
+def backfill(service, field, dry_run=False):
+    """Set field to True on documents without it; returns (missing, written)"""
+    missing = [doc['id'] for doc in service.iter_query(page_size=500, fields=[field]) if field not in doc]
+    if dry_run or not missing:
+        return len(missing), 0
+
+    # updated_at is left alone: the documents' visible state does not change
+    summary = service._bulk_write([('update', doc_id, {field: True}) for doc_id in missing])
+    for error in summary['errors']:
+        print(f"  ✗ {service.collection_name}/{error['id']}: {error['error']}")
+    return len(missing), summary['written']
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv[1:]
+    initialize_firebase()
+
+    started = time.perf_counter()
+    for service, field in FLAGS:
+        missing, written = backfill(service, field, dry_run)
+        print(f"✓ {service.collection_name}.{field}: {missing} missing, {written} backfilled")
+    print(f"Done in {time.perf_counter() - started:.2f}s{' (dry run)' if dry_run else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Worker startup benchmark for SparzaFI
+Measures cold import time of the service layer and of the Flask app (app.py runs
+create_app() on import), each in a fresh interpreter as a gunicorn worker would
+
+Usage:
+    python scripts/benchmark_startup.py               # 5 runs, in-memory backend
+    python scripts/benchmark_startup.py --runs 10
+    python scripts/benchmark_startup.py --importtime  # slowest imports of one run
+    SPARZAFI_DB_BACKEND=firestore python scripts/benchmark_startup.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of phase timings (seconds)
+CHILD = '''
+import json, time
+started = time.perf_counter()
+import firebase_db
+services = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'services_import': services - started,
+    'app_import': imported - started,
+    'create_app_warm': created - imported,
+}))
+'''
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('SPARZAFI_DB_BACKEND', 'memory')
+    env.setdefault('FIRESTORE_METRICS_ENABLED', 'True')
+    return env
+
+
+def run_once():
+    """Time one cold start; returns the phase timings dict"""
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=child_env(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'startup failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """Top modules by cumulative import time for `import app` (python -X importtime)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                            env=child_env(), capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure SparzaFI worker startup time')
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts')
+    parser.add_argument('--importtime', action='store_true', help='list the slowest imports')
+    parser.add_argument('--top', type=int, default=20, help='modules listed with --importtime')
+    args = parser.parse_args()
+
+    print(f"Backend: {child_env()['SPARZAFI_DB_BACKEND']}  Runs: {args.runs}")
+
+    try:
+        runs = [run_once() for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"✗ Startup failed: {e}")
+        sys.exit(1)
+
+    print(f"\n{'phase':<20}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for phase in ('services_import', 'app_import', 'create_app_warm'):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<20}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    if args.importtime:
+        print("\nSlowest imports (cumulative ms):")
+        for cumulative, module in slowest_imports(args.top):
+            print(f"{cumulative / 1000:>10.1f}  {module}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Generate firestore.indexes.json from the service query registry
+Every service lists the filtered + ordered queries it runs in its QUERIES
+attribute (see firebase_indexes.QuerySpec); this script turns them into the
+composite index definitions deployed with `firebase deploy --only firestore:indexes`
+
+Usage:
+    python scripts/generate_indexes.py           # rewrite firestore.indexes.json
+    python scripts/generate_indexes.py --check   # exit 1 if the file is out of date
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Service modules create their singletons on import; no Firebase project is needed
+# just to read their query declarations
+os.environ.setdefault('SPARZAFI_DB_BACKEND', 'memory')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import firebase_db
+import firebase_service
+from firebase_indexes import collect_queries, build_indexes, render_indexes_file
+
+INDEXES_FILE = os.path.join(ROOT, 'firestore.indexes.json')
+
+
+def registered_services():
+    """Every service singleton defined in the service modules"""
+    services = []
+    for module in (firebase_service, firebase_db):
+        for value in vars(module).values():
+            if isinstance(value, firebase_service.FirebaseService) and value not in services:
+                services.append(value)
+    return services
+
+
+def generate() -> str:
+    """Contents of firestore.indexes.json for the current registry"""
+    field_overrides = []
+    if os.path.exists(INDEXES_FILE):
+        with open(INDEXES_FILE) as f:
+            field_overrides = json.load(f).get('fieldOverrides', [])
+
+    indexes = build_indexes(collect_queries(registered_services()))
+    return render_indexes_file(indexes, field_overrides)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='only verify the file is up to date')
+    args = parser.parse_args()
+
+    contents = generate()
+    current = open(INDEXES_FILE).read() if os.path.exists(INDEXES_FILE) else ''
+
+    if args.check:
+        if contents != current:
+            print("✗ firestore.indexes.json is out of date; run scripts/generate_indexes.py")
+            sys.exit(1)
+        print("✓ firestore.indexes.json is up to date")
+        return
+
+    with open(INDEXES_FILE, 'w') as f:
+        f.write(contents)
+    print(f"✓ Wrote {len(json.loads(contents)['indexes'])} composite indexes to firestore.indexes.json")
+
+
+if __name__ == '__main__':
+    main()
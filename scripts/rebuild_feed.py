@@ -0,0 +1,28 @@
+"""
+Rebuild the materialized marketplace feed (marketplace/feed.py)
+Run on a schedule (e.g. cron every few minutes) so page views never wait for a
+rebuild:
+
+    */5 * * * * cd /app && python scripts/rebuild_feed.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_config import initialize_firebase
+from marketplace.feed import feed_snapshot
+
+
+def main():
+    initialize_firebase()
+
+    started = time.perf_counter()
+    count = feed_snapshot.rebuild()
+    print(f"✓ Feed snapshot rebuilt: {count} sellers in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Rebuild the product search index (search/products.py) from every product and save it
+Workers keep the index current on their own; run this after bulk imports or
+on a schedule so new workers load a recent copy and have little to catch up:
+
+    0 * * * * cd /app && python scripts/rebuild_search_index.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_config import initialize_firebase
+from search import product_search
+
+
+def main():
+    initialize_firebase()
+
+    started = time.perf_counter()
+    count = product_search.rebuild()
+    print(f"✓ Search index rebuilt: {count} products in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
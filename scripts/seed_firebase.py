@@ -13,6 +13,7 @@ import hashlib
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from firebase_config import initialize_firebase, get_firestore_db
+from firebase_service import FirebaseService
 from firebase_db import (
     get_user_service,
     seller_service,
@@ -46,10 +47,10 @@ def clear_firebase_data(db):
 
     deleted_count = 0
     for collection_name in collections:
-        docs = db.collection(collection_name).stream()
-        for doc in docs:
-            doc.reference.delete()
-            deleted_count += 1
+        # Only document IDs are needed to delete
+        doc_ids = [doc.id for doc in db.collection(collection_name).select(['__name__']).stream()]
+        result = FirebaseService(collection_name).bulk_delete(doc_ids)
+        deleted_count += result['written']
 
     print(f"✓ Deleted {deleted_count} documents")
 
@@ -337,15 +338,17 @@ def seed_products(sellers):
         }
     ]
 
+    products_data = [p for p in products_data if p['seller_id']]
+    result = product_service.bulk_create(products_data)
+    failed_ids = {error['id'] for error in result['errors']}
+
     created_products = []
-    for product_data in products_data:
-        if product_data['seller_id']:
-            try:
-                product_id = product_service.create(product_data)
-                created_products.append({'id': product_id, **product_data})
-                print(f"  ✓ Created product: {product_data['name']} (R{product_data['price']})")
-            except Exception as e:
-                print(f"  ✗ Failed to create {product_data['name']}: {e}")
+    for product_id, product_data in zip(result['ids'], products_data):
+        if product_id in failed_ids:
+            print(f"  ✗ Failed to create {product_data['name']}")
+        else:
+            created_products.append({'id': product_id, **product_data})
+            print(f"  ✓ Created product: {product_data['name']} (R{product_data['price']})")
 
     return created_products
 
@@ -364,7 +367,8 @@ def seed_reviews(products, users):
             'user_id': buyers[0]['id'],
             'rating': 5,
             'review_text': 'Amazing spicy chicken! Perfectly cooked and seasoned. Will definitely order again!',
-            'is_verified_purchase': True
+            'is_verified_purchase': True,
+            'is_visible': True
         },
         {
             'product_id': products[0]['id'],
@@ -372,7 +376,8 @@ def seed_reviews(products, users):
             'user_id': buyers[1]['id'],
             'rating': 5,
             'review_text': 'Best food in Joburg! Authentic and delicious. Highly recommend!',
-            'is_verified_purchase': True
+            'is_verified_purchase': True,
+            'is_visible': True
         },
         {
             'product_id': products[1]['id'],
@@ -380,7 +385,8 @@ def seed_reviews(products, users):
             'user_id': buyers[0]['id'],
             'rating': 5,
             'review_text': 'The beef stew is incredible! Rich flavor and tender meat.',
-            'is_verified_purchase': True
+            'is_verified_purchase': True,
+            'is_visible': True
         },
         {
             'product_id': products[2]['id'],
@@ -388,7 +394,8 @@ def seed_reviews(products, users):
             'user_id': buyers[1]['id'],
             'rating': 4,
             'review_text': 'Great veggie curry! Good portion size and very tasty.',
-            'is_verified_purchase': True
+            'is_verified_purchase': True,
+            'is_visible': True
         },
         {
             'product_id': products[4]['id'],
@@ -396,19 +403,16 @@ def seed_reviews(products, users):
             'user_id': buyers[2]['id'],
             'rating': 4,
             'review_text': 'Traditional samp & beans, just like home. Good quality!',
-            'is_verified_purchase': True
+            'is_verified_purchase': True,
+            'is_visible': True
         }
     ]
 
-    created_count = 0
-    for review_data in reviews_data:
-        try:
-            review_service.create(review_data)
-            created_count += 1
-        except Exception as e:
-            print(f"  ✗ Failed to create review: {e}")
+    result = review_service.bulk_create(reviews_data)
+    for error in result['errors']:
+        print(f"  ✗ Failed to create review: {error['error']}")
 
-    print(f"  ✓ Created {created_count} reviews")
+    print(f"  ✓ Created {result['written']} reviews")
 
 
 def seed_deliverers(users):
@@ -502,15 +506,11 @@ def seed_delivery_routes(deliverers):
         }
     ]
 
-    created_count = 0
-    for route_data in routes_data:
-        try:
-            delivery_route_service.create(route_data)
-            created_count += 1
-        except Exception as e:
-            print(f"  ✗ Failed to create route: {e}")
+    result = delivery_route_service.bulk_create(routes_data)
+    for error in result['errors']:
+        print(f"  ✗ Failed to create route: {error['error']}")
 
-    print(f"  ✓ Created {created_count} delivery routes")
+    print(f"  ✓ Created {result['written']} delivery routes")
 
 
 def seed_conversations(users):
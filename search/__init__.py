@@ -0,0 +1,13 @@
+"""
+SparzaFi Search
+In-memory inverted, facet and prefix indexes for marketplace product search
+and search-as-you-type suggestions
+"""
+
+from .text import tokenize
+from .index import InvertedIndex
+from .facets import FacetIndex
+from .suggest import PrefixIndex
+from .products import ProductSearch, product_search
+
+__all__ = ['tokenize', 'InvertedIndex', 'FacetIndex', 'PrefixIndex', 'ProductSearch', 'product_search']
@@ -0,0 +1,147 @@
+"""
+Facet index for search filters and counts
+Keeps, for every facet (category, price bucket, ...), the set of documents
+holding each value, so filters are set intersections and "Electronics (124)"
+style counts come from the index instead of scanning documents.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Price bucket boundaries (upper bound exclusive; the last bucket is open ended)
+PRICE_BUCKETS: List[Tuple[float, Optional[float]]] = [
+    (0, 50), (50, 100), (100, 250), (250, 500), (500, 1000), (1000, None),
+]
+
+
+def _bucket_label(low: float, high: Optional[float]) -> str:
+    return f"{low:g}+" if high is None else f"{low:g}-{high:g}"
+
+
+def price_bucket(price) -> Optional[str]:
+    """Label of the bucket a price falls in ('100-250', '1000+'), None if not a price"""
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return None
+
+    for low, high in PRICE_BUCKETS:
+        if high is None or price < high:
+            return _bucket_label(low, high)
+    return None
+
+
+def price_buckets_between(min_price: Optional[float], max_price: Optional[float]) -> List[str]:
+    """Labels of every bucket overlapping [min_price, max_price]"""
+    labels = []
+    for low, high in PRICE_BUCKETS:
+        if max_price is not None and low > max_price:
+            continue
+        if min_price is not None and high is not None and high <= min_price:
+            continue
+        labels.append(_bucket_label(low, high))
+    return labels
+
+
+class FacetIndex:
+    """
+    {facet: {value: set of doc_ids}} plus each document's own values
+
+    A document has at most one value per facet; None means "no value" and is
+    not indexed.
+    """
+
+    def __init__(self, facets: Iterable[str]):
+        self.facets = list(facets)
+        self._postings: Dict[str, Dict[str, Set[str]]] = {facet: {} for facet in self.facets}
+        self._doc_values: Dict[str, Dict[str, Optional[str]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_values)
+
+    def add(self, doc_id: str, values: Dict[str, Optional[str]]):
+        """Index a document's facet values (replaces any previous version)"""
+        with self._lock:
+            self.remove(doc_id)
+            values = {facet: values.get(facet) for facet in self.facets}
+            for facet, value in values.items():
+                if value is not None:
+                    self._postings[facet].setdefault(value, set()).add(doc_id)
+            self._doc_values[doc_id] = values
+
+    def remove(self, doc_id: str):
+        """Drop a document (no-op if it is not indexed)"""
+        with self._lock:
+            values = self._doc_values.pop(doc_id, None)
+            if values is None:
+                return
+            for facet, value in values.items():
+                docs = self._postings[facet].get(value)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del self._postings[facet][value]
+
+    def clear(self):
+        with self._lock:
+            for postings in self._postings.values():
+                postings.clear()
+            self._doc_values.clear()
+
+    def values_of(self, doc_id: str) -> Optional[Dict[str, Optional[str]]]:
+        return self._doc_values.get(doc_id)
+
+    def values(self, facet: str) -> List[str]:
+        """Distinct values of a facet"""
+        with self._lock:
+            return list(self._postings[facet])
+
+    def all_docs(self) -> Set[str]:
+        with self._lock:
+            return set(self._doc_values)
+
+    def docs_with(self, facet: str, values: Iterable[str]) -> Set[str]:
+        """Documents having any of the values for a facet"""
+        with self._lock:
+            postings = self._postings[facet]
+            docs: Set[str] = set()
+            for value in values:
+                docs |= postings.get(value, set())
+            return docs
+
+    def filter(self, selected: Dict[str, Iterable[str]], candidates: Optional[Set[str]] = None) -> Set[str]:
+        """
+        Documents matching every selected facet (any of its values)
+
+        Args:
+            selected: {facet: values}; facets left out are not filtered on
+            candidates: Restrict to these documents (None for all)
+        """
+        with self._lock:
+            sets = sorted((self.docs_with(facet, values) for facet, values in selected.items()), key=len)
+            if not sets:
+                return set(candidates) if candidates is not None else self.all_docs()
+
+            matched = sets[0] if candidates is None else sets[0] & candidates
+            for docs in sets[1:]:
+                matched &= docs
+            return matched
+
+    def counts(self, facet: str, doc_ids: Optional[Set[str]] = None) -> Dict[str, int]:
+        """
+        {value: number of documents} for a facet, over doc_ids (None for all documents)
+
+        Without doc_ids this is the size of each posting list; otherwise the cost
+        is linear in len(doc_ids), never in the size of the index.
+        """
+        with self._lock:
+            if doc_ids is None:
+                return {value: len(docs) for value, docs in self._postings[facet].items()}
+
+            counts: Dict[str, int] = {}
+            for doc_id in doc_ids:
+                value = self._doc_values.get(doc_id, {}).get(facet)
+                if value is not None:
+                    counts[value] = counts.get(value, 0) + 1
+            return counts
@@ -0,0 +1,164 @@
+"""
+In-memory inverted index with BM25 ranking
+Maps each term to the documents containing it (with a field-weighted term
+frequency), so a query only touches the posting lists of its own terms.
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .text import tokenize
+
+
+class InvertedIndex:
+    """
+    Term -> {doc_id: weighted term frequency}
+
+    Documents are added as {field: text}; each field's terms count `weight`
+    times (a word in the name matters more than one in the description).
+    Queries are AND across terms and ranked with BM25.
+    """
+
+    # BM25 parameters: term frequency saturation and length normalization
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, field_weights: Dict[str, float]):
+        self.field_weights = field_weights
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def analyze(self, fields: Dict[str, str]) -> Dict[str, float]:
+        """Weighted term frequencies of a document's fields"""
+        terms: Counter = Counter()
+        for field, weight in self.field_weights.items():
+            for term in tokenize(fields.get(field) or ''):
+                terms[term] += weight
+        return dict(terms)
+
+    def add(self, doc_id: str, fields: Dict[str, str]):
+        """Index a document (replaces any previous version)"""
+        self.add_terms(doc_id, self.analyze(fields))
+
+    def add_terms(self, doc_id: str, terms: Dict[str, float]):
+        """Index a document from already analyzed term weights (see analyze())"""
+        with self._lock:
+            self.remove(doc_id)
+            for term, weight in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = weight
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = length = sum(terms.values())
+            self._total_length += length
+
+    def remove(self, doc_id: str):
+        """Drop a document from the index (no-op if it is not indexed)"""
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0.0
+
+    def terms_of(self, doc_id: str) -> Optional[Dict[str, float]]:
+        """Analyzed term weights of an indexed document (used for persistence)"""
+        return self._doc_terms.get(doc_id)
+
+    def doc_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._doc_terms)
+
+    def match(self, terms: Iterable[str], candidates: Optional[Set[str]] = None) -> Set[str]:
+        """
+        IDs of documents containing every term (and in candidates, if given)
+
+        Intersects starting from the rarest term, so the cost is bounded by the
+        shortest posting list rather than the size of the index.
+        """
+        with self._lock:
+            postings = []
+            for term in set(terms):
+                docs = self._postings.get(term)
+                if not docs:
+                    return set()
+                postings.append(docs)
+            if not postings:
+                return set()
+
+            postings.sort(key=len)
+            if candidates is not None and len(candidates) < len(postings[0]):
+                matched = {doc_id for doc_id in candidates if doc_id in postings[0]}
+            else:
+                matched = set(postings[0])
+                if candidates is not None:
+                    matched &= candidates
+            for docs in postings[1:]:
+                matched = {doc_id for doc_id in matched if doc_id in docs}
+                if not matched:
+                    break
+            return matched
+
+    def search(self, query: str, limit: Optional[int] = None,
+               candidates: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents matching every query term
+
+        Args:
+            query: Free text, analyzed like the documents
+            limit: Maximum results (None for all matches)
+            candidates: Only consider these document IDs (e.g. pre-filtered by facets)
+
+        Returns:
+            [(doc_id, score)] best first
+        """
+        terms = tokenize(query)
+        with self._lock:
+            matched = self.match(terms, candidates)
+            if not matched:
+                return []
+
+            count = len(self._doc_terms)
+            average_length = self._total_length / count if count else 1.0
+            weights = [(self._postings[term], self._idf(term, count)) for term in set(terms)]
+
+            scored = []
+            for doc_id in matched:
+                norm = self.K1 * (1 - self.B + self.B * self._doc_lengths[doc_id] / average_length)
+                score = 0.0
+                for postings, idf in weights:
+                    tf = postings[doc_id]
+                    score += idf * tf * (self.K1 + 1) / (tf + norm)
+                scored.append((score, doc_id))
+
+        if limit is None:
+            ranked = sorted(scored, reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scored)
+        return [(doc_id, score) for score, doc_id in ranked]
+
+    def _idf(self, term: str, count: int) -> float:
+        frequency = len(self._postings.get(term, ()))
+        return math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
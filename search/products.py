@@ -0,0 +1,468 @@
+"""
+Product full-text and faceted search, and search-as-you-type suggestions
+Keeps an inverted index of listed products (name, description, category and
+seller name) in each worker, plus a facet index (category, price bucket, seller
+verification status and location) for filters and facet counts, and a prefix
+index of product names, categories and seller handles for suggestions. The index is persisted in the search_index
+collection so a new worker loads it with one query instead of scanning the
+catalog, then catches up with the products and sellers updated since it was saved.
+
+The index stays current incrementally:
+- writes made through the services in this process are re-indexed on the next search
+- writes made by other workers are picked up every SEARCH_INDEX_SYNC_INTERVAL
+  seconds with one query for documents whose updated_at is newer than the last sync
+- products deleted elsewhere are dropped when a search result fails to load
+
+scripts/rebuild_search_index.py rebuilds and saves the index from scratch.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from firebase_db import seller_service, get_product_service
+from firebase_service import FirebaseService, add_change_listener
+from .facets import FacetIndex, price_bucket, price_buckets_between
+from .index import InvertedIndex
+from .suggest import PrefixIndex
+from .text import fold, tokenize
+
+
+INDEX_COLLECTION = 'search_index'
+INDEX_NAME = 'products'
+
+# Bumped when the saved row format changes; older saved indexes are rebuilt
+INDEX_VERSION = 3
+
+# Relative weight of a term found in each field
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'seller_name': 2.0, 'description': 1.0}
+
+FACETS = ('category', 'price', 'verification_status', 'location')
+
+# Products stored per index document (keeps each well under Firestore's 1 MiB limit)
+PRODUCTS_PER_CHUNK = 200
+
+# Index documents written per batch (keeps each commit under Firestore's 10 MiB request limit)
+CHUNKS_PER_BATCH = 8
+
+# Documents updated this long before the last sync are fetched again, to allow for clock skew
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def is_listed(product: Dict) -> bool:
+    """Whether a product is shown in the marketplace (and therefore searchable)"""
+    return product.get('is_active', True)
+
+
+def _price(product: Dict) -> Optional[float]:
+    try:
+        return float(product['price'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _popularity(product: Dict) -> List[int]:
+    """Sort key for results without a text query: most sold, then most viewed"""
+    return [int(product.get('total_sales') or 0), int(product.get('view_count') or 0)]
+
+
+class ProductSearch:
+    """Per-worker product search index"""
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self.index = InvertedIndex(FIELD_WEIGHTS)
+        self.facets = FacetIndex(FACETS)
+        self.suggestions = PrefixIndex()
+        # Per product: name, category, seller_id/handle, price and popularity
+        # (what the saved index stores besides terms and facets)
+        self._stored: Dict[str, Dict[str, Any]] = {}
+        # Category and seller suggestions: {(type, key): {'members': {product_id: popularity}, 'total': [...]}}
+        self._suggestion_groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._seller_products: Dict[str, Set[str]] = {}
+        self._ready = False
+        self._synced_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._dirty_products: Set[str] = set()
+        self._dirty_sellers: Set[str] = set()
+        self._lock = threading.RLock()
+        self._store = FirebaseService(INDEX_COLLECTION)
+
+    # ==================== QUERIES ====================
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Ranked [(product_id, score)] for listed products matching every query term"""
+        self.refresh()
+        return self.index.search(query, limit)
+
+    def search_products(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ranked product documents matching every query term (one batched read)"""
+        return self._hydrate(self.search(query, limit))
+
+    def faceted_search(self, query: str = '', category: Optional[str] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       verified_only: bool = False, location: Optional[str] = None,
+                       seller_ids: Optional[Iterable[str]] = None,
+                       limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """
+        Search with filters, returning facet counts alongside the results
+
+        Filters are intersections of facet posting lists; nothing is read from
+        Firestore except the returned products (one batched read). Each facet's
+        counts apply every other filter but not its own, so the UI can show how
+        many results picking another value would give ("Electronics (124)").
+
+        Args:
+            query: Free text (empty to browse by filters alone, most popular first)
+            category: Exact category
+            min_price, max_price: Inclusive price range
+            verified_only: Only products of verified sellers
+            location: Text contained in the seller's location (case/accent insensitive)
+            seller_ids: Only products of these sellers (e.g. sellers near the buyer)
+            limit: Maximum products returned
+            offset: Ranked results to skip (to page through them)
+
+        Returns:
+            {'products': [...], 'total': int, 'facets': {facet: {value: count}}}
+        """
+        self.refresh()
+
+        with self._lock:
+            candidates = self.index.match(tokenize(query)) if query.strip() else None
+            if seller_ids is not None:
+                sellers_products: Set[str] = set()
+                for seller_id in seller_ids:
+                    sellers_products |= self._seller_products.get(seller_id, set())
+                candidates = sellers_products if candidates is None else candidates & sellers_products
+
+            selected: Dict[str, List[str]] = {}
+            if category:
+                selected['category'] = [category]
+            if min_price is not None or max_price is not None:
+                selected['price'] = price_buckets_between(min_price, max_price)
+            if verified_only:
+                selected['verification_status'] = ['verified']
+            if location:
+                wanted = fold(location.strip())
+                selected['location'] = [value for value in self.facets.values('location') if wanted in fold(value)]
+
+            def matching(excluded: Optional[str] = None) -> Optional[Set[str]]:
+                """Documents passing every filter but `excluded` (None: no filter at all)"""
+                filters = {facet: values for facet, values in selected.items() if facet != excluded}
+                if candidates is None and not filters:
+                    return None
+                docs = self.facets.filter(filters, candidates=candidates)
+                if 'price' in filters:
+                    # Buckets at the edges of the range may hold prices outside it
+                    docs = {doc_id for doc_id in docs if self._price_in_range(doc_id, min_price, max_price)}
+                return docs
+
+            matched = matching()
+            counts = {facet: self.facets.counts(facet, matching(facet)) for facet in FACETS}
+            if matched is None:
+                matched = self.facets.all_docs()
+
+            end = None if limit is None else offset + limit
+            if query.strip():
+                hits = self.index.search(query, end, candidates=matched)
+            else:
+                popular = heapq.nlargest(len(matched) if end is None else end, matched,
+                                         key=lambda doc_id: self._stored[doc_id]['popularity'])
+                hits = [(doc_id, 0.0) for doc_id in popular]
+
+        return {'products': self._hydrate(hits[offset:]), 'total': len(matched), 'facets': counts}
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Product names, categories and seller handles with a word starting with prefix
+
+        Most popular first (total sales, then views; summed over the products of a
+        category or seller). Answered from memory, without reading Firestore.
+
+        Returns:
+            [{'text': ..., 'type': 'product' | 'category' | 'seller', ...}]
+        """
+        self.refresh()
+        return self.suggestions.lookup(prefix, limit)
+
+    def _price_in_range(self, product_id: str, min_price: Optional[float], max_price: Optional[float]) -> bool:
+        price = self._stored.get(product_id, {}).get('price')
+        if price is None:
+            return False
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+    def _hydrate(self, hits: List[Tuple[str, float]]) -> List[Dict]:
+        """Product documents for ranked hits, in order (one batched read)"""
+        products = get_product_service().get_map([product_id for product_id, _ in hits])
+
+        results, stale = [], []
+        for product_id, score in hits:
+            product = products.get(product_id)
+            if product is None or not is_listed(product):
+                # Deleted or unlisted by another worker since the last sync
+                stale.append(product_id)
+                continue
+            results.append({**product, 'search_score': round(score, 4)})
+
+        if stale:
+            with self._lock:
+                self._dirty_products.update(stale)
+        return results
+
+    # ==================== MAINTENANCE ====================
+
+    def refresh(self):
+        """Load the index on first use, then apply changes made since the last call"""
+        with self._lock:
+            if not self._ready:
+                if self._load():
+                    self._sync()
+                else:
+                    self._rebuild()
+            elif time.monotonic() - self._checked_at >= self.sync_interval:
+                self._sync()
+
+            if self._dirty_products or self._dirty_sellers:
+                self._apply_changes()
+
+    def rebuild(self) -> int:
+        """Rebuild the index from every product and save it; returns the number indexed"""
+        with self._lock:
+            self._rebuild()
+            return len(self.index)
+
+    def reset(self):
+        """Forget the in-memory index (the next search loads it again)"""
+        with self._lock:
+            self.index.clear()
+            self.facets.clear()
+            self.suggestions.clear()
+            self._stored.clear()
+            self._suggestion_groups.clear()
+            self._seller_products.clear()
+            self._dirty_products.clear()
+            self._dirty_sellers.clear()
+            self._ready = False
+            self._synced_at = None
+
+    def mark_product(self, collection_name: str, product_id: str):
+        """Re-index a product on the next search (registered as a products change listener)"""
+        with self._lock:
+            self._dirty_products.add(product_id)
+
+    def mark_seller(self, collection_name: str, seller_id: str):
+        """Re-index a seller's products on the next search (registered as a sellers change listener)"""
+        with self._lock:
+            self._dirty_sellers.add(seller_id)
+
+    def _apply_changes(self):
+        """Re-index the products marked dirty, and every product of the sellers marked dirty"""
+        product_ids, self._dirty_products = self._dirty_products, set()
+        seller_ids, self._dirty_sellers = self._dirty_sellers, set()
+        for seller_id in seller_ids:
+            product_ids |= self._seller_products.get(seller_id, set())
+
+        products = get_product_service().get_map(list(product_ids))
+        for product_id in product_ids - products.keys():
+            self._remove(product_id)
+        self._index_products(products.values())
+
+    def _sync(self):
+        """Re-index products and sellers updated (by any worker) since the last sync"""
+        started = datetime.now(timezone.utc)
+        since = self._synced_at - SYNC_OVERLAP
+
+        self._index_products(get_product_service().query([('updated_at', '>=', since)]))
+        for seller in seller_service.query([('updated_at', '>=', since)], fields=['updated_at']):
+            self._dirty_sellers.add(seller['id'])
+
+        self._synced_at = started
+        self._checked_at = time.monotonic()
+
+    def _index_products(self, products: Iterable[Dict]):
+        """Add or replace products in the index (unlisted ones are removed)"""
+        products = list(products)
+        sellers = seller_service.get_map([p.get('seller_id') for p in products])
+
+        for product in products:
+            if not is_listed(product):
+                self._remove(product['id'])
+                continue
+
+            seller = sellers.get(product.get('seller_id')) or {}
+            self.index.add(product['id'], {
+                'name': product.get('name'),
+                'description': product.get('description'),
+                'category': product.get('category'),
+                'seller_name': seller.get('name'),
+            })
+            self.facets.add(product['id'], {
+                'category': product.get('category') or None,
+                'price': price_bucket(product.get('price')),
+                'verification_status': seller.get('verification_status') or None,
+                'location': (seller.get('location') or '').strip() or None,
+            })
+            self._store_fields(product['id'], {
+                'name': product.get('name') or '',
+                'category': product.get('category') or None,
+                'seller_id': product.get('seller_id'),
+                'handle': seller.get('handle') or None,
+                'price': _price(product),
+                'popularity': _popularity(product),
+            })
+
+    def _remove(self, product_id: str):
+        self.index.remove(product_id)
+        self.facets.remove(product_id)
+        self._store_fields(product_id, None)
+
+    def _store_fields(self, product_id: str, fields: Optional[Dict[str, Any]]):
+        """
+        Keep a product's stored fields, which seller it belongs to (so seller
+        changes re-index it) and its suggestions
+        """
+        previous = self._stored.pop(product_id, None)
+        if previous:
+            if previous.get('seller_id'):
+                self._seller_products.get(previous['seller_id'], set()).discard(product_id)
+            for group in self._groups_of(previous):
+                self._leave_group(group, product_id)
+
+        if fields is None:
+            self.suggestions.remove(('product', product_id))
+            return
+
+        self._stored[product_id] = fields
+        if fields.get('seller_id'):
+            self._seller_products.setdefault(fields['seller_id'], set()).add(product_id)
+
+        self.suggestions.add(('product', product_id), fields['name'], fields['popularity'],
+                             {'type': 'product', 'id': product_id})
+        for group in self._groups_of(fields):
+            self._join_group(group, product_id, fields)
+
+    @staticmethod
+    def _groups_of(fields: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Suggestion groups a product counts towards: its category and its seller (if it has a handle)"""
+        groups = []
+        if fields.get('category'):
+            groups.append(('category', fields['category']))
+        if fields.get('seller_id') and fields.get('handle'):
+            groups.append(('seller', fields['seller_id']))
+        return groups
+
+    def _join_group(self, group: Tuple[str, str], product_id: str, fields: Dict[str, Any]):
+        kind, key = group
+        state = self._suggestion_groups.setdefault(group, {'members': {}, 'total': [0, 0]})
+        state['members'][product_id] = fields['popularity']
+        state['total'] = [a + b for a, b in zip(state['total'], fields['popularity'])]
+
+        if kind == 'category':
+            self.suggestions.add(group, key, state['total'], {'type': 'category'})
+        else:
+            self.suggestions.add(group, fields['handle'], state['total'],
+                                 {'type': 'seller', 'id': key, 'handle': fields['handle']})
+
+    def _leave_group(self, group: Tuple[str, str], product_id: str):
+        state = self._suggestion_groups.get(group)
+        if state is None or product_id not in state['members']:
+            return
+
+        popularity = state['members'].pop(product_id)
+        if not state['members']:
+            del self._suggestion_groups[group]
+            self.suggestions.remove(group)
+            return
+
+        state['total'] = [a - b for a, b in zip(state['total'], popularity)]
+        entry = self.suggestions.get(group)
+        if entry is not None:
+            self.suggestions.add(group, entry['text'], state['total'], entry['payload'])
+
+    # ==================== PERSISTENCE ====================
+
+    def _rebuild(self):
+        """Index every listed product, then save the index"""
+        started = datetime.now(timezone.utc)
+        self.reset()
+        self._index_products(get_product_service().iter_query(predicate=is_listed))
+        self._ready = True
+        self._synced_at = started
+        self._checked_at = time.monotonic()
+        self._save()
+
+    def _load(self) -> bool:
+        """Read the saved index (one query); False if there is none or it is incomplete"""
+        chunks = self._store.query([('index', '==', INDEX_NAME)])
+        if not chunks:
+            return False
+
+        synced_at = chunks[0].get('synced_at')
+        complete = (
+            len(chunks) == chunks[0].get('chunk_count')
+            and all(chunk.get('synced_at') == synced_at for chunk in chunks)
+        )
+        if not complete or not isinstance(synced_at, datetime) or chunks[0].get('version') != INDEX_VERSION:
+            return False
+
+        self.reset()
+        for chunk in chunks:
+            for row in chunk.get('products', []):
+                self.index.add_terms(row['id'], row['terms'])
+                self.facets.add(row['id'], row.get('facets', {}))
+                self._store_fields(row['id'], {
+                    'name': row.get('name') or '',
+                    'category': row.get('category'),
+                    'seller_id': row.get('seller_id'),
+                    'handle': row.get('handle'),
+                    'price': row.get('price'),
+                    'popularity': row.get('popularity', [0, 0]),
+                })
+
+        self._ready = True
+        self._synced_at = synced_at if synced_at.tzinfo else synced_at.replace(tzinfo=timezone.utc)
+        return True
+
+    def _save(self):
+        """
+        Replace the saved index
+
+        Written in several batches when large; every chunk carries synced_at, so a
+        worker reading a half-written index sees mismatching chunks and rebuilds instead.
+        """
+        rows = [
+            {'id': product_id, **self._stored[product_id],
+             'terms': self.index.terms_of(product_id), 'facets': self.facets.values_of(product_id)}
+            for product_id in self.index.doc_ids()
+        ]
+        chunks = [rows[i:i + PRODUCTS_PER_CHUNK] for i in range(0, len(rows), PRODUCTS_PER_CHUNK)] or [[]]
+        existing = {doc['id'] for doc in self._store.query([('index', '==', INDEX_NAME)], fields=['chunk'])}
+
+        written = set()
+        for number, chunk in enumerate(chunks):
+            if number % CHUNKS_PER_BATCH == 0:
+                if number:
+                    batch.commit()
+                batch = self._store.db.batch()
+
+            doc_id = f"{INDEX_NAME}_{number}"
+            written.add(doc_id)
+            batch.set(self._store.collection.document(doc_id), {
+                'index': INDEX_NAME,
+                'version': INDEX_VERSION,
+                'chunk': number,
+                'chunk_count': len(chunks),
+                'synced_at': self._synced_at,
+                'products': chunk,
+            })
+        for doc_id in existing - written:
+            batch.delete(self._store.collection.document(doc_id))
+        batch.commit()
+
+
+product_search = ProductSearch(sync_interval=Config.SEARCH_INDEX_SYNC_INTERVAL)
+add_change_listener(['products'], product_search.mark_product)
+add_change_listener(['sellers'], product_search.mark_seller)
@@ -0,0 +1,146 @@
+"""
+Prefix index for search-as-you-type suggestions
+A sorted array of (key, entry) pairs searched with bisect: every word start of
+an entry's text is a key, so "sho" finds "Running Shoes". New keys are appended
+and the array re-sorted on next use (cheap for an almost sorted list), so the
+index is updated in place as products change and bulk loads stay linear.
+
+The best entries for each prefix are cached, so repeated keystrokes (most
+lookups) cost a dictionary hit. A change to an entry only evicts cached
+prefixes of its own keys whose results it could change.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from .text import fold
+
+_SPACE_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Folded text with punctuation and runs of spaces collapsed to single spaces"""
+    return _SPACE_RE.sub(' ', fold(text or '')).strip()
+
+
+class PrefixIndex:
+    """
+    Entries (text, popularity, payload) looked up by the prefix of any of their words
+
+    Popularity is any comparable value (e.g. [total_sales, view_count]); lookups
+    return the most popular matches first.
+    """
+
+    # Most entries returned (and cached) per prefix
+    MAX_LIMIT = 20
+
+    def __init__(self, cache_size: int = 10000):
+        self._keys: List[Tuple[str, Hashable]] = []
+        self._sorted = True
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+        self._top: LRUCache = LRUCache(maxsize=cache_size)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry_id: Hashable, text: str, popularity, payload: Optional[Dict] = None):
+        """Add or replace an entry"""
+        with self._lock:
+            previous = self._entries.get(entry_id)
+            if previous is not None and previous['text'] == text:
+                # Same keys; only the ranking data changes
+                previous.update(popularity=popularity, payload=payload or {})
+                self._evict(entry_id, self._word_keys(text), popularity)
+                return
+
+            self.remove(entry_id)
+            keys = self._word_keys(text)
+            self._entries[entry_id] = {'text': text, 'popularity': popularity, 'payload': payload or {}}
+            self._keys.extend((key, entry_id) for key in keys)
+            self._sorted = False
+            self._evict(entry_id, keys, popularity)
+
+    def remove(self, entry_id: Hashable):
+        """Drop an entry (no-op if absent)"""
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+            if entry is None:
+                return
+            self._sort()
+            keys = self._word_keys(entry['text'])
+            for key in keys:
+                position = bisect.bisect_left(self._keys, (key, entry_id))
+                if position < len(self._keys) and self._keys[position] == (key, entry_id):
+                    del self._keys[position]
+            self._evict(entry_id, keys)
+
+    def get(self, entry_id: Hashable) -> Optional[Dict[str, Any]]:
+        """An entry's text, popularity and payload (None if absent)"""
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            return dict(entry) if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._sorted = True
+            self._entries.clear()
+            self._top.clear()
+
+    def lookup(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Most popular entries having a word (or run of words) starting with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            best = self._top.get(prefix)
+            if best is None:
+                self._sort()
+                matched = set()
+                position = bisect.bisect_left(self._keys, (prefix,))
+                while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+                    matched.add(self._keys[position][1])
+                    position += 1
+
+                best = heapq.nlargest(self.MAX_LIMIT, matched, key=lambda entry_id: self._entries[entry_id]['popularity'])
+                self._top[prefix] = best
+
+            entries = [self._entries[entry_id] for entry_id in best[:limit]]
+            return [{'text': entry['text'], **entry['payload']} for entry in entries]
+
+    def _sort(self):
+        if not self._sorted:
+            self._keys.sort()
+            self._sorted = True
+
+    def _evict(self, entry_id: Hashable, keys: List[str], popularity=None):
+        """
+        Drop cached results an added/changed (popularity given) or removed entry affects
+
+        A prefix's cached list stays valid unless it contains the entry, or the
+        entry's new popularity would earn it a place in the list.
+        """
+        if not self._top:
+            return
+        for key in keys:
+            for end in range(1, len(key) + 1):
+                prefix = key[:end]
+                best = self._top.get(prefix)
+                if best is None:
+                    continue
+                if entry_id in best or popularity is not None and (
+                        len(best) < self.MAX_LIMIT or popularity > self._entries[best[-1]]['popularity']):
+                    del self._top[prefix]
+
+    @staticmethod
+    def _word_keys(text: str) -> List[str]:
+        """'Running Shoes' -> ['running shoes', 'shoes']"""
+        words = normalize(text).split(' ')
+        return list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words)) if words[i]))
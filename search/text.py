@@ -0,0 +1,69 @@
+"""
+Text analysis for the search index
+Lowercase/accent folding, tokenization, stopword removal and a light English
+stemmer. The same analyzer runs on documents and on queries, so matching only
+depends on both sides being reduced to the same stem.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+
+# Words of at most this many characters are never stemmed
+_MIN_STEM_LENGTH = 3
+
+_VOWELS = frozenset('aeiouy')
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ('Café' -> 'cafe')"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def stem(word: str) -> str:
+    """
+    Reduce an English word to a stem with a few suffix rules (plurals, -ing, -ed, -ly)
+
+    Not a full Porter stemmer: it only needs to map common inflections of
+    product vocabulary to one form ('shoes'/'shoe', 'baked'/'baking'/'bake').
+    """
+    if len(word) <= _MIN_STEM_LENGTH or word.isdigit():
+        return word
+
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('es') and word[-3] in 'sxz' or word.endswith(('ches', 'shes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+
+    for suffix in ('ingly', 'edly', 'ing', 'ed', 'ly'):
+        stripped = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stripped) >= _MIN_STEM_LENGTH and _VOWELS & set(stripped):
+            word = stripped
+            # running -> run, but keep fall/press/buzz
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+
+    # bake/baking/baked all end up as 'bak'
+    if len(word) > 3 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into folded, stemmed terms (stopwords removed, order kept)"""
+    if not text:
+        return []
+    return [stem(token) for token in _TOKEN_RE.findall(fold(text)) if token not in STOPWORDS]
@@ -12,6 +12,7 @@ import os
 
 # Firebase imports
 from firebase_db import seller_service, get_user_service, get_product_service, get_order_service, review_service, transaction_service, withdrawal_service
+from firebase_geo import geo_fields_from
 from google.cloud import firestore
 
 # ==================== HELPER FUNCTIONS ====================
@@ -49,7 +50,8 @@ def setup_profile():
                     'name': name,
                     'handle': handle,
                     'location': location,
-                    'bio': bio
+                    'bio': bio,
+                    **geo_fields_from(request.form)
                 })
             else:
                 # Create new seller profile
@@ -60,6 +62,7 @@ def setup_profile():
                     'handle': handle,
                     'profile_initial': profile_initial,
                     'location': location,
+                    **geo_fields_from(request.form),
                     'bio': bio,
                     'is_verified': False,
                     'avg_rating': 0.0,
@@ -135,8 +138,7 @@ def seller_dashboard():
         order for order in all_orders
         if order.get('status') in ['PENDING', 'CONFIRMED', 'READY_FOR_PICKUP']
     ]
-    # Sort by timestamp and limit to 10
-    pending_orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    # Orders arrive newest first; keep the latest 10
     pending_orders = pending_orders[:10]
 
     # ====== VIDEOS ======
@@ -285,9 +287,6 @@ def manage_orders():
         if order.get('status') in ['PENDING', 'CONFIRMED', 'READY_FOR_PICKUP']
     ]
 
-    # Sort by created_at descending
-    orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-
     return render_template('seller_orders.html', orders=orders)
 
 @seller_bp.route('/order/<order_id>/confirm', methods=['POST'])
@@ -575,7 +574,6 @@ def request_withdrawal():
 def update_profile():
     """Update seller business profile"""
     user = session.get('user')
-    db = get_db()
 
     seller = seller_service.get_by_user_id(user['id'])
     if not seller:
@@ -604,15 +602,16 @@ def update_profile():
         update_data = {
             'name': name,
             'bio': bio,
-            'location': location
+            'location': location,
+            # Optional coordinates (filled in by the browser) for nearby-seller search
+            **geo_fields_from(request.form)
         }
 
         if profile_image:
             update_data['profile_image'] = profile_image
 
         # Update in Firebase
-        seller_ref = db.collection('sellers').document(seller_id)
-        seller_ref.update(update_data)
+        seller_service.update(seller_id, update_data)
 
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('seller.seller_dashboard'))
@@ -5,7 +5,6 @@ Wrapper functions for chat functionality using Firebase services
 
 from firebase_db import conversation_service, message_service, get_product_service, seller_service
 from firebase_config import get_firestore_db
-from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud import firestore
 
 
@@ -38,21 +37,9 @@ def get_unread_count(user_id, conversation_id=None):
     If conversation_id is provided, get count for that conversation only
     Returns: Integer count
     """
-    db = get_firestore_db()
-    messages_ref = db.collection('messages')
-
     if conversation_id:
         # Get unread count for specific conversation
-        query = messages_ref.where(filter=FieldFilter('conversation_id', '==', conversation_id)) \
-                           .where(filter=FieldFilter('is_read', '==', False))
-
-        count = 0
-        for doc in query.stream():
-            msg = doc.to_dict()
-            # Only count if current user is not the sender
-            if msg.get('sender_id') != user_id:
-                count += 1
-        return count
+        return message_service.get_conversation_unread_count(conversation_id, user_id)
     else:
         # Get total unread count across all conversations
         # First get all user's conversations
@@ -60,15 +47,7 @@ def get_unread_count(user_id, conversation_id=None):
 
         total_unread = 0
         for conv in conversations:
-            conv_id = conv.get('id')
-            query = messages_ref.where(filter=FieldFilter('conversation_id', '==', conv_id)) \
-                               .where(filter=FieldFilter('is_read', '==', False))
-
-            for doc in query.stream():
-                msg = doc.to_dict()
-                # Only count if current user is not the sender
-                if msg.get('sender_id') != user_id:
-                    total_unread += 1
+            total_unread += message_service.get_conversation_unread_count(conv.get('id'), user_id)
 
         return total_unread
 
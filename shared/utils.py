@@ -332,13 +332,10 @@ def award_loyalty_points(user_id, purchase_amount):
     points = purchase_amount * current_app.config['LOYALTY_POINTS_PER_RAND']
 
     user_service = get_user_service()
-    db = get_firestore_db()
 
     # Update loyalty points atomically
-    user_ref = db.collection('users').document(user_id)
-    user_ref.update({
-        'loyalty_points': firestore.Increment(points),
-        'updated_at': firestore.SERVER_TIMESTAMP
+    user_service.update(user_id, {
+        'loyalty_points': firestore.Increment(points)
     })
 
     return points
@@ -355,11 +352,8 @@ def convert_loyalty_points_to_spz(user_id, points):
         return {'success': False, 'error': 'Insufficient loyalty points'}
 
     try:
-        db = get_firestore_db()
-
         # Deduct points atomically
-        user_ref = db.collection('users').document(user_id)
-        user_ref.update({
+        user_service.update(user_id, {
             'loyalty_points': firestore.Increment(-points)
         })
 
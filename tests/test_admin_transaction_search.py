@@ -0,0 +1,64 @@
+"""
+Test Suite for the Admin Transaction Search
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Transfers, withdrawals and rewards (no timestamp) are found with orders
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_config import get_firestore_db
+from firebase_db import transaction_service
+from transaction_explorer.service import get_transaction_explorer_service
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def test_transactions_without_timestamp():
+    print_header("TRANSACTIONS WITHOUT TIMESTAMP")
+    get_firestore_db().reset()
+    explorer_service = get_transaction_explorer_service()
+
+    order_id = explorer_service.create_transaction_with_metadata({
+        'user_id': 'u1', 'seller_id': 's1', 'total_amount': 50, 'status': 'PENDING'
+    })
+    # Created like shared/utils.py's transfers: created_at only
+    transfer_id = transaction_service.create({
+        'from_user_id': 'u1', 'to_user_id': 'u2', 'user_id': 'u1', 'amount': 10,
+        'transaction_type': 'transfer', 'status': 'completed'
+    })
+    assert 'timestamp' not in transaction_service.get(transfer_id)
+
+    found = {tx['id'] for tx in explorer_service.search_admin_transactions()}
+    assert found == {order_id, transfer_id}, found
+
+    buyer = {tx['id'] for tx in explorer_service.search_admin_transactions({'buyer_id': 'u1'})}
+    assert buyer == {order_id, transfer_id}, buyer
+
+    completed = explorer_service.search_admin_transactions({'status': 'completed'})
+    assert [tx['id'] for tx in completed] == [transfer_id]
+    print("✅ PASS | orders and transfers both found, with and without filters")
+
+
+def main():
+    """Run all tests"""
+    test_transactions_without_timestamp()
+    print("\n✅ All admin transaction search tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Test Suite for the Catalog Cache and the Request Loader
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+Cursor codec tests live in test_pagination.py.
+
+Tests:
+1. Catalog cache hits, misses, TTL expiry and LRU bounds
+2. Stale handle lookups are not served
+3. Service updates and deletes evict cached documents
+4. Loader resolves queued IDs in one batch and remembers missing ones
+5. Loader memo values are computed once until forgotten
+6. Services share one loader per request and forget written documents
+"""
+
+import os
+import sys
+import time
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import initialize_firebase, get_firestore_db
+from firebase_cache import CatalogCache, catalog_cache, bypass_catalog_cache
+from firebase_loader import RequestLoader, get_request_loader
+from firebase_metrics import start_request_metrics
+from firebase_db import seller_service, follow_service
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def reset():
+    """Empty database and catalog cache"""
+    initialize_firebase()
+    get_firestore_db().reset()
+    catalog_cache.clear()
+
+
+def recorder(documents):
+    """Fetch callable over a dict that records the IDs of every call"""
+    calls = []
+
+    def fetch(doc_ids):
+        calls.append(sorted(doc_ids))
+        return {doc_id: documents[doc_id] for doc_id in doc_ids if doc_id in documents}
+
+    return fetch, calls
+
+
+def test_cache_basics():
+    print_header("HITS, MISSES, TTL AND LRU")
+    cache = CatalogCache(maxsize=2, ttl=60)
+    assert cache.get('sellers', 's1') is None
+    cache.put('sellers', {'id': 's1', 'name': 'Gogo'})
+
+    doc = cache.get('sellers', 's1')
+    assert doc == {'id': 's1', 'name': 'Gogo'}
+    doc['name'] = 'changed'
+    assert cache.get('sellers', 's1')['name'] == 'Gogo'
+
+    cache.put('sellers', {'id': 's2'})
+    cache.put('sellers', {'id': 's3'})
+    assert cache.stats()['_size']['documents'] == 2
+    assert cache.get('sellers', 's3') is not None
+
+    cache.invalidate('sellers', 's3')
+    assert cache.get('sellers', 's3') is None
+    stats = cache.stats()['sellers']
+    assert stats['hits'] == 3 and stats['misses'] == 2
+
+    short = CatalogCache(maxsize=10, ttl=0.05)
+    short.put('sellers', {'id': 's1'})
+    assert short.get('sellers', 's1') is not None
+    time.sleep(0.1)
+    assert short.get('sellers', 's1') is None
+    print("✅ PASS | copies returned, bounded size, entries expire")
+
+
+def test_stale_lookups():
+    print_header("STALE HANDLE LOOKUPS")
+    cache = CatalogCache(maxsize=10, ttl=60)
+    cache.put_by('sellers', 'handle', 'gogo', {'id': 's1', 'handle': 'gogo'})
+    assert cache.get_by('sellers', 'handle', 'gogo')['id'] == 's1'
+
+    # The document changed handle: the old lookup must not resolve to it
+    cache.put('sellers', {'id': 's1', 'handle': 'gogo2'})
+    assert cache.get_by('sellers', 'handle', 'gogo') is None
+
+    # Invalidating the document drops the lookups pointing at it
+    cache.put_by('sellers', 'handle', 'gogo2', {'id': 's1', 'handle': 'gogo2'})
+    cache.invalidate('sellers', 's1')
+    assert cache.get_by('sellers', 'handle', 'gogo2') is None
+
+    reset()
+    seller_service.create({'handle': 'gogo', 'name': 'Gogo'}, doc_id='s1')
+    assert seller_service.get_by_handle('gogo')['id'] == 's1'
+    seller_service.update('s1', {'handle': 'gogo2'})
+    assert seller_service.get_by_handle('gogo') is None
+    assert seller_service.get_by_handle('gogo2')['id'] == 's1'
+    print("✅ PASS | renamed handles are looked up again")
+
+
+def test_service_invalidation():
+    print_header("UPDATES AND DELETES EVICT")
+    reset()
+    seller_service.create({'name': 'Gogo'}, doc_id='s1')
+    assert seller_service.get('s1')['name'] == 'Gogo'
+    assert catalog_cache.get('sellers', 's1') is not None
+
+    # Written behind the cache's back: the cached copy is still served
+    get_firestore_db().collection('sellers').document('s1').update({'name': 'Direct'})
+    assert seller_service.get('s1')['name'] == 'Gogo'
+
+    seller_service.update('s1', {'name': 'Gogo Kitchen'})
+    assert seller_service.get('s1')['name'] == 'Gogo Kitchen'
+
+    seller_service.delete('s1')
+    assert catalog_cache.get('sellers', 's1') is None
+    assert seller_service.get('s1') is None
+
+    # Opted-out requests read through
+    seller_service.create({'name': 'Gogo'}, doc_id='s2')
+    seller_service.get('s2')
+    get_firestore_db().collection('sellers').document('s2').update({'name': 'Direct'})
+    with app.test_request_context('/'):
+        bypass_catalog_cache()
+        assert seller_service.get('s2')['name'] == 'Direct'
+    print("✅ PASS | service writes evict, bypass reads through")
+
+
+def test_loader_batching():
+    print_header("LOADER BATCHING")
+    fetch, calls = recorder({'a': {'id': 'a'}, 'b': {'id': 'b'}, 'c': {'id': 'c'}})
+    loader = RequestLoader()
+
+    loader.want('sellers', ['a', 'b', 'x'])
+    assert loader.load('sellers', 'c', fetch) == {'id': 'c'}
+    assert calls == [['a', 'b', 'c', 'x']]
+    assert loader.load('sellers', 'a', fetch) == {'id': 'a'}
+    assert loader.load('sellers', 'x', fetch) is None
+    assert len(calls) == 1 and loader.batches == 1
+
+    found = loader.load_many('sellers', ['a', 'b', 'd', 'd', ''], fetch)
+    assert set(found) == {'a', 'b'}
+    assert calls[-1] == ['d']
+
+    loader.forget('sellers', 'a')
+    loader.load('sellers', 'a', fetch)
+    assert calls[-1] == ['a']
+    assert loader.stats() == {'hits': 4, 'misses': 3, 'batches': 3, 'documents': 5}
+
+    # Collections are batched separately
+    loader.want('products', ['a'])
+    loader.load('sellers', 'b', fetch)
+    assert loader.batches == 3
+    print("✅ PASS | one fetch per batch, missing IDs remembered")
+
+
+def test_loader_memo():
+    print_header("LOADER MEMO")
+    loader = RequestLoader()
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return len(computed)
+
+    assert loader.memo('key', compute) == 1
+    assert loader.memo('key', compute) == 1
+    loader.forget_memo('key')
+    assert loader.memo('key', compute) == 2
+
+    reset()
+    with app.test_request_context('/'):
+        assert follow_service.get_followed_seller_ids('u1') == frozenset()
+        follow_service.follow('u1', 's1')
+        assert follow_service.get_followed_seller_ids('u1') == {'s1'}
+        follow_service.unfollow('u1', 's1')
+        assert follow_service.get_followed_seller_ids('u1') == frozenset()
+    print("✅ PASS | computed once, recomputed after writes")
+
+
+def test_request_scope():
+    print_header("ONE LOADER PER REQUEST")
+    reset()
+    catalog_cache.enabled = False
+    try:
+        seller_service.create({'name': 'Gogo'}, doc_id='s1')
+        assert get_request_loader() is None
+
+        with app.test_request_context('/'):
+            loader = get_request_loader()
+            assert loader is get_request_loader()
+            metrics = start_request_metrics()
+
+            seller_service.get('s1')
+            seller_service.get('s1')
+            assert metrics.reads == 1 and loader.hits == 1
+
+            seller_service.update('s1', {'name': 'Gogo Kitchen'})
+            assert seller_service.get('s1')['name'] == 'Gogo Kitchen'
+
+        with app.test_request_context('/'):
+            assert get_request_loader() is not loader
+    finally:
+        catalog_cache.enabled = True
+    print("✅ PASS | reads shared within a request, writes forgotten")
+
+
+def main():
+    """Run all tests"""
+    test_cache_basics()
+    test_stale_lookups()
+    test_service_invalidation()
+    test_loader_batching()
+    test_loader_memo()
+    test_request_scope()
+    print("\n✅ All catalog cache and loader tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Test Suite for Write-Behind and Sharded Counters
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Product views are buffered and written in one batch
+2. Deleted documents and failed writes
+3. Background flushing and the shutdown flush
+4. Sharded counters: spread writes, exact reads, folding into the field
+5. Folds by several workers
+"""
+
+import os
+import sys
+import time
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_service import add_change_listener
+from firebase_db import seller_service, get_product_service
+from firebase_counters import CounterBuffer, ShardedCounter, flush_counters, view_counts
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed():
+    get_firestore_db().reset()
+    view_counts.flush()
+    product_service = get_product_service()
+    for product_id in ('bread', 'shoes'):
+        product_service.create({'name': product_id, 'view_count': 0}, doc_id=product_id)
+
+
+def view_count(product_id):
+    return get_firestore_db().collection('products').document(product_id).get().to_dict()['view_count']
+
+
+def test_buffered_views():
+    print_header("BUFFERED VIEWS")
+    seed()
+    product_service = get_product_service()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        for _ in range(50):
+            product_service.increment_views('bread')
+        product_service.increment_views('shoes')
+        assert metrics.writes == 0, metrics.as_dict()
+
+    assert view_counts.pending('bread') == 50 and view_count('bread') == 0
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        assert view_counts.flush() == {'written': 2, 'failed': 0}
+        # One write per product, however many views
+        assert metrics.writes == 2, metrics.as_dict()
+
+    assert view_count('bread') == 50 and view_count('shoes') == 1
+    assert view_counts.pending('bread') == 0
+    print("✅ PASS | 51 views, 2 writes, none on the request path")
+
+
+def test_failures():
+    print_header("DELETED DOCUMENTS AND FAILED WRITES")
+    seed()
+    buffer = CounterBuffer('products', 'view_count', flush_interval=60)
+
+    buffer.add('bread', 3)
+    buffer.add('gone')
+    assert buffer.flush() == {'written': 1, 'failed': 0}
+    assert buffer.pending('gone') == 0 and view_count('bread') == 3
+
+    # A write that raises keeps the increments for the next flush
+    broken = buffer._service._bulk_write
+    buffer._service._bulk_write = lambda *args, **kwargs: 1 / 0
+    buffer.add('bread', 2)
+    assert buffer.flush() == {'written': 0, 'failed': 1}
+    buffer._service._bulk_write = broken
+    assert buffer.pending('bread') == 2
+    buffer.flush()
+    assert view_count('bread') == 5
+    buffer.close()
+    print("✅ PASS | deleted documents dropped, other failures retried")
+
+
+def test_background_flush():
+    print_header("BACKGROUND AND SHUTDOWN FLUSH")
+    seed()
+    buffer = CounterBuffer('products', 'view_count', flush_interval=0.05)
+
+    buffer.add('bread', 4)
+    for _ in range(100):
+        if view_count('bread') == 4:
+            break
+        time.sleep(0.01)
+    assert view_count('bread') == 4
+
+    view_counts.add('shoes', 7)
+    flush_counters()
+    assert view_count('shoes') == 7
+    print("✅ PASS | flushed by the thread and at shutdown")
+
+
+def follower_count(seller_id):
+    return get_firestore_db().collection('sellers').document(seller_id).get().to_dict()['follower_count']
+
+
+def test_sharded_counter():
+    print_header("SHARDED COUNTER")
+    seed()
+    seller_service.create({'name': 'Gogo Bakery', 'follower_count': 100}, doc_id='s1')
+    followers = ShardedCounter(seller_service, 'follower_count', shards=4, flush_interval=60)
+    changes = []
+    add_change_listener(['sellers'], lambda collection_name, doc_id: changes.append(doc_id))
+
+    for _ in range(40):
+        followers.increment('s1')
+    followers.decrement('s1', 5)
+
+    shards = get_firestore_db().collection('sellers').document('s1').collection('counter_shards').stream()
+    assert len(list(shards)) > 1, "writes should spread over several shards"
+    assert follower_count('s1') == 100
+    assert followers.get('s1') == 135
+
+    # A fresh reader sums the field and the shards in one batched read
+    reader = ShardedCounter(seller_service, 'follower_count', shards=4, flush_interval=60)
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        assert reader.get_many(['s1', 'missing']) == {'s1': 135, 'missing': 0}
+        assert metrics.rpcs == 1, metrics.as_dict()
+
+    updated_at = seller_service.get('s1')['updated_at']
+    assert followers.flush() == {'written': 1, 'failed': 0}
+    assert follower_count('s1') == 135
+    # Folds are not content changes
+    assert changes == [], changes
+    assert get_firestore_db().collection('sellers').document('s1').get().to_dict()['updated_at'] == updated_at
+    assert ShardedCounter(seller_service, 'follower_count', shards=4, flush_interval=60).get('s1') == 135
+    assert followers.flush() == {'written': 0, 'failed': 0}
+    followers.close()
+    reader.close()
+    print("✅ PASS | 41 writes over 4 shards, exact reads, folded into the field")
+
+
+def test_concurrent_folds():
+    print_header("FOLDS BY SEVERAL WORKERS")
+    seed()
+    seller_service.create({'name': 'Gogo Bakery', 'follower_count': 10}, doc_id='s1')
+    workers = [ShardedCounter(seller_service, 'follower_count', shards=3, flush_interval=60) for _ in range(2)]
+
+    for worker in workers:
+        for _ in range(6):
+            worker.increment('s1')
+
+    # Both workers read the same shard values before either folds
+    reads = [worker._read(['s1']) for worker in workers]
+    for worker, read in zip(workers, reads):
+        worker._read = lambda doc_ids, read=read: read
+        worker.flush()
+        del worker._read
+
+    # Folding twice overshoots the field but leaves the shards negative by as much
+    assert workers[0].get_many(['s1']) == {'s1': 22}
+    workers[0].increment('s1')
+    workers[0].flush()
+    assert follower_count('s1') == 23
+    for worker in workers:
+        worker.close()
+    print("✅ PASS | value preserved when two workers fold the same shards")
+
+
+def main():
+    """Run all tests"""
+    test_buffered_views()
+    test_failures()
+    test_background_flush()
+    test_sharded_counter()
+    test_concurrent_folds()
+    print("\n✅ All counter tests passed")
+
+
+if __name__ == '__main__':
+    main()
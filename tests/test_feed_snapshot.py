@@ -0,0 +1,142 @@
+"""
+Test Suite for the Materialized Marketplace Feed
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Feed ranking, product selection and video ordering
+2. Serving from the worker copy and from the stored snapshot
+3. Background rebuild after a product change
+4. Rebuilds debounced during bursts of writes
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_db import seller_service, video_service, get_product_service
+from marketplace.feed import FeedSnapshot, feed_snapshot
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed():
+    """Two sellers with products (one subscribed), one without, plus videos"""
+    get_firestore_db().reset()
+    product_service = get_product_service()
+
+    seller_service.create({'name': 'Gogo', 'avg_rating': 4.0}, doc_id='s1')
+    seller_service.create({'name': 'Thabo', 'avg_rating': 3.0, 'is_subscribed': True}, doc_id='s2')
+    seller_service.create({'name': 'Empty'}, doc_id='s3')
+
+    for i in range(8):
+        product_service.create({'seller_id': 's1', 'name': f'p{i}', 'total_sales': i, 'is_active': True,
+                                'description': 'long text'})
+    product_service.create({'seller_id': 's2', 'name': 'hidden', 'total_sales': 99, 'is_active': False})
+    product_service.create({'seller_id': 's2', 'name': 'bread', 'total_sales': 1, 'is_active': True})
+
+    video_service.create({'seller_id': 's1', 'video_type': 'conclusion', 'is_active': True})
+    video_service.create({'seller_id': 's1', 'video_type': 'intro', 'is_active': True})
+
+
+def test_feed_contents():
+    print_header("FEED CONTENTS")
+    seed()
+    feed_snapshot.rebuild()
+    sellers = feed_snapshot.get()
+
+    assert [s['id'] for s in sellers] == ['s2', 's1']
+    assert [p['name'] for p in sellers[0]['products']] == ['bread']
+    assert [p['total_sales'] for p in sellers[1]['products']] == [7, 6, 5, 4, 3, 2]
+    assert [v['video_type'] for v in sellers[1]['videos']] == ['intro', 'conclusion']
+    # Only the product fields the feed uses are read and stored
+    assert 'description' not in sellers[1]['products'][0]
+    print("✅ PASS | ranking, top products and video order")
+
+
+def test_served_from_snapshot():
+    print_header("SERVING")
+    seed()
+    feed_snapshot.rebuild()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        feed_snapshot.get()
+        assert metrics.rpcs == 0
+
+        # A fresh worker reads the stored snapshot with a single query
+        worker = FeedSnapshot(ttl=300)
+        assert [s['id'] for s in worker.get()] == ['s2', 's1']
+        assert metrics.rpcs == 1 and metrics.queries == 1
+    print("✅ PASS | worker copy costs nothing, stored snapshot one query")
+
+
+def test_rebuilt_after_change():
+    print_header("REBUILD ON CHANGE")
+    seed()
+    worker = FeedSnapshot(ttl=300)
+    assert len(worker.get()) == 2
+
+    get_product_service().create({'seller_id': 's3', 'name': 'new', 'is_active': True})
+    worker.mark_stale()
+
+    # The current copy is served while one background rebuild runs
+    assert 's3' not in [s['id'] for s in worker.get()]
+    worker.wait(5)
+    assert 's3' in [s['id'] for s in worker.get()]
+
+    expired = FeedSnapshot(ttl=0)
+    assert len(expired.get()) == 3
+    print("✅ PASS | product writes and expiry trigger a rebuild, served from the old copy meanwhile")
+
+
+def test_rebuilds_debounced():
+    print_header("DEBOUNCED REBUILDS")
+    seed()
+    worker = FeedSnapshot(ttl=300, rebuild_interval=60)
+    worker.get()
+
+    get_product_service().create({'seller_id': 's3', 'name': 'new', 'is_active': True})
+    for _ in range(20):
+        worker.mark_stale()
+        with app.test_request_context('/'):
+            metrics = start_request_metrics()
+            assert len(worker.get()) == 2
+            # No request reads or rebuilds inline
+            assert metrics.rpcs == 0, metrics.as_dict()
+    assert worker._rebuild_thread is None
+
+    worker.rebuild_interval = 0
+    worker.get()
+    worker.wait(5)
+    assert len(worker.get()) == 3
+    print("✅ PASS | a burst of writes waits for the rebuild interval")
+
+
+def main():
+    """Run all tests"""
+    test_feed_contents()
+    test_served_from_snapshot()
+    test_rebuilt_after_change()
+    test_rebuilds_debounced()
+    print("\n✅ All feed snapshot tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Test Suite for Firestore Request Metrics
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Point reads, batched reads, queries and aggregations are counted
+2. Direct, batched, transactional and bulk writes are counted
+3. Fan-out queries are counted from worker threads
+4. Nothing is recorded outside a request
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_admin import firestore
+from firebase_config import initialize_firebase, get_firestore_db
+from firebase_metrics import start_request_metrics, get_request_metrics
+from firebase_service import FirebaseService
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def make_service():
+    """Fresh service with three documents"""
+    initialize_firebase()
+    get_firestore_db().reset()
+    service = FirebaseService('widgets')
+    service.bulk_create([{'n': i} for i in range(3)], doc_ids=['a', 'b', 'c'])
+    return service
+
+
+def test_reads_are_counted():
+    print_header("READS")
+    service = make_service()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        service.get('a')
+        service.get('b')
+        service.get_map(['a', 'b', 'c'])
+        service.query([('n', '>=', 1)])
+        service.count()
+
+        assert metrics.point_reads == 2
+        assert metrics.batch_reads == 3
+        assert metrics.queries == 1 and metrics.streamed_docs == 2
+        assert metrics.aggregations == 1
+        assert metrics.reads == 7
+        assert metrics.db_time > 0
+        assert metrics.server_timing().startswith('firestore;dur=')
+    print("✅ PASS | point, batched, query and aggregation reads")
+
+
+def test_writes_are_counted():
+    print_header("WRITES")
+    service = make_service()
+    db = get_firestore_db()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        service.update('a', {'n': 10})
+
+        batch = db.batch()
+        batch.update(service.collection.document('b'), {'n': 11})
+        batch.update(service.collection.document('c'), {'n': 12})
+        batch.commit()
+
+        @firestore.transactional
+        def bump(transaction):
+            snapshot = service.collection.document('a').get(transaction=transaction)
+            transaction.update(snapshot.reference, {'n': snapshot.to_dict()['n'] + 1})
+
+        bump(db.transaction())
+        service.bulk_delete(['b', 'c'])
+
+        assert metrics.writes == 6, metrics.as_dict()
+        assert service.get('a')['n'] == 11
+    print("✅ PASS | direct, batched, transactional and bulk writes")
+
+
+def test_fan_out_is_counted():
+    print_header("FAN-OUT")
+    service = make_service()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        service.fan_out([[('n', '==', 0)], [('n', '==', 1)], [('n', '==', 2)]])
+        assert metrics.queries == 3 and metrics.streamed_docs == 3
+    print("✅ PASS | queries run in worker threads are attributed to the request")
+
+
+def test_no_metrics_outside_requests():
+    print_header("OUTSIDE REQUESTS")
+    service = make_service()
+    assert get_request_metrics() is None
+    assert service.get('a')['n'] == 0
+    print("✅ PASS | calls outside a request are not recorded")
+
+
+def main():
+    """Run all tests"""
+    for test in [test_reads_are_counted, test_writes_are_counted, test_fan_out_is_counted,
+                 test_no_metrics_outside_requests]:
+        test()
+    print("\n✅ All Firestore metrics tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Test Suite for the Rendered Fragment Cache
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Hits, misses and LRU bounds
+2. Seller cards reused until the seller or its videos change
+3. Counter values are part of the card's version
+4. No viewer state in the shared card HTML
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask, render_template_string
+from fragment_cache import FragmentCache, cached_fragment, fragment_cache
+
+
+app = Flask(__name__, template_folder=os.path.join(ROOT, 'marketplace', 'templates'))
+app.add_template_global(cached_fragment)
+
+FEED = ("{% for seller in sellers %}{{ cached_fragment('seller_card.html', seller, seller.videos, "
+        "version_extra=(seller.follower_count, seller.likes_count, seller.avg_rating), seller=seller) }}{% endfor %}")
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def make_seller(seller_id, updated_at=NOW, video_title='Meet us'):
+    return {
+        'id': seller_id, 'name': f'Seller {seller_id}', 'handle': seller_id, 'location': 'Durban',
+        'follower_count': 3, 'likes_count': 7, 'avg_rating': 4.5, 'updated_at': updated_at,
+        'videos': [{'id': f'{seller_id}_v1', 'title': video_title, 'video_type': 'intro', 'updated_at': NOW}],
+    }
+
+
+def test_cache_bounds():
+    print_header("HITS, MISSES AND LRU BOUNDS")
+    cache = FragmentCache(maxsize=2)
+    renders = []
+
+    def render(name):
+        return lambda: renders.append(name) or f'<p>{name}</p>'
+
+    assert cache.get_or_render('a', render('a')) == '<p>a</p>'
+    assert cache.get_or_render('a', render('a')) == '<p>a</p>'
+    cache.get_or_render('b', render('b'))
+    cache.get_or_render('c', render('c'))
+    cache.get_or_render('a', render('a'))
+    assert renders == ['a', 'b', 'c', 'a'], renders
+    assert cache.stats()['size'] == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 4
+
+    disabled = FragmentCache(maxsize=2, enabled=False)
+    disabled.get_or_render('a', render('a'))
+    disabled.get_or_render('a', render('a'))
+    assert renders[-2:] == ['a', 'a'] and disabled.stats()['size'] == 0
+    print("✅ PASS | reuse, eviction of the least recently used, disabled cache")
+
+
+def test_seller_cards():
+    print_header("SELLER CARDS")
+    fragment_cache.clear()
+    sellers = [make_seller('s1'), make_seller('s2')]
+
+    with app.test_request_context('/'):
+        first = render_template_string(FEED, sellers=sellers)
+        assert 'Seller s1' in first and 'Meet us' in first
+        assert render_template_string(FEED, sellers=sellers) == first
+        assert fragment_cache.stats()['misses'] == 2 and fragment_cache.stats()['hits'] == 2
+
+        # A changed seller or video gets a new version; the other card is reused
+        renamed = make_seller('s1', updated_at=NOW + timedelta(seconds=1))
+        renamed['name'] = 'Renamed'
+        retitled = make_seller('s2')
+        retitled['videos'][0].update(title='New video', updated_at=NOW + timedelta(seconds=1))
+        html = render_template_string(FEED, sellers=[renamed, retitled])
+        s1_card, s2_card = html.split('<div class="seller-card"')[1:]
+        assert 'Renamed' in s1_card and 'New video' in s2_card and 'Meet us' not in s2_card
+
+        render_template_string(FEED, sellers=[renamed, sellers[1]])
+        assert fragment_cache.stats()['misses'] == 4 and fragment_cache.stats()['hits'] == 4
+    print("✅ PASS | cards re-rendered only for new seller/video versions")
+
+
+def test_counters_in_version():
+    print_header("COUNTERS WRITTEN WITHOUT updated_at")
+    fragment_cache.clear()
+
+    with app.test_request_context('/'):
+        render_template_string(FEED, sellers=[make_seller('s1')])
+        # Folded follower/like counts keep the seller's updated_at
+        counted = {**make_seller('s1'), 'follower_count': 4, 'likes_count': 8}
+        html = render_template_string(FEED, sellers=[counted])
+    assert '4 followers' in html and '<span class="like-count">8</span>' in html
+    assert fragment_cache.stats()['misses'] == 2
+    print("✅ PASS | new counts re-render the card")
+
+
+def test_no_viewer_state():
+    print_header("NO VIEWER STATE IN SHARED HTML")
+    fragment_cache.clear()
+    seller = {**make_seller('s1'), 'is_following': True, 'is_liked': True}
+
+    with app.test_request_context('/'):
+        html = render_template_string(FEED, sellers=[seller])
+    assert 'Following' not in html
+    assert 'follow-btn following' not in html and 'like-btn liked' not in html
+    print("✅ PASS | follow/like state is left to the page")
+
+
+def main():
+    """Run all tests"""
+    test_cache_bounds()
+    test_seller_cards()
+    test_counters_in_version()
+    test_no_viewer_state()
+    print("\n✅ All fragment cache tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Test Suite for Geohash Radius Search
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Geohash encoding and query bounds covering the radius
+2. Sellers within a radius, nearest first, without reading distant ones
+   (non-finite and non-positive radii rejected)
+3. Nearby deliverers (active and verified only)
+4. Product search restricted to nearby sellers
+"""
+
+import math
+import os
+import random
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_geo import encode, geo_fields, haversine_km, parse_radius, query_bounds
+from firebase_db import seller_service, deliverer_service, get_product_service, get_user_service
+from deliverer.utils import calculate_delivery_distance
+from search import product_search
+from api import api_bp
+
+
+app = Flask(__name__)
+app.register_blueprint(api_bp, url_prefix='/api')
+
+SOWETO = (-26.2485, 27.8540)
+SANDTON = (-26.1076, 28.0567)
+DURBAN = (-29.8587, 31.0218)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def test_geohash():
+    print_header("GEOHASH")
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert calculate_delivery_distance(*SOWETO, *SANDTON) == round(haversine_km(*SOWETO, *SANDTON), 2)
+
+    # Every point within the radius falls in one of the ranges
+    rng = random.Random(7)
+    for _ in range(200):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        radius = rng.choice([0.5, 5, 25, 150])
+        bounds = query_bounds(lat, lon, radius)
+        assert len(bounds) <= 9
+        for _ in range(20):
+            distance, bearing = rng.uniform(0, radius), rng.uniform(0, 2 * math.pi)
+            point_lat = lat + distance / 111.2 * math.cos(bearing)
+            point_lon = lon + distance / (111.2 * math.cos(math.radians(lat))) * math.sin(bearing)
+            geohash = encode(point_lat, (point_lon + 180) % 360 - 180)
+            assert any(start <= geohash < end for start, end in bounds)
+    print("✅ PASS | encoding and radius coverage")
+
+
+def seed():
+    get_firestore_db().reset()
+    product_search.reset()
+    seller_service.create({'name': 'Soweto Eats', **geo_fields(*SOWETO)}, doc_id='soweto')
+    seller_service.create({'name': 'Sandton Tech', **geo_fields(*SANDTON)}, doc_id='sandton')
+    seller_service.create({'name': 'Durban Surf', **geo_fields(*DURBAN)}, doc_id='durban')
+    seller_service.create({'name': 'No Coordinates'}, doc_id='unknown')
+
+
+def test_sellers_within_radius():
+    print_header("SELLERS WITHIN RADIUS")
+    seed()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        nearby = seller_service.within_radius(-26.20, 27.90, radius_km=30)
+        assert [s['id'] for s in nearby] == ['soweto', 'sandton']
+        assert nearby[0]['distance_km'] < nearby[1]['distance_km'] <= 30
+        assert metrics.streamed_docs == 2, metrics.as_dict()
+
+    assert [s['id'] for s in seller_service.within_radius(-26.20, 27.90, radius_km=5)] == []
+    print("✅ PASS | nearest first, distant sellers never read")
+
+
+def test_radius_validation():
+    print_header("RADIUS AND LIMIT VALIDATION")
+    seed()
+    assert parse_radius(None, 10, 100) == 10 and parse_radius('500', 10, 100) == 100
+    for bad in ('nan', 'inf', '-5', '0', 'far'):
+        try:
+            parse_radius(bad, 10, 100)
+        except ValueError:
+            continue
+        raise AssertionError(f"radius {bad!r} accepted")
+
+    client = app.test_client()
+    for bad in ('nan', '-1', '0'):
+        response = client.get(f'/api/marketplace/sellers/nearby?lat=-26.2&lon=27.9&radius_km={bad}')
+        assert response.status_code == 400, bad
+
+    # limit is clamped to 1..100 (0 used to mean "everything")
+    response = client.get('/api/marketplace/sellers/nearby?lat=-26.2&lon=27.9&radius_km=30&limit=0')
+    assert response.get_json()['count'] == 1
+    print("✅ PASS | non-finite and non-positive radii rejected, limit clamped")
+
+
+def test_nearby_deliverers():
+    print_header("NEARBY DELIVERERS")
+    seed()
+    get_user_service().create({'email': 'driver@example.com'}, doc_id='u1')
+    deliverer_service.create({'user_id': 'u1', 'is_active': True, 'is_verified': True}, doc_id='d1')
+    deliverer_service.create({'user_id': 'u2', 'is_active': True, 'is_verified': False}, doc_id='d2')
+    deliverer_service.set_location('d1', *SANDTON)
+    deliverer_service.set_location('d2', *SANDTON)
+
+    nearby = deliverer_service.get_nearby(*SOWETO, radius_km=40)
+    assert [d['id'] for d in nearby] == ['d1']
+    assert deliverer_service.get_nearby(*DURBAN, radius_km=40) == []
+
+    try:
+        deliverer_service.set_location('d1', 200, 0)
+        assert False, "invalid coordinates should raise"
+    except ValueError:
+        pass
+    print("✅ PASS | geohash stored on location updates, filters applied")
+
+
+def test_products_near_buyer():
+    print_header("PRODUCTS NEAR BUYER")
+    seed()
+    product_service = get_product_service()
+    product_service.create({'seller_id': 'soweto', 'name': 'Kota'}, doc_id='kota')
+    product_service.create({'seller_id': 'durban', 'name': 'Bunny Chow'}, doc_id='bunny')
+
+    nearby = {s['id'] for s in seller_service.within_radius(*SOWETO, radius_km=10)}
+    result = product_search.faceted_search(seller_ids=nearby)
+    assert [p['id'] for p in result['products']] == ['kota']
+    print("✅ PASS | search restricted to nearby sellers")
+
+
+def main():
+    """Run all tests"""
+    test_geohash()
+    test_sellers_within_radius()
+    test_radius_validation()
+    test_nearby_deliverers()
+    test_products_near_buyer()
+    print("\n✅ All geo tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Test Suite for Conditional GETs (ETag / Last-Modified / 304)
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Validators follow updated_at and the viewer
+2. If-None-Match / If-Modified-Since on the product API
+3. Product list answers 304 until a product changes
+4. Search results paged with offset cursors
+5. Counters shown on pages are part of their validators
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, session
+from jinja2 import DictLoader
+from firebase_config import get_firestore_db
+from firebase_cache import catalog_cache
+from firebase_db import seller_service, get_product_service
+from http_cache import Validator
+from search import product_search
+from api import api_bp
+from marketplace import marketplace_bp
+
+
+app = Flask(__name__)
+app.secret_key = 'test'
+app.register_blueprint(api_bp, url_prefix='/api')
+app.register_blueprint(marketplace_bp, url_prefix='/marketplace')
+# Stand-ins for the page templates: only the counters matter here
+app.jinja_loader = DictLoader({
+    'seller_detail.html': '{{ seller.follower_count }}',
+    'product_detail.html': '{{ product.view_count }}',
+})
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed():
+    get_firestore_db().reset()
+    catalog_cache.clear()
+    product_search.reset()
+    seller_service.create({'name': 'Gogo Bakery', 'handle': 'gogo'}, doc_id='s1')
+    get_product_service().create({'seller_id': 's1', 'name': 'Fresh Bread', 'price': 25, 'is_active': True}, doc_id='bread')
+
+
+def test_validator():
+    print_header("VALIDATORS")
+    product = {'id': 'p1', 'updated_at': NOW + timedelta(microseconds=500)}
+
+    with app.test_request_context('/'):
+        first = Validator([product, None])
+        assert Validator([product]).etag == first.etag
+        assert Validator([{**product, 'view_count': 9}]).etag == first.etag
+        assert Validator([{**product, 'updated_at': NOW + timedelta(seconds=1)}]).etag != first.etag
+        assert Validator([product], 'page 2').etag != first.etag
+        assert first.last_modified == NOW
+
+        private = Validator([product], private=True)
+        assert private.last_modified is None
+        session['user'] = {'id': 'u1'}
+        assert Validator([product], private=True).etag != private.etag
+
+    with app.test_request_context('/', headers={'If-Modified-Since': 'Thu, 01 Jan 2026 00:00:00 GMT'}):
+        assert Validator([product]).is_fresh()
+        assert not Validator([{**product, 'updated_at': NOW + timedelta(seconds=1)}]).is_fresh()
+    print("✅ PASS | updated_at, extra values and the session user")
+
+
+def test_product_detail():
+    print_header("PRODUCT API")
+    seed()
+    client = app.test_client()
+
+    response = client.get('/api/marketplace/product/bread')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and response.headers['Cache-Control'] == 'public, no-cache'
+    assert response.headers['Last-Modified']
+
+    cached = client.get('/api/marketplace/product/bread', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    since = client.get('/api/marketplace/product/bread',
+                       headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert since.status_code == 304
+
+    # A seller write changes the response too
+    seller_service.update('s1', {'name': 'Gogo Bakes'})
+    changed = client.get('/api/marketplace/product/bread', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert changed.get_json()['product']['seller']['name'] == 'Gogo Bakes'
+    print("✅ PASS | 304 for current copies, 200 after a write")
+
+
+def test_product_list():
+    print_header("PRODUCT LIST API")
+    seed()
+    client = app.test_client()
+
+    etag = client.get('/api/marketplace/products').headers['ETag']
+    assert client.get('/api/marketplace/products', headers={'If-None-Match': etag}).status_code == 304
+    # Other pages and searches have their own validators
+    assert client.get('/api/marketplace/products?search=bread', headers={'If-None-Match': etag}).status_code == 200
+
+    get_product_service().create({'seller_id': 's1', 'name': 'Vetkoek', 'price': 12, 'is_active': True}, doc_id='vetkoek')
+    fresh = client.get('/api/marketplace/products', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.get_json()['count'] == 2
+    print("✅ PASS | new products invalidate the list")
+
+
+def test_search_pages():
+    print_header("SEARCH RESULT PAGES")
+    seed()
+    for name in ('Rye Bread', 'Banana Bread'):
+        get_product_service().create({'seller_id': 's1', 'name': name, 'price': 30, 'is_active': True})
+    client = app.test_client()
+
+    seen, cursor = [], None
+    for _ in range(5):
+        query = '/api/marketplace/products?search=bread&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(query).get_json()
+        seen += [product['name'] for product in page['products']]
+        assert page['has_more'] == (page['next_cursor'] is not None)
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert sorted(seen) == ['Banana Bread', 'Fresh Bread', 'Rye Bread']
+    assert client.get('/api/marketplace/products?search=bread&cursor=nonsense').status_code == 400
+    assert client.get('/api/marketplace/products?search=bread&limit=100000').get_json()['limit'] == 100
+    print("✅ PASS | every result reachable through next_cursor")
+
+
+def test_counters_version_pages():
+    print_header("COUNTERS ON PAGES")
+    seed()
+    client = app.test_client()
+    db = get_firestore_db()
+
+    def etag(path):
+        return client.get(path).headers['ETag']
+
+    def count_write(collection_name, doc_id, data):
+        # Like a counter flush or shard fold: updated_at is left alone
+        db.collection(collection_name).document(doc_id).update(data)
+        catalog_cache.clear()
+
+    seller_page = etag('/marketplace/seller/gogo')
+    assert client.get('/marketplace/seller/gogo', headers={'If-None-Match': seller_page}).status_code == 304
+    count_write('sellers', 's1', {'follower_count': 5})
+    followed = etag('/marketplace/seller/gogo')
+    assert followed != seller_page
+    count_write('products', 'bread', {'total_sales': 3})
+    assert etag('/marketplace/seller/gogo') != followed
+
+    product_page = etag('/marketplace/product/bread')
+    assert client.get('/marketplace/product/bread', headers={'If-None-Match': product_page}).status_code == 304
+    count_write('products', 'bread', {'view_count': 40})
+    assert client.get('/marketplace/product/bread', headers={'If-None-Match': product_page}).status_code == 200
+    print("✅ PASS | follower, sales and view counts change the pages' validators")
+
+
+def main():
+    """Run all tests"""
+    test_validator()
+    test_product_detail()
+    test_product_list()
+    test_search_pages()
+    test_counters_version_pages()
+    print("\n✅ All conditional GET tests passed")
+
+
+if __name__ == '__main__':
+    main()
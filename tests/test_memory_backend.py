@@ -0,0 +1,248 @@
+"""
+Test Suite for the In-Memory Firestore Backend
+
+Runs FirebaseService against firebase_memory.MemoryFirestore (no Firebase project needed).
+
+Tests:
+1. Document create/get/update/delete and transforms
+2. Filters, ordering and limits
+3. Batched reads (get_map)
+4. Cursor pagination
+5. Aggregations
+6. Streaming and fan-out queries
+7. Bulk writes
+8. Batches and transactions
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1.base_query import FieldFilter, Or
+from firebase_config import initialize_firebase, get_firestore_db
+from firebase_service import FirebaseService
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def make_service(collection_name='items'):
+    """Fresh service over an empty in-memory database"""
+    initialize_firebase()
+    get_firestore_db().reset()
+    return FirebaseService(collection_name)
+
+
+def seed(service, count=10):
+    """Create `count` documents with predictable fields"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    docs = [
+        {'n': i, 'group': 'even' if i % 2 == 0 else 'odd', 'price': float(i),
+         'tags': [f't{i % 3}'], 'created': start + timedelta(hours=i)}
+        for i in range(count)
+    ]
+    return service.bulk_create(docs, doc_ids=[f'doc{i:02d}' for i in range(count)])
+
+
+def test_document_crud():
+    print_header("DOCUMENT CRUD")
+    service = make_service()
+
+    doc_id = service.create({'name': 'Maize', 'stock': 5})
+    doc = service.get(doc_id)
+    assert doc['name'] == 'Maize'
+    assert isinstance(doc['created_at'], datetime)
+
+    db = get_firestore_db()
+    ref = db.collection('items').document(doc_id)
+    ref.update({'stock': firestore.Increment(3), 'tags': firestore.ArrayUnion(['grain', 'grain'])})
+    ref.update({'meta.source': 'farm'})
+    doc = service.get(doc_id)
+    assert doc['stock'] == 8
+    assert doc['tags'] == ['grain']
+    assert doc['meta'] == {'source': 'farm'}
+
+    ref.set({'colour': 'white'}, merge=True)
+    assert service.get(doc_id)['stock'] == 8
+
+    try:
+        db.collection('items').document('missing').update({'stock': 1})
+        assert False, "update of a missing document should raise NotFound"
+    except NotFound:
+        pass
+
+    service.delete(doc_id)
+    assert service.get(doc_id) is None
+    print("✅ PASS | create/get/update/delete")
+
+
+def test_filters_and_ordering():
+    print_header("FILTERS AND ORDERING")
+    service = make_service()
+    seed(service)
+
+    docs = service.query([('group', '==', 'even'), ('n', '>=', 4)], order_by='n', direction='DESCENDING')
+    assert [d['n'] for d in docs] == [8, 6, 4]
+
+    docs = service.query([('n', 'in', [1, 3, 42])], order_by='n')
+    assert [d['n'] for d in docs] == [1, 3]
+
+    docs = service.query([('tags', 'array_contains', 't0')], order_by='n', limit=2)
+    assert [d['n'] for d in docs] == [0, 3]
+
+    docs = service.query([Or([FieldFilter('n', '==', 1), FieldFilter('n', '==', 9)])], order_by='n')
+    assert [d['n'] for d in docs] == [1, 9]
+
+    docs = service.query([('n', '<=', 2)], fields=['n'])
+    assert all(set(d) == {'n', 'id'} for d in docs)
+
+    # Firestore returns whole documents for an empty projection; IDs only for __name__
+    collection = get_firestore_db().collection(service.collection_name)
+    assert all('group' in doc.to_dict() for doc in collection.select([]).stream())
+    assert all(doc.to_dict() == {} and doc.id for doc in collection.select(['__name__']).stream())
+    print("✅ PASS | where/order_by/limit/select")
+
+
+def test_get_map():
+    print_header("BATCHED READS")
+    service = make_service()
+    seed(service)
+
+    db = get_firestore_db()
+    before = db.rpc_count
+    docs = service.get_map(['doc01', 'doc02', 'doc01', 'nope'])
+    assert set(docs) == {'doc01', 'doc02'}
+    assert db.rpc_count - before == 1
+    print("✅ PASS | get_map uses one round trip")
+
+
+def test_paginate():
+    print_header("CURSOR PAGINATION")
+    service = make_service()
+    seed(service, count=7)
+
+    seen, cursor = [], None
+    while True:
+        page = service.paginate(order_by='created', page_size=3, cursor=cursor)
+        seen.extend(d['n'] for d in page['items'])
+        if not page['has_more']:
+            assert page['next_cursor'] is None
+            break
+        cursor = page['next_cursor']
+
+    assert seen == [6, 5, 4, 3, 2, 1, 0]
+    print("✅ PASS | pages cover every document exactly once")
+
+
+def test_aggregate():
+    print_header("AGGREGATIONS")
+    service = make_service()
+    seed(service)
+
+    totals = service.aggregate([('group', '==', 'odd')], sum_fields=['price'], avg_fields=['price'])
+    assert totals == {'count': 5, 'sum_price': 25.0, 'avg_price': 5.0}
+    assert service.count([('n', '>', 100)]) == 0
+    assert service.avg('price', [('n', '>', 100)]) is None
+
+    # Unread messages not sent by the user, including ones without a sender_id
+    from firebase_db import message_service
+    messages = get_firestore_db().collection('messages')
+    for doc_id, data in {'own': {'sender_id': 'u1'}, 'theirs': {'sender_id': 'u2'}, 'system': {},
+                         'read': {'sender_id': 'u2', 'is_read': True}}.items():
+        messages.document(doc_id).set({'conversation_id': 'c1', 'is_read': False, **data})
+    assert message_service.get_conversation_unread_count('c1', 'u1') == 2
+    print("✅ PASS | count/sum/avg")
+
+
+def test_iter_query_and_fan_out():
+    print_header("STREAMING AND FAN-OUT")
+    service = make_service()
+    seed(service, count=25)
+
+    streamed = list(service.iter_query(order_by='n', page_size=4))
+    assert [d['n'] for d in streamed] == list(range(25))
+
+    docs = service.fan_out([[('n', '==', 3)], [('n', '<', 2)], [('n', '==', 3)]], order_by='n')
+    assert [d['n'] for d in docs] == [0, 1, 3]
+    print("✅ PASS | iter_query/fan_out")
+
+
+def test_bulk_writes():
+    print_header("BULK WRITES")
+    service = make_service()
+    result = seed(service)
+    assert result['written'] == 10 and result['failed'] == 0
+
+    result = service.bulk_update({'doc01': {'n': 100}, 'missing': {'n': 1}})
+    assert result['written'] == 1 and result['failed'] == 1
+    assert result['errors'][0]['id'] == 'missing'
+    assert service.get('doc01')['n'] == 100
+
+    result = service.bulk_delete(['doc01', 'doc02'])
+    assert result['written'] == 2
+    assert service.count() == 8
+    print("✅ PASS | bulk_create/bulk_update/bulk_delete")
+
+
+def test_batch_and_transaction():
+    print_header("BATCHES AND TRANSACTIONS")
+    service = make_service('wallets')
+    service.create({'balance': 100}, doc_id='a')
+    service.create({'balance': 0}, doc_id='b')
+
+    db = get_firestore_db()
+    a_ref, b_ref = db.collection('wallets').document('a'), db.collection('wallets').document('b')
+
+    @firestore.transactional
+    def transfer(transaction, amount):
+        balance = a_ref.get(transaction=transaction).to_dict()['balance']
+        if balance < amount:
+            raise ValueError("Insufficient balance")
+        transaction.update(a_ref, {'balance': firestore.Increment(-amount)})
+        transaction.update(b_ref, {'balance': firestore.Increment(amount)})
+
+    transfer(db.transaction(), 60)
+    assert service.get('a')['balance'] == 40 and service.get('b')['balance'] == 60
+
+    try:
+        transfer(db.transaction(), 60)
+        assert False, "transfer should fail"
+    except ValueError:
+        pass
+    assert service.get('a')['balance'] == 40
+
+    batch = db.batch()
+    batch.set(db.collection('wallets').document('c'), {'balance': 5})
+    batch.update(db.collection('wallets').document('missing'), {'balance': 1})
+    try:
+        batch.commit()
+        assert False, "batch with a missing document should fail"
+    except NotFound:
+        pass
+    assert service.get('c') is None
+    print("✅ PASS | transactional/batch are atomic")
+
+
+def main():
+    """Run all tests"""
+    tests = [test_document_crud, test_filters_and_ordering, test_get_map, test_paginate,
+             test_aggregate, test_iter_query_and_fan_out, test_bulk_writes, test_batch_and_transaction]
+    for test in tests:
+        test()
+    print("\n✅ All in-memory backend tests passed")
+
+
+if __name__ == '__main__':
+    main()
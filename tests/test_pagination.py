@@ -0,0 +1,125 @@
+"""
+Test Suite for Cursor Pagination
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Cursor round-trips (strings, numbers, datetimes, offsets)
+2. Tampered and mismatched cursors
+3. Paging through a collection with paginate()
+"""
+
+import base64
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_pagination import (
+    InvalidCursor, encode_cursor, decode_cursor, encode_offset_cursor, decode_offset_cursor
+)
+from firebase_service import FirebaseService
+from api import api_bp
+
+
+app = Flask(__name__)
+app.register_blueprint(api_bp, url_prefix='/api')
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def rejected(decode, *args):
+    try:
+        decode(*args)
+    except InvalidCursor:
+        return True
+    return False
+
+
+def test_round_trips():
+    print_header("CURSOR ROUND-TRIPS")
+    for value in ('Bread', 42, 1.5, None):
+        assert decode_cursor(encode_cursor('name', value, 'd1'), 'name') == {'name': value, '__name__': 'd1'}
+
+    # Datetimes keep their instant; naive ones are taken as UTC
+    position = decode_cursor(encode_cursor('created_at', NOW + timedelta(microseconds=7), 'd2'), 'created_at')
+    assert position == {'created_at': NOW + timedelta(microseconds=7), '__name__': 'd2'}
+    naive = decode_cursor(encode_cursor('created_at', datetime(2026, 1, 1), 'd3'), 'created_at')
+    assert naive['created_at'] == NOW
+
+    cursor = encode_cursor('name', 'Bread', 'd1')
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+    assert decode_offset_cursor(encode_offset_cursor(40)) == 40
+    print("✅ PASS | values, datetimes and offsets survive the round-trip")
+
+
+def test_tampered_cursors():
+    print_header("TAMPERED CURSORS")
+    assert rejected(decode_cursor, 'not a cursor!', 'name')
+    assert rejected(decode_cursor, token({'f': 'name', 'v': 1}), 'name')
+    assert rejected(decode_cursor, token({'f': 'name', 'v': 1, 'id': 5}), 'name')
+    assert rejected(decode_cursor, encode_cursor('price', 1, 'd1'), 'name')
+    assert rejected(decode_cursor, token({'f': 'created_at', 'v': {'$dt': 'garbage'}, 'id': 'd1'}), 'created_at')
+    assert rejected(decode_cursor, token({'f': 'created_at', 'v': {'$dt': 5}, 'id': 'd1'}), 'created_at')
+
+    for payload in ({'o': -1}, {'o': 'ten'}, {'o': True}, {'f': 'name'}):
+        assert rejected(decode_offset_cursor, token(payload)), payload
+    assert rejected(decode_offset_cursor, encode_cursor('name', 'x', 'd1'))
+
+    # The APIs answer 400, not 500
+    client = app.test_client()
+    bad = token({'f': 'created_at', 'v': {'$dt': 'garbage'}, 'id': 'd1'})
+    assert client.get(f'/api/marketplace/products?cursor={bad}').status_code == 400
+    print("✅ PASS | malformed, mismatched and crafted cursors raise InvalidCursor")
+
+
+def test_paginate():
+    print_header("PAGINATE")
+    db = get_firestore_db()
+    db.reset()
+    for i in range(7):
+        db.collection('pages').document(f'd{i}').set({'n': i, 'created_at': NOW + timedelta(minutes=i)})
+    service = FirebaseService('pages')
+
+    seen, cursor = [], None
+    while True:
+        page = service.paginate(order_by='created_at', direction='DESCENDING', page_size=3, cursor=cursor)
+        seen += [doc['n'] for doc in page['items']]
+        if not page['has_more']:
+            assert page['next_cursor'] is None
+            break
+        cursor = page['next_cursor']
+    assert seen == [6, 5, 4, 3, 2, 1, 0]
+    assert rejected(service.paginate, None, 'n', 'ASCENDING', 3, cursor)
+    print("✅ PASS | every document once, newest first")
+
+
+def main():
+    """Run all tests"""
+    test_round_trips()
+    test_tampered_cursors()
+    test_paginate()
+    print("\n✅ All pagination tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Test Suite for the Product Detail Bundle
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Product, seller, reviews and reviewers in three round trips
+2. ?expand= on the product API
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_cache import catalog_cache
+from firebase_metrics import start_request_metrics
+from firebase_db import seller_service, review_service, get_product_service, get_user_service
+from marketplace.product_bundle import ProductBundle, parse_expand
+from search import product_search
+from api import api_bp
+
+
+app = Flask(__name__)
+app.secret_key = 'test'
+app.register_blueprint(api_bp, url_prefix='/api')
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed(reviews=8):
+    get_firestore_db().reset()
+    catalog_cache.clear()
+    product_search.reset()
+    seller_service.create({'name': 'Gogo Bakery', 'handle': 'gogo'}, doc_id='s1')
+    get_product_service().create({'seller_id': 's1', 'name': 'Fresh Bread', 'price': 25, 'is_active': True}, doc_id='bread')
+    get_product_service().create({'seller_id': 's1', 'name': 'Old Bread', 'price': 5, 'is_active': False}, doc_id='old')
+    for n in range(reviews):
+        get_user_service().create({'full_name': f'Buyer {n}', 'email': f'buyer{n}@example.com'}, doc_id=f'u{n}')
+        review_service.create({'seller_id': 's1', 'user_id': f'u{n}', 'rating': 5,
+                               'review_text': f'Review {n}', 'is_visible': True})
+
+
+def test_round_trips():
+    print_header("ROUND TRIPS")
+    seed()
+    catalog_cache.clear()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        bundle = ProductBundle.load('bread')
+        reviewers = bundle.reviewers()
+        bundle.reviewers()
+        # Three round trips: product, then seller and reviews side by side, then reviewers
+        assert metrics.rpcs == 4, metrics.as_dict()
+
+    assert bundle.seller['handle'] == 'gogo'
+    assert len(bundle.reviews) == 5 and len(reviewers) == 5
+    assert len(bundle.documents()) == 7
+
+    assert ProductBundle.load('old') is None
+    assert ProductBundle.load('missing') is None
+
+    seller_only = ProductBundle.load('bread', expand=('seller',))
+    assert seller_only.reviews is None and seller_only.reviewers() == {}
+    print("✅ PASS | 5 reviews with their authors, seller and reviews read concurrently")
+
+
+def test_expand():
+    print_header("PRODUCT API EXPAND")
+    seed(reviews=2)
+    client = app.test_client()
+
+    assert parse_expand(None) == {'seller'}
+    assert parse_expand('reviews, bogus') == {'reviews'}
+    assert parse_expand('') == frozenset()
+
+    default = client.get('/api/marketplace/product/bread').get_json()['product']
+    assert default['seller']['name'] == 'Gogo Bakery' and 'reviews' not in default
+
+    response = client.get('/api/marketplace/product/bread?expand=seller,reviews')
+    product = response.get_json()['product']
+    assert product['seller']['handle'] == 'gogo'
+    assert sorted(review['reviewer']['name'] for review in product['reviews']) == ['Buyer 0', 'Buyer 1']
+    assert 'email' not in str(product['reviews'])
+
+    bare = client.get('/api/marketplace/product/bread?expand=')
+    assert 'seller' not in bare.get_json()['product']
+    # Each expansion has its own validator
+    assert bare.headers['ETag'] != response.headers['ETag']
+    assert client.get('/api/marketplace/product/bread?expand=seller,reviews',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    review_service.create({'seller_id': 's1', 'user_id': 'u0', 'rating': 3, 'review_text': 'Again', 'is_visible': True})
+    assert client.get('/api/marketplace/product/bread?expand=seller,reviews',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+    assert client.get('/api/marketplace/product/old?expand=reviews').status_code == 404
+    print("✅ PASS | seller by default, reviews on request, validators per expansion")
+
+
+def main():
+    """Run all tests"""
+    test_round_trips()
+    test_expand()
+    print("\n✅ All product bundle tests passed")
+
+
+if __name__ == '__main__':
+    main()
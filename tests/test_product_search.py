@@ -0,0 +1,216 @@
+"""
+Test Suite for Product Full-Text Search
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Tokenizer folding, stopwords and stemming
+2. AND matching and BM25 ranking
+3. Searching products through ProductService
+4. Incremental updates on product and seller writes
+5. Loading the saved index in a new worker
+6. Facet filters and counts
+7. Prefix index and suggestions
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_db import seller_service, get_product_service
+from search import InvertedIndex, PrefixIndex, ProductSearch, product_search, tokenize
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed():
+    """Two sellers and a handful of products (one unlisted)"""
+    get_firestore_db().reset()
+    product_search.reset()
+    product_service = get_product_service()
+
+    seller_service.create({'name': 'Gogo Bakery', 'verification_status': 'verified',
+                           'location': 'Soweto, Johannesburg'}, doc_id='s1')
+    seller_service.create({'name': 'Thabo Sports', 'handle': 'thabo_sports', 'location': 'Durban'}, doc_id='s2')
+
+    product_service.create({'seller_id': 's1', 'name': 'Fresh Bread', 'category': 'Food', 'price': 25,
+                            'description': 'Baked every morning', 'total_sales': 40}, doc_id='bread')
+    product_service.create({'seller_id': 's1', 'name': 'Vetkoek', 'category': 'Food', 'price': 12,
+                            'description': 'Fried dough, great with fresh mince'}, doc_id='vetkoek')
+    product_service.create({'seller_id': 's2', 'name': 'Running Shoes', 'category': 'Sports', 'price': 899,
+                            'description': 'Light shoes for road running', 'total_sales': 3}, doc_id='shoes')
+    product_service.create({'seller_id': 's2', 'name': 'Old Shoes', 'category': 'Sports',
+                            'is_active': False}, doc_id='hidden')
+
+
+def test_tokenize():
+    print_header("TOKENIZER")
+    assert tokenize('The Café and the CAFES') == ['caf', 'caf']
+    assert tokenize('running shoes') == tokenize('run shoe')
+    assert tokenize('baked baking bake') == ['bak'] * 3
+    assert tokenize('') == []
+    print("✅ PASS | folding, stopwords and stemming")
+
+
+def test_ranking():
+    print_header("MATCHING AND RANKING")
+    index = InvertedIndex({'name': 3.0, 'description': 1.0})
+    index.add('a', {'name': 'fresh bread', 'description': 'soft white loaf'})
+    index.add('b', {'name': 'bread knife', 'description': 'cuts fresh bread'})
+    index.add('c', {'name': 'knife', 'description': 'steel'})
+
+    assert [doc_id for doc_id, _ in index.search('fresh bread')] == ['a', 'b']
+    assert index.search('bread steel') == []
+    assert [doc_id for doc_id, _ in index.search('knife', candidates={'c'})] == ['c']
+
+    index.remove('a')
+    assert [doc_id for doc_id, _ in index.search('fresh')] == ['b']
+    print("✅ PASS | AND semantics, field weights, candidates, removal")
+
+
+def test_product_search():
+    print_header("PRODUCT SEARCH")
+    seed()
+
+    product_service = get_product_service()
+    assert [p['id'] for p in product_service.search_products('fresh')] == ['bread', 'vetkoek']
+    assert [p['id'] for p in product_service.search_products('shoe')] == ['shoes']
+    assert {p['id'] for p in product_service.search_products('gogo food')} == {'bread', 'vetkoek'}
+    assert product_service.search_products('pizza') == []
+    print("✅ PASS | seller name, category and unlisted products")
+
+
+def test_incremental_updates():
+    print_header("INCREMENTAL UPDATES")
+    seed()
+    product_service = get_product_service()
+    product_service.search_products('bread')
+
+    product_service.create({'seller_id': 's2', 'name': 'Soccer Ball', 'category': 'Sports'}, doc_id='ball')
+    product_service.update('bread', {'name': 'Sourdough Loaf'})
+    seller_service.update('s2', {'name': 'Thabo Outdoor'})
+
+    assert [p['id'] for p in product_service.search_products('soccer')] == ['ball']
+    assert product_service.search_products('bread') == []
+    assert {p['id'] for p in product_service.search_products('outdoor')} == {'ball', 'shoes'}
+
+    product_service.delete('ball')
+    assert product_service.search_products('soccer') == []
+    print("✅ PASS | creates, updates, seller renames and deletes")
+
+
+def test_saved_index():
+    print_header("SAVED INDEX")
+    seed()
+    product_search.rebuild()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        worker = ProductSearch(sync_interval=30)
+        assert [doc_id for doc_id, _ in worker.search('shoes')] == ['shoes']
+        # One query for the saved index, two for products/sellers updated since
+        assert metrics.queries == 3, metrics.as_dict()
+        assert metrics.point_reads == 0
+    print("✅ PASS | new worker loads the index without scanning products")
+
+
+def test_facets():
+    print_header("FACETS")
+    seed()
+
+    everything = product_search.faceted_search()
+    assert [p['id'] for p in everything['products']] == ['bread', 'shoes', 'vetkoek']
+    assert everything['facets']['category'] == {'Food': 2, 'Sports': 1}
+    assert everything['facets']['price'] == {'0-50': 2, '500-1000': 1}
+
+    verified = product_search.faceted_search(verified_only=True, location='johannesburg')
+    assert verified['total'] == 2
+    assert verified['facets']['verification_status'] == {'verified': 2}
+
+    # Exact price range inside one bucket; category counts ignore the category filter
+    cheap_sports = product_search.faceted_search('', category='Sports', min_price=20, max_price=30)
+    assert cheap_sports['total'] == 0
+    assert cheap_sports['facets']['category'] == {'Food': 1}
+
+    fresh = product_search.faceted_search('fresh', category='Food')
+    assert [p['id'] for p in fresh['products']] == ['bread', 'vetkoek']
+    assert fresh['facets']['location'] == {'Soweto, Johannesburg': 2}
+
+    # Paging through the ranking
+    second = product_search.faceted_search('fresh', limit=1, offset=1)
+    assert [p['id'] for p in second['products']] == ['vetkoek'] and second['total'] == 2
+    assert [p['id'] for p in product_search.faceted_search(limit=2, offset=2)['products']] == ['vetkoek']
+
+    # Seller changes reach the facets
+    seller_service.update('s2', {'verification_status': 'verified'})
+    assert product_search.faceted_search(verified_only=True)['total'] == 3
+    print("✅ PASS | filters, exact price ranges and per-facet counts")
+
+
+def test_prefix_index():
+    print_header("PREFIX INDEX")
+    index = PrefixIndex()
+    index.add('a', 'Running Shoes', [5, 0], {'id': 'a'})
+    index.add('b', 'Shoe Polish', [9, 0], {'id': 'b'})
+    index.add('c', 'Bread', [1, 0], {'id': 'c'})
+
+    assert [s['id'] for s in index.lookup('sho')] == ['b', 'a']
+    assert [s['id'] for s in index.lookup('RUNNING s')] == ['a']
+    assert index.lookup('x') == [] and index.lookup('  ') == []
+
+    # Cached results follow popularity changes and removals
+    index.add('a', 'Running Shoes', [20, 0], {'id': 'a'})
+    assert [s['id'] for s in index.lookup('sho')] == ['a', 'b']
+    index.remove('a')
+    assert [s['id'] for s in index.lookup('sho')] == ['b']
+    print("✅ PASS | word prefixes, popularity order, cache invalidation")
+
+
+def test_suggestions():
+    print_header("SUGGESTIONS")
+    seed()
+
+    suggestions = product_search.suggest('s')
+    assert {(s['type'], s['text']) for s in suggestions} == {
+        ('category', 'Sports'), ('seller', 'thabo_sports'), ('product', 'Running Shoes')
+    }
+    assert product_search.suggest('fre') == [{'text': 'Fresh Bread', 'type': 'product', 'id': 'bread'}]
+
+    get_product_service().update('vetkoek', {'name': 'Fresh Vetkoek', 'total_sales': 100})
+    assert [s['id'] for s in product_search.suggest('fresh')] == ['vetkoek', 'bread']
+    get_product_service().delete('shoes')
+    assert product_search.suggest('s') == []
+    print("✅ PASS | products, categories and seller handles, kept current")
+
+
+def main():
+    """Run all tests"""
+    test_tokenize()
+    test_ranking()
+    test_product_search()
+    test_incremental_updates()
+    test_saved_index()
+    test_facets()
+    test_prefix_index()
+    test_suggestions()
+    print("\n✅ All product search tests passed")
+
+
+if __name__ == '__main__':
+    main()
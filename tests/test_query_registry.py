@@ -0,0 +1,80 @@
+"""
+Test Suite for the Query Registry
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. firestore.indexes.json matches the services' QUERIES declarations
+2. Registered queries read only the documents they return
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_db import review_service, notification_service
+from scripts.generate_indexes import INDEXES_FILE, generate
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def test_indexes_file_is_up_to_date():
+    print_header("INDEXES FILE")
+    with open(INDEXES_FILE) as f:
+        assert f.read() == generate(), "run scripts/generate_indexes.py"
+    print("✅ PASS | firestore.indexes.json matches the registry")
+
+
+def test_registered_queries_read_only_what_they_return():
+    print_header("SERVER-SIDE ORDERING")
+    db = get_firestore_db()
+    db.reset()
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = db.batch()
+    for i in range(120):
+        batch.set(db.collection('reviews').document(f'r{i}'),
+                  {'product_id': 'p1', 'rating': 5, 'created_at': start + timedelta(minutes=i)})
+    for i in range(80):
+        batch.set(db.collection('notifications').document(f'n{i}'),
+                  {'user_id': 'u1', 'title': f'n{i}', 'created_at': start + timedelta(minutes=i)})
+    batch.commit()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        reviews = review_service.get_product_reviews('p1', limit=50)
+        assert len(reviews) == 50 and metrics.streamed_docs == 50
+        assert reviews[0]['created_at'] == start + timedelta(minutes=119)
+
+        notifications = notification_service.get_by_user('u1', limit=10)
+        assert [n['title'] for n in notifications[:2]] == ['n79', 'n78']
+        assert metrics.streamed_docs == 60
+    print("✅ PASS | newest reviews and notifications cost one read each")
+
+
+def main():
+    """Run all tests"""
+    test_indexes_file_is_up_to_date()
+    test_registered_queries_read_only_what_they_return()
+    print("\n✅ All query registry tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Test Suite for Bulk Follow/Like State Lookups
+
+Runs against the in-memory backend (SPARZAFI_DB_BACKEND=memory).
+
+Tests:
+1. Followed seller and liked seller/video ID sets
+2. One query per set per request, however many items are checked
+3. Follow/like changes are visible later in the same request
+"""
+
+import os
+import sys
+
+# Select the in-memory backend before anything imports firebase_config
+os.environ['SPARZAFI_DB_BACKEND'] = 'memory'
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from firebase_config import get_firestore_db
+from firebase_metrics import start_request_metrics
+from firebase_db import follow_service, like_service
+
+
+app = Flask(__name__)
+
+
+def print_header(title):
+    """Print test section header"""
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def seed():
+    """u1 follows and likes two sellers and one video; u2 follows one seller"""
+    get_firestore_db().reset()
+    for seller_id in ('s1', 's2'):
+        follow_service.follow('u1', seller_id)
+        like_service.like_seller('u1', seller_id)
+    like_service.like_video('u1', 'v1')
+    follow_service.follow('u2', 's3')
+
+
+def test_id_sets():
+    print_header("ID SETS")
+    seed()
+
+    assert follow_service.get_followed_seller_ids('u1') == {'s1', 's2'}
+    assert like_service.get_liked_ids('u1', 'seller') == {'s1', 's2'}
+    assert like_service.get_liked_ids('u1', 'video') == {'v1'}
+    assert follow_service.get_followed_seller_ids(None) == frozenset()
+
+    try:
+        like_service.get_liked_ids('u1', 'product')
+        assert False, "unknown kind should raise"
+    except ValueError:
+        pass
+    print("✅ PASS | follow and like sets match the stored documents")
+
+
+def test_one_query_per_request():
+    print_header("QUERIES PER REQUEST")
+    seed()
+
+    with app.test_request_context('/'):
+        metrics = start_request_metrics()
+        for seller_id in [f's{i}' for i in range(50)]:
+            seller_id in follow_service.get_followed_seller_ids('u1')
+            seller_id in like_service.get_liked_ids('u1', 'seller')
+            seller_id in like_service.get_liked_ids('u1', 'video')
+
+        assert metrics.queries == 3, metrics.as_dict()
+        assert metrics.point_reads == 0
+    print("✅ PASS | 50 sellers checked with 3 queries")
+
+
+def test_changes_within_request():
+    print_header("CHANGES IN THE SAME REQUEST")
+    seed()
+
+    with app.test_request_context('/'):
+        assert 's3' not in follow_service.get_followed_seller_ids('u1')
+        follow_service.follow('u1', 's3')
+        assert 's3' in follow_service.get_followed_seller_ids('u1')
+
+        assert 'v1' in like_service.get_liked_ids('u1', 'video')
+        like_service.unlike_video('u1', 'v1')
+        assert 'v1' not in like_service.get_liked_ids('u1', 'video')
+    print("✅ PASS | follow/unlike invalidate the request's sets")
+
+
+def main():
+    """Run all tests"""
+    test_id_sets()
+    test_one_query_per_request()
+    test_changes_within_request()
+    print("\n✅ All viewer state tests passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,16 +9,35 @@ Separate explorers for:
 - Public (anonymized transaction data)
 """
 
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify, make_response
 from functools import wraps
 from transaction_explorer.service import get_transaction_explorer_service
 from firebase_db import seller_service, deliverer_service, get_user_service
+from firebase_cache import bypass_catalog_cache
+from http_cache import Validator
 from datetime import datetime
 
 
 # Create blueprint
 explorer_bp = Blueprint('explorer', __name__, url_prefix='/explorer')
 
+# Transaction fields each role's explorer page displays (large arrays such as
+# verification_logs, status_history and items are never fetched for list views)
+SELLER_LIST_FIELDS = [
+    'transaction_code', 'status', 'payment_method', 'total_amount', 'timestamp',
+    'immutable_timestamp', 'timestamp_locked', 'user_id', 'deliverer_id',
+    'delivery_address', 'pickup_code'
+]
+BUYER_LIST_FIELDS = [
+    'transaction_code', 'status', 'payment_method', 'delivery_method', 'total_amount',
+    'timestamp', 'immutable_timestamp', 'timestamp_locked', 'seller_id', 'deliverer_id',
+    'delivery_code'
+]
+DRIVER_LIST_FIELDS = [
+    'transaction_code', 'status', 'timestamp', 'immutable_timestamp', 'timestamp_locked',
+    'seller_id', 'delivery_address', 'delivery_fee', 'pickup_code', 'delivery_code'
+]
+
 
 # ==================== AUTHENTICATION DECORATORS ====================
 
@@ -111,7 +130,10 @@ def seller_explorer():
     filters = {k: v for k, v in filters.items() if v}
 
     # Search transactions
-    transactions = explorer_service.search_seller_transactions(seller_id, filters)
+    transactions = explorer_service.search_seller_transactions(seller_id, filters, fields=SELLER_LIST_FIELDS)
+
+    # Batch-load buyers referenced by this page
+    buyers_by_id = user_service.get_map([t.get('user_id') for t in transactions])
 
     # Enhance transactions with additional data
     for transaction in transactions:
@@ -125,7 +147,7 @@ def seller_explorer():
 
         # Get buyer info (partial)
         if transaction.get('user_id'):
-            buyer = user_service.get(transaction['user_id'])
+            buyer = buyers_by_id.get(transaction['user_id'])
             if buyer:
                 # Mask buyer email
                 email = buyer.get('email', '')
@@ -185,20 +207,24 @@ def buyer_explorer():
     filters = {k: v for k, v in filters.items() if v}
 
     # Search transactions
-    transactions = explorer_service.search_buyer_transactions(user_id, filters)
+    transactions = explorer_service.search_buyer_transactions(user_id, filters, fields=BUYER_LIST_FIELDS)
+
+    # Batch-load sellers and deliverers referenced by this page
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in transactions])
+    deliverers_by_id = deliverer_service.get_map([t.get('deliverer_id') for t in transactions])
 
     # Enhance transactions with additional data
     for transaction in transactions:
         # Get seller info
         if transaction.get('seller_id'):
-            seller = seller_service.get(transaction['seller_id'])
+            seller = sellers_by_id.get(transaction['seller_id'])
             if seller:
                 transaction['seller_name'] = seller.get('name', '')
                 transaction['seller_handle'] = seller.get('handle', '')
 
         # Get driver info (partial for privacy)
         if transaction.get('deliverer_id'):
-            deliverer = deliverer_service.get(transaction['deliverer_id'])
+            deliverer = deliverers_by_id.get(transaction['deliverer_id'])
             if deliverer:
                 # Mask driver phone number
                 phone = deliverer.get('phone', '')
@@ -265,13 +291,16 @@ def driver_explorer():
     filters = {k: v for k, v in filters.items() if v}
 
     # Search transactions
-    transactions = explorer_service.search_driver_transactions(deliverer_id, filters)
+    transactions = explorer_service.search_driver_transactions(deliverer_id, filters, fields=DRIVER_LIST_FIELDS)
+
+    # Batch-load sellers referenced by this page
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in transactions])
 
     # Enhance transactions with additional data
     for transaction in transactions:
         # Get seller info
         if transaction.get('seller_id'):
-            seller = seller_service.get(transaction['seller_id'])
+            seller = sellers_by_id.get(transaction['seller_id'])
             if seller:
                 transaction['seller_name'] = seller.get('name', '')
                 transaction['pickup_location'] = seller.get('address', 'N/A')
@@ -318,6 +347,9 @@ def admin_explorer():
     - Perform deep audit-level searches
     - Query by ANY detail
     """
+    # Audit views must not see cached catalog data
+    bypass_catalog_cache()
+
     user = session.get('user')
     explorer_service = get_transaction_explorer_service()
     user_service = get_user_service()
@@ -343,11 +375,20 @@ def admin_explorer():
     # Search transactions (admin has full access)
     transactions = explorer_service.search_admin_transactions(filters)
 
+    # Batch-load related documents: sellers and deliverers first, then every
+    # user (buyers and driver accounts) in a single users read
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in transactions])
+    deliverers_by_id = deliverer_service.get_map([t.get('deliverer_id') for t in transactions])
+    users_by_id = user_service.get_map(
+        [t.get('user_id') for t in transactions] +
+        [d.get('user_id') for d in deliverers_by_id.values()]
+    )
+
     # Enhance transactions with FULL data (admin sees everything)
     for transaction in transactions:
         # Get buyer info (FULL)
         if transaction.get('user_id'):
-            buyer = user_service.get(transaction['user_id'])
+            buyer = users_by_id.get(transaction['user_id'])
             if buyer:
                 transaction['buyer_email'] = buyer.get('email', '')
                 transaction['buyer_phone'] = buyer.get('phone', '')
@@ -355,7 +396,7 @@ def admin_explorer():
 
         # Get seller info (FULL)
         if transaction.get('seller_id'):
-            seller = seller_service.get(transaction['seller_id'])
+            seller = sellers_by_id.get(transaction['seller_id'])
             if seller:
                 transaction['seller_name'] = seller.get('name', '')
                 transaction['seller_handle'] = seller.get('handle', '')
@@ -364,13 +405,13 @@ def admin_explorer():
 
         # Get driver info (FULL)
         if transaction.get('deliverer_id'):
-            deliverer = deliverer_service.get(transaction['deliverer_id'])
+            deliverer = deliverers_by_id.get(transaction['deliverer_id'])
             if deliverer:
                 transaction['driver_phone'] = deliverer.get('phone', '')
                 transaction['driver_vehicle'] = deliverer.get('vehicle_type', '')
                 # Get driver user info
                 if deliverer.get('user_id'):
-                    driver_user = user_service.get(deliverer['user_id'])
+                    driver_user = users_by_id.get(deliverer['user_id'])
                     if driver_user:
                         transaction['driver_email'] = driver_user.get('email', '')
                         transaction['driver_name'] = driver_user.get('name', '')
@@ -427,6 +468,11 @@ def public_explorer():
     # Get public transactions (anonymized)
     transactions = explorer_service.get_public_transactions(limit)
 
+    # Public transactions carry no updated_at: the listed values themselves version the page
+    validator = Validator([], transactions, private=True)
+    if validator.is_fresh():
+        return validator.not_modified()
+
     # Calculate statistics
     total_volume = sum(t.get('amount', 0) for t in transactions)
     avg_amount = total_volume / len(transactions) if transactions else 0
@@ -437,9 +483,9 @@ def public_explorer():
         'avg_amount': avg_amount
     }
 
-    return render_template('explorer/public_explorer.html',
-                         transactions=transactions,
-                         stats=stats)
+    return validator.apply(make_response(render_template('explorer/public_explorer.html',
+                                                         transactions=transactions,
+                                                         stats=stats)))
 
 
 # ==================== TRANSACTION DETAILS API ====================
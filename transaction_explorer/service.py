@@ -15,18 +15,43 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from google.cloud import firestore
 from firebase_config import get_firestore_db
+from firebase_db import transaction_service
 from google.cloud.firestore_v1.base_query import FieldFilter
 
 
+# Document fields read by the Python-side search filters and sorting
+FILTER_FIELDS = {
+    'transaction_code': 'transaction_code',
+    'buyer_address': 'delivery_address',
+    'seller_name': 'seller_name',
+    'date_start': 'timestamp',
+    'date_end': 'timestamp',
+}
+
+# Fields needed to build an anonymized public transaction
+PUBLIC_FIELDS = [
+    'transaction_hash', 'immutable_timestamp', 'timestamp', 'total_amount',
+    'delivery_method', 'status', 'user_id', 'seller_id'
+]
+
+
 class TransactionExplorerService:
     """
     Comprehensive transaction explorer with full security and tracking
     """
 
-    def __init__(self):
-        self.db = get_firestore_db()
-        self.transactions = self.db.collection('transactions')
-        self.verification_logs = self.db.collection('verification_logs')
+    @property
+    def db(self):
+        """Firestore client (resolved on use, like FirebaseService.db)"""
+        return get_firestore_db()
+
+    @property
+    def transactions(self):
+        return self.db.collection('transactions')
+
+    @property
+    def verification_logs(self):
+        return self.db.collection('verification_logs')
 
     # ==================== TRANSACTION CODE GENERATION ====================
 
@@ -392,7 +417,8 @@ class TransactionExplorerService:
 
         return None
 
-    def search_seller_transactions(self, seller_id: str, filters: Optional[Dict] = None) -> List[Dict]:
+    def search_seller_transactions(self, seller_id: str, filters: Optional[Dict] = None,
+                                   fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Search transactions for a seller with filters
 
@@ -404,6 +430,8 @@ class TransactionExplorerService:
             - status: str
             - payment_method: str
             - limit: int (default 50)
+
+        fields: only fetch these document fields (plus the ones the filters need)
         """
         # Base query
         query = self.transactions.where(filter=FieldFilter('seller_id', '==', seller_id))
@@ -419,7 +447,7 @@ class TransactionExplorerService:
             query = query.where(filter=FieldFilter('payment_method', '==', filters['payment_method']))
 
         # Get results
-        docs = query.stream()
+        docs = self._select(query, fields, filters).stream()
         transactions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
         # Apply Python-side filters (to avoid composite indexes)
@@ -454,7 +482,8 @@ class TransactionExplorerService:
         limit = filters.get('limit', 50)
         return transactions[:limit]
 
-    def search_buyer_transactions(self, buyer_id: str, filters: Optional[Dict] = None) -> List[Dict]:
+    def search_buyer_transactions(self, buyer_id: str, filters: Optional[Dict] = None,
+                                  fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Search transactions for a buyer with filters
 
@@ -466,6 +495,8 @@ class TransactionExplorerService:
             - delivery_method: str
             - seller_name: str
             - limit: int (default 50)
+
+        fields: only fetch these document fields (plus the ones the filters need)
         """
         # Base query
         query = self.transactions.where(filter=FieldFilter('user_id', '==', buyer_id))
@@ -481,7 +512,7 @@ class TransactionExplorerService:
             query = query.where(filter=FieldFilter('delivery_method', '==', filters['delivery_method']))
 
         # Get results
-        docs = query.stream()
+        docs = self._select(query, fields, filters).stream()
         transactions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
         # Apply Python-side filters
@@ -516,7 +547,8 @@ class TransactionExplorerService:
         limit = filters.get('limit', 50)
         return transactions[:limit]
 
-    def search_driver_transactions(self, driver_id: str, filters: Optional[Dict] = None) -> List[Dict]:
+    def search_driver_transactions(self, driver_id: str, filters: Optional[Dict] = None,
+                                   fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Search transactions for a driver/deliverer with filters
 
@@ -527,6 +559,8 @@ class TransactionExplorerService:
             - seller_name: str
             - status: str
             - limit: int (default 50)
+
+        fields: only fetch these document fields (plus the ones the filters need)
         """
         # Base query
         query = self.transactions.where(filter=FieldFilter('deliverer_id', '==', driver_id))
@@ -538,7 +572,7 @@ class TransactionExplorerService:
             query = query.where(filter=FieldFilter('status', '==', filters['status']))
 
         # Get results
-        docs = query.stream()
+        docs = self._select(query, fields, filters).stream()
         transactions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
 
         # Apply Python-side filters
@@ -573,7 +607,8 @@ class TransactionExplorerService:
         limit = filters.get('limit', 50)
         return transactions[:limit]
 
-    def search_admin_transactions(self, filters: Optional[Dict] = None) -> List[Dict]:
+    def search_admin_transactions(self, filters: Optional[Dict] = None,
+                                  fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Search ALL transactions (admin access) with advanced filters
 
@@ -592,59 +627,65 @@ class TransactionExplorerService:
             - buyer_email: str
             - driver_email: str
             - limit: int (default 100)
+
+        fields: only fetch these document fields (plus the ones the filters need)
         """
         filters = filters or {}
 
-        # Start with base query or filtered query
-        query = self.transactions
-
-        # Apply Firestore filters where possible
+        # Apply one Firestore filter where possible
+        query_filters = []
         if filters.get('seller_id'):
-            query = query.where(filter=FieldFilter('seller_id', '==', filters['seller_id']))
+            query_filters.append(('seller_id', '==', filters['seller_id']))
         elif filters.get('buyer_id'):
-            query = query.where(filter=FieldFilter('user_id', '==', filters['buyer_id']))
+            query_filters.append(('user_id', '==', filters['buyer_id']))
         elif filters.get('driver_id'):
-            query = query.where(filter=FieldFilter('deliverer_id', '==', filters['driver_id']))
+            query_filters.append(('deliverer_id', '==', filters['driver_id']))
         elif filters.get('status'):
-            query = query.where(filter=FieldFilter('status', '==', filters['status']))
+            query_filters.append(('status', '==', filters['status']))
         elif filters.get('payment_method'):
-            query = query.where(filter=FieldFilter('payment_method', '==', filters['payment_method']))
-
-        # Get all matching documents
-        docs = query.stream()
-        transactions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
-
-        # Apply Python-side filters
-        if filters.get('transaction_code'):
-            transactions = [
-                t for t in transactions
-                if filters['transaction_code'].upper() in t.get('transaction_code', '').upper()
-            ]
-
-        if filters.get('transaction_id'):
-            transactions = [
-                t for t in transactions
-                if filters['transaction_id'] in t.get('id', '')
-            ]
-
-        if filters.get('date_start'):
-            transactions = [
-                t for t in transactions
-                if t.get('timestamp', '') >= filters['date_start']
-            ]
-
-        if filters.get('date_end'):
-            transactions = [
-                t for t in transactions
-                if t.get('timestamp', '') <= filters['date_end']
-            ]
-
-        # Sort by timestamp (newest first)
-        transactions.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-
-        # Apply limit
+            query_filters.append(('payment_method', '==', filters['payment_method']))
+
+        # Python-side filters
+        def matches(t):
+            if filters.get('transaction_code') and \
+                    filters['transaction_code'].upper() not in t.get('transaction_code', '').upper():
+                return False
+            if filters.get('transaction_id') and filters['transaction_id'] not in t.get('id', ''):
+                return False
+            if filters.get('date_start') and not t.get('timestamp', '') >= filters['date_start']:
+                return False
+            if filters.get('date_end') and not t.get('timestamp', '') <= filters['date_end']:
+                return False
+            return True
+
+        if fields:
+            fields = list(dict.fromkeys(
+                list(fields) + [FILTER_FIELDS[key] for key in filters if FILTER_FIELDS.get(key)]
+            ))
+
+        # Stream newest first and stop once the limit is reached, instead of
+        # loading every matching transaction into memory. Ordered by created_at,
+        # which every transaction has: transfers, withdrawals and rewards have no
+        # timestamp, and ordering on a field skips documents without it
         limit = filters.get('limit', 100)
-        return transactions[:limit]
+        return list(transaction_service.iter_query(
+            query_filters,
+            order_by='created_at',
+            direction='DESCENDING',
+            limit=limit,
+            fields=fields,
+            predicate=matches
+        ))
+
+    @staticmethod
+    def _select(query, fields: Optional[List[str]], filters: Dict):
+        """Project a search query onto `fields` plus whatever the active filters read"""
+        if not fields:
+            return query
+
+        needed = list(fields) + ['timestamp']
+        needed += [FILTER_FIELDS[key] for key in filters if FILTER_FIELDS.get(key)]
+        return query.select(list(dict.fromkeys(needed)))
 
     def get_public_transactions(self, limit: int = 50) -> List[Dict]:
         """
@@ -663,10 +704,10 @@ class TransactionExplorerService:
         - User details
         - Pickup or delivery codes
         """
-        # Get recent completed transactions
+        # Get recent completed transactions (only the fields that are published)
         query = self.transactions.where(
             filter=FieldFilter('status', '==', 'COMPLETED')
-        ).limit(limit)
+        ).select(PUBLIC_FIELDS).limit(limit)
 
         docs = query.stream()
         transactions = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
@@ -22,6 +22,7 @@ from firebase_db import (
     delivery_tracking_service
 )
 from firebase_config import get_firestore_db
+from firebase_pagination import InvalidCursor
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud import firestore
 
@@ -63,17 +64,20 @@ def buyer_dashboard():
     active_orders = []
     completed_orders = []
 
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in user_transactions])
+    deliverers_by_id = deliverer_service.get_map([t.get('deliverer_id') for t in user_transactions])
+
     for trans in user_transactions:
         # Add seller info
         if trans.get('seller_id'):
-            seller = seller_service.get(trans['seller_id'])
+            seller = sellers_by_id.get(trans['seller_id'])
             if seller:
                 trans['seller_name'] = seller.get('name', '')
                 trans['seller_handle'] = seller.get('handle', '')
 
         # Add deliverer info
         if trans.get('deliverer_id'):
-            deliverer = deliverer_service.get(trans['deliverer_id'])
+            deliverer = deliverers_by_id.get(trans['deliverer_id'])
             if deliverer:
                 trans['deliverer_user_id'] = deliverer.get('user_id')
 
@@ -347,40 +351,39 @@ def download_order_csv(order_id):
 
 
 def purchase_history():
-    """Full purchase history with pagination"""
+    """Full purchase history with cursor pagination"""
     user = session.get('user')
-    product_service = get_product_service()
 
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', None)
     per_page = 20
-    offset = (page - 1) * per_page
 
-    # Get all user transactions
-    all_transactions = transaction_service.get_by_user(user['id'])
+    # Read only the requested page, newest first
+    try:
+        result = transaction_service.get_buyer_transactions_page(user['id'], page_size=per_page, cursor=cursor)
+    except InvalidCursor:
+        return redirect(url_for('user.purchase_history'))
+
+    orders = result['items']
 
     # Add seller info and item count
-    for trans in all_transactions:
+    sellers_by_id = seller_service.get_map([t.get('seller_id') for t in orders])
+
+    for trans in orders:
         if trans.get('seller_id'):
-            seller = seller_service.get(trans['seller_id'])
+            seller = sellers_by_id.get(trans['seller_id'])
             if seller:
                 trans['seller_name'] = seller.get('name', '')
                 trans['seller_handle'] = seller.get('handle', '')
 
         trans['item_count'] = len(trans.get('items', []))
 
-    # Sort by timestamp
-    all_transactions = sorted(all_transactions, key=lambda x: x.get('timestamp', ''), reverse=True)
-
-    # Paginate
-    total = len(all_transactions)
-    orders = all_transactions[offset:offset + per_page]
-
     history_data = {
         'orders': orders,
         'page': page,
         'per_page': per_page,
-        'total': total,
-        'total_pages': (total + per_page - 1) // per_page
+        'next_cursor': result['next_cursor'],
+        'has_more': result['has_more']
     }
 
     return render_template('buyer/purchase_history.html', data=history_data)
@@ -353,7 +353,8 @@ def rate_seller(order_id):
             'rating': rating,
             'review_text': review_text,
             'is_verified_purchase': True,
-            'product_id': product_id
+            'product_id': product_id,
+            'is_visible': True
         })
 
     return jsonify({'success': True, 'message': 'Review submitted'})